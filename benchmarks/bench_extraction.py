@@ -0,0 +1,217 @@
+"""Cart extraction benchmarks with machine-readable results and baseline comparison
+
+Usage:
+    python -m benchmarks.bench_extraction                   # run and compare against the baseline
+    python -m benchmarks.bench_extraction --update-baseline # store this run as the new baseline
+    python -m benchmarks.bench_extraction --skip-browser    # parsing and snapshot benchmarks only, as in CI
+
+benchmarks/baseline.json is committed and holds the browser-free suites.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from pathlib import Path
+from typing import Dict, Any, Callable, List
+
+from benchmarks.fixtures import build_fixtures, write_fixtures, price_strings
+from src.extractors.cart_extractor import CartExtractor
+from src.extractors.price_extractor import PriceExtractor
+from src.extractors.price_parser import parse_price, parse_price_cents, parse_prices
+from src.extractors.html_extractor import HtmlSnapshotExtractor
+
+BENCH_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest.json"
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def serve_directory(directory: Path):
+    """Serve fixtures from a local HTTP server on a free port"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=str(directory)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def time_calls(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples), "max_ms": max(samples)}
+
+def calibrate(repeat: int) -> float:
+    """Median time of a fixed pure-Python loop; baselines from other machines are compared relative to it"""
+    def workload():
+        total = 0
+        for i in range(200_000):
+            total += i % 7
+        return total
+    return time_calls(workload, max(repeat, 5))["median_ms"]
+
+def bench_price_parsing(count: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Throughput of the price parser cold, memoized and batched over mixed price strings"""
+    texts = price_strings(count)
+    price_extractor = PriceExtractor()
+
+    def cold(parse):
+        def run():
+            parse_price_cents.cache_clear()
+            parse(texts)
+        return run
+
+    cases = [
+        ("parse_price_cold", cold(lambda batch: [parse_price(text) for text in batch])),
+        ("parse_price_warm", lambda: [parse_price(text) for text in texts]),
+        ("parse_prices_batch_cold", cold(parse_prices)),
+        ("cart_extractor._parse_price", lambda: [CartExtractor._parse_price(text) for text in texts]),
+        ("price_extractor.extract_price", lambda: [price_extractor.extract_price(text) for text in texts])
+    ]
+
+    results = {}
+    for name, run in cases:
+        timing = time_calls(run, repeat)
+        timing["ops_per_second"] = count / (timing["median_ms"] / 1000) if timing["median_ms"] else 0.0
+        results[name] = timing
+
+    return results
+
+def bench_snapshot(fixtures: Dict[str, str], repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Browser-free extraction of every fixture with the lxml snapshot extractor"""
+    extractor = HtmlSnapshotExtractor()
+    results = {}
+    for name, html in fixtures.items():
+        timing = time_calls(lambda: extractor.extract_cart_info(html), repeat)
+        timing["items"] = extractor.extract_cart_info(html)["item_count"]
+        results[name] = timing
+    return results
+
+async def bench_browser(fixture_names: List[str], base_url: str, modes: List[str], repeat: int) -> Dict[str, Dict[str, Any]]:
+    """End-to-end CartExtractor.extract_cart_info on locally served fixtures"""
+    from playwright.async_api import async_playwright
+
+    results = {}
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        page = await browser.new_page()
+        try:
+            for mode in modes:
+                extractor = CartExtractor(page, mode=mode)
+                for name in fixture_names:
+                    samples = []
+                    items = 0
+                    for _ in range(repeat):
+                        await page.goto(f"{base_url}/{name}.html", wait_until="domcontentloaded")
+                        started = time.perf_counter()
+                        cart_info = await extractor.extract_cart_info(page)
+                        samples.append((time.perf_counter() - started) * 1000)
+                        items = cart_info["item_count"]
+                    results[f"{mode}/{name}"] = {
+                        "median_ms": statistics.median(samples),
+                        "min_ms": min(samples),
+                        "max_ms": max(samples),
+                        "items": items
+                    }
+        finally:
+            await browser.close()
+    return results
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """List every benchmark whose median got slower than the baseline by more than tolerance
+
+    Baseline timings are first scaled by how much slower or faster this machine ran the calibration loop.
+    """
+    regressions = []
+    speed = 1.0
+    if current.get("calibration_ms") and baseline.get("calibration_ms"):
+        speed = current["calibration_ms"] / baseline["calibration_ms"]
+    for suite, cases in current["suites"].items():
+        for case, timing in cases.items():
+            reference = baseline.get("suites", {}).get(suite, {}).get(case)
+            if not reference or not reference.get("median_ms"):
+                continue
+            expected_ms = reference["median_ms"] * speed
+            ratio = timing["median_ms"] / expected_ms
+            timing["baseline_median_ms"] = round(expected_ms, 3)
+            timing["ratio_to_baseline"] = round(ratio, 3)
+            if ratio > 1 + tolerance:
+                regressions.append(f"{suite}/{case}: {expected_ms:.2f}ms -> {timing['median_ms']:.2f}ms ({ratio:.2f}x)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cart extraction on synthetic Amazon-like carts")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the median is reported")
+    parser.add_argument("--price-count", type=int, default=10000, help="Price strings per parsing run")
+    parser.add_argument("--modes", default="script,element,snapshot", help="CartExtractor modes to time in the browser")
+    parser.add_argument("--skip-browser", action="store_true", help="Only run browser-free benchmarks")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    fixtures = build_fixtures()
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "calibration_ms": calibrate(args.repeat),
+        "suites": {
+            "price_parsing": bench_price_parsing(args.price_count, args.repeat),
+            "snapshot_extraction": bench_snapshot(fixtures, args.repeat)
+        }
+    }
+
+    if not args.skip_browser:
+        with tempfile.TemporaryDirectory() as tmp:
+            write_fixtures(Path(tmp))
+            server, base_url = serve_directory(Path(tmp))
+            try:
+                modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+                results["suites"]["browser_extraction"] = asyncio.run(
+                    bench_browser(list(fixtures), base_url, modes, args.repeat)
+                )
+            finally:
+                server.shutdown()
+
+    regressions = []
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"Baseline written to {baseline_path}")
+    elif baseline_path.exists():
+        regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+    else:
+        print(f"No baseline at {baseline_path}; run with --update-baseline to create one")
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    results["regressions"] = regressions
+    output_path.write_text(json.dumps(results, indent=2))
+
+    for suite, cases in results["suites"].items():
+        print(f"\n{suite}")
+        for case, timing in cases.items():
+            ratio = f"  ({timing['ratio_to_baseline']:.2f}x baseline)" if "ratio_to_baseline" in timing else ""
+            print(f"   {case:<40} {timing['median_ms']:>10.2f} ms{ratio}")
+
+    print(f"\nResults written to {output_path}")
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"   {regression}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Repeated cart audits through the LLM response cache, using the local fake model
+
+Usage:
+    python -m benchmarks.bench_llm_cache --audits 20 --carts 4 --latency-ms 300
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from benchmarks.fake_llm import FakeChatModel
+from src.llm.cache import CachingChatModel, LLMResponseStore
+
+SYSTEM_PROMPT = "You are a browser agent. Read the cart and decide the next action."
+
+class CartDecision(BaseModel):
+    action: str
+    total: float
+
+def cart_state(cart_id: int, step: int) -> str:
+    """Page state as the agent sees it: stable cart content plus per-run noise"""
+    rng = random.Random(cart_id)
+    rows = "\n".join(f"[{i}]<span>Product {cart_id}-{i}</span> ${rng.uniform(1, 200):.2f}" for i in range(rng.randint(1, 6)))
+    return (
+        f"Current url: https://www.amazon.com/gp/cart/view.html?session={uuid.uuid4().hex}{uuid.uuid4().hex}\n"
+        f"Current date and time: {datetime.now().isoformat()}\n"
+        f"Step {step}\nInteractive elements:\n{rows}"
+    )
+
+def respond(messages) -> str:
+    total = sum(float(part.split("$")[1]) for part in messages[-1][1].splitlines() if "$" in part)
+    return json.dumps({"action": "done" if total else "scroll", "total": round(total, 2)})
+
+async def run_audits(llm, audits: int, carts: int, steps: int) -> float:
+    structured = llm.with_structured_output(CartDecision, include_raw=True)
+    started = time.perf_counter()
+    for audit in range(audits):
+        for step in range(steps):
+            messages = [("system", SYSTEM_PROMPT), ("human", cart_state(audit % carts, step))]
+            await structured.ainvoke(messages)
+    return time.perf_counter() - started
+
+async def bench(args) -> dict:
+    uncached = FakeChatModel(respond, latency_ms=args.latency_ms)
+    uncached_seconds = await run_audits(uncached, args.audits, args.carts, args.steps)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LLMResponseStore(str(Path(tmp) / "llm_cache.sqlite3"), max_entries=args.max_entries, ttl_seconds=3600)
+        fake = FakeChatModel(respond, latency_ms=args.latency_ms)
+        cached_seconds = await run_audits(CachingChatModel(fake, store), args.audits, args.carts, args.steps)
+        stats = store.stats()
+        store.close()
+
+    return {
+        "uncached": {"seconds": round(uncached_seconds, 3), "llm_calls": uncached.calls},
+        "cached": {"seconds": round(cached_seconds, 3), "llm_calls": fake.calls, **stats}
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the LLM response cache on repeated audits")
+    parser.add_argument("--audits", type=int, default=20, help="Audits to run")
+    parser.add_argument("--carts", type=int, default=4, help="Distinct carts the audits cycle through")
+    parser.add_argument("--steps", type=int, default=3, help="LLM calls per audit")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Simulated LLM round trip")
+    parser.add_argument("--max-entries", type=int, default=2000, help="Cache size before LRU eviction")
+    args = parser.parse_args(argv)
+
+    print(json.dumps(asyncio.run(bench(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
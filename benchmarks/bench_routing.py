@@ -0,0 +1,78 @@
+"""Routing benchmarks on a synthetic multi-site page graph
+
+Usage:
+    python -m benchmarks.bench_routing --pages 500 --queries 2000
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import deque
+
+from src.core.models import Page, Action, ActionType
+from src.core.page_graph import PageGraph
+
+def build_graph(pages: int, out_degree: int, seed: int = 3) -> PageGraph:
+    """Random pages, each linking to out_degree others, with a learned latency on every edge"""
+    rng = random.Random(seed)
+    graph = PageGraph()
+    for i in range(pages):
+        actions = [
+            Action(f"link_{j}", ActionType.CLICK, f"page_{j}", f"page_{i} -> page_{j}")
+            for j in rng.sample(range(pages), out_degree) if j != i
+        ]
+        graph.add_page(Page(f"page_{i}", f"https://site{i % 10}.example/p/{i}", "", [], actions))
+
+    for page in graph.pages.values():
+        for action in page.actions:
+            graph.record_transition(action, rng.uniform(100, 3000), success=rng.random() > 0.1)
+    return graph
+
+def bfs_path(graph: PageGraph, start: str, target: str):
+    """The previous unweighted search, for comparison"""
+    visited = {start}
+    queue = deque([(start, [])])
+    while queue:
+        current, path = queue.popleft()
+        for action in graph.get_actions_from_page(current):
+            if action.target_page == target:
+                return path + [action]
+            if action.target_page not in visited:
+                visited.add(action.target_page)
+                queue.append((action.target_page, path + [action]))
+    return []
+
+def time_queries(find, queries):
+    started = time.perf_counter()
+    paths = [find(start, target) for start, target in queries]
+    return (time.perf_counter() - started) * 1000, paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PageGraph routing")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--out-degree", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--targets", type=int, default=5, help="Distinct destinations the queries go to")
+    args = parser.parse_args(argv)
+
+    graph = build_graph(args.pages, args.out_degree)
+    rng = random.Random(11)
+    targets = [f"page_{rng.randrange(args.pages)}" for _ in range(args.targets)]
+    queries = [(f"page_{rng.randrange(args.pages)}", rng.choice(targets)) for _ in range(args.queries)]
+
+    graph.invalidate_routes()
+    cold_ms, weighted = time_queries(graph.find_path, queries)
+    warm_ms, _ = time_queries(graph.find_path, queries)
+    bfs_ms, unweighted = time_queries(lambda s, t: bfs_path(graph, s, t), queries)
+
+    costs = [(graph.path_cost(w), graph.path_cost(u)) for w, u in zip(weighted, unweighted) if w and u]
+    print(f"{args.pages} pages, {args.queries} queries to {args.targets} destinations")
+    print(f"   weighted, cold tables   {cold_ms:>10.2f} ms")
+    print(f"   weighted, warm tables   {warm_ms:>10.2f} ms")
+    print(f"   unweighted BFS          {bfs_ms:>10.2f} ms")
+    if costs:
+        print(f"   expected path cost      {statistics.mean(c[0] for c in costs):>10.0f} ms weighted vs "
+              f"{statistics.mean(c[1] for c in costs):.0f} ms BFS")
+
+if __name__ == "__main__":
+    main()
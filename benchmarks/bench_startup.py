@@ -0,0 +1,66 @@
+"""Import-time benchmark for the CLI and each agent, every case in a fresh interpreter
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 5
+    python -m benchmarks.bench_startup --top 15     # also list the slowest imports per case
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CASES = {
+    "main --help": ["main.py", "--help"],
+    "config first read": ["-c", "from config.settings import config; config.get('agent_mode')"],
+    "agent factory": ["-c", "from src.agents.agent_factory import AgentFactory"],
+    "resolve manual": ["-c", "from src.agents.agent_factory import agent_registry; agent_registry.resolve('manual')"],
+    "resolve hybrid": ["-c", "from src.agents.agent_factory import agent_registry; agent_registry.resolve('hybrid')"],
+    "resolve browser_use": ["-c", "from src.agents.agent_factory import agent_registry; agent_registry.resolve('browser_use')"]
+}
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+def run_case(args, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True)
+        samples.append((time.perf_counter() - started) * 1000)
+        if completed.returncode != 0:
+            return None, completed.stderr.strip().splitlines()[-1:]
+    return statistics.median(samples), []
+
+def slowest_imports(args, top: int):
+    """Top-level modules by cumulative import time, from python -X importtime"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT, capture_output=True, text=True)
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and len(match.group(3)) == 1:
+            modules.append((int(match.group(2)) / 1000, match.group(4)))
+    return sorted(modules, reverse=True)[:top]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure interpreter startup plus imports for each entry path")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the median is reported")
+    parser.add_argument("--top", type=int, default=0, help="Also list this many slowest top-level imports per case")
+    args = parser.parse_args(argv)
+
+    baseline, _ = run_case(["-c", "pass"], args.repeat)
+    print(f"   {'bare interpreter':<24} {baseline:>9.1f} ms")
+    for name, case_args in CASES.items():
+        median, error = run_case(case_args, args.repeat)
+        if median is None:
+            print(f"   {name:<24} {'failed':>9}  {' '.join(error)}")
+            continue
+        print(f"   {name:<24} {median:>9.1f} ms  (+{median - baseline:.1f} ms over bare)")
+        for seconds_ms, module in slowest_imports(case_args, args.top):
+            print(f"      {module:<40} {seconds_ms:>8.1f} ms")
+
+if __name__ == "__main__":
+    main()
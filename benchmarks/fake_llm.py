@@ -0,0 +1,50 @@
+"""Local stand-in for a LangChain chat model, so LLM-facing code runs without an API key"""
+import asyncio
+from typing import Any, Callable, Optional
+
+class FakeMessage:
+    """Minimal AIMessage look-alike"""
+
+    def __init__(self, content: str):
+        self.type = "ai"
+        self.content = content
+
+    def __eq__(self, other):
+        return isinstance(other, FakeMessage) and other.content == self.content
+
+class FakeChatModel:
+    """Answers every prompt through a responder function after a simulated round trip"""
+
+    def __init__(self, responder: Optional[Callable[[Any], str]] = None, latency_ms: float = 0.0, model_name: str = "fake-model"):
+        self.responder = responder or (lambda messages: f"echo: {messages[-1][1] if isinstance(messages, list) else messages}")
+        self.latency_ms = latency_ms
+        self.model_name = model_name
+        self.temperature = 0.0
+        self.calls = 0
+
+    async def ainvoke(self, messages: Any, config: Any = None, **kwargs) -> FakeMessage:
+        self.calls += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return FakeMessage(self.responder(messages))
+
+    def with_structured_output(self, schema: Any, include_raw: bool = False, **kwargs) -> 'FakeStructuredModel':
+        return FakeStructuredModel(self, schema, include_raw)
+
+class FakeStructuredModel:
+    """Parses the fake response text as JSON into the requested schema"""
+
+    def __init__(self, model: FakeChatModel, schema: Any, include_raw: bool):
+        self.model = model
+        self.schema = schema
+        self.include_raw = include_raw
+
+    async def ainvoke(self, messages: Any, config: Any = None, **kwargs) -> Any:
+        raw = await self.model.ainvoke(messages, config, **kwargs)
+        if not self.include_raw:
+            return self.schema.model_validate_json(raw.content)
+        # Like LangChain, include_raw reports a bad parse instead of raising it
+        try:
+            return {"raw": raw, "parsed": self.schema.model_validate_json(raw.content), "parsing_error": None}
+        except ValueError as e:
+            return {"raw": raw, "parsed": None, "parsing_error": e}
@@ -0,0 +1,96 @@
+"""Synthetic Amazon-like cart pages for extraction benchmarks"""
+import random
+from pathlib import Path
+from typing import Dict, List
+
+ITEM_COUNTS = [0, 1, 10, 100, 1000]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Amazon.com Shopping Cart</title></head>
+<body>
+<header id="navbar"><a id="nav-cart" href="/gp/cart/view.html"><span id="nav-cart-count">{count}</span></a></header>
+{body}
+</body>
+</html>
+"""
+
+STANDARD_ROW = """<div class="sc-list-item" data-item-index="{index}" data-quantity="{quantity}">
+  <div class="sc-list-item-content">
+    <span class="a-truncate sc-product-title">{name}</span>
+    <div class="sc-item-price"><span class="a-price"><span class="a-offscreen">${price:,.2f}</span></span>
+    <span class="sc-price">${price:,.2f}</span></div>
+    <span class="a-dropdown-prompt">{quantity}</span>
+  </div>
+</div>"""
+
+# Primary selectors renamed so every lookup has to walk down its fallback list
+STALE_ROW = """<div data-item-index="{index}">
+  <h4>{name}</h4>
+  <span class="a-color-price">${price:,.2f}</span>
+</div>"""
+
+def _items(count: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "index": i,
+            "name": f"Synthetic Product {i} - {rng.choice(['Widget', 'Gadget', 'Cable', 'Book', 'Lamp'])} Edition",
+            "price": round(rng.uniform(1, 500), 2),
+            "quantity": rng.randint(1, 3)
+        }
+        for i in range(count)
+    ]
+
+def standard_cart(count: int, seed: int = 1) -> str:
+    items = _items(count, seed)
+    rows = "\n".join(STANDARD_ROW.format(**item) for item in items)
+    subtotal = sum(item["price"] * item["quantity"] for item in items)
+    body = f"""<div id="sc-active-cart"><div data-name="Active Items">
+{rows}
+</div></div>
+<div id="sc-subtotal-amount-activecart"><span class="a-price"><span class="a-offscreen">${subtotal:,.2f}</span></span></div>"""
+    return PAGE_TEMPLATE.format(count=count, body=body)
+
+def stale_cart(count: int, seed: int = 1) -> str:
+    items = _items(count, seed)
+    rows = "\n".join(STALE_ROW.format(**item) for item in items)
+    subtotal = sum(item["price"] for item in items)
+    body = f"""<div data-name="Active Items">
+{rows}
+</div>
+<div class="sc-subtotal"><span class="a-price"><span class="a-offscreen">${subtotal:,.2f}</span></span></div>"""
+    return PAGE_TEMPLATE.format(count=count, body=body)
+
+def empty_cart(variant: int = 0) -> str:
+    bodies = [
+        '<div id="sc-empty-cart"><h1>Your Amazon Cart is empty</h1></div>',
+        '<div class="a-row"><h2>Your cart is empty</h2></div>'
+    ]
+    return PAGE_TEMPLATE.format(count=0, body=bodies[variant % len(bodies)])
+
+def build_fixtures() -> Dict[str, str]:
+    """Fixture name -> HTML for every benchmarked cart shape"""
+    fixtures = {}
+    for count in ITEM_COUNTS:
+        fixtures[f"standard_{count}"] = standard_cart(count)
+        if count:
+            fixtures[f"stale_{count}"] = stale_cart(count)
+    fixtures["empty_marker"] = empty_cart(0)
+    fixtures["empty_text"] = empty_cart(1)
+    return fixtures
+
+def write_fixtures(directory: Path) -> Dict[str, Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for name, html in build_fixtures().items():
+        path = directory / f"{name}.html"
+        path.write_text(html, encoding="utf-8")
+        paths[name] = path
+    return paths
+
+def price_strings(count: int, seed: int = 7) -> List[str]:
+    """Mixed price formats as they appear in cart markup"""
+    rng = random.Random(seed)
+    formats = ["${:,.2f}", "{:.2f}", "USD {:,.2f}", "${:.0f}", "  ${:,.2f}\n", "{:,.2f} €"]
+    return [rng.choice(formats).format(rng.uniform(0.5, 25000)) for _ in range(count)]
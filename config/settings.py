@@ -1,30 +1,205 @@
-import yaml
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, List, Tuple, Callable, Mapping
 import os
 
+logger = logging.getLogger("browser_agent")
+
+_MISSING = object()
+
+EXTRACTION_MODES = ("script", "element", "snapshot")
+
+class SettingsError(ValueError):
+    """Configuration that fails validation; the previous settings stay active"""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("; ".join(problems))
+
+@dataclass(frozen=True)
+class BrowserSettings:
+    headless: bool = False
+    viewport_width: int = 1280
+    viewport_height: int = 720
+    timeout: int = 30000
+
+@dataclass(frozen=True)
+class ReadinessSettings:
+    timeout: int = 15000
+    network_quiet_ms: int = 500
+    dom_stable_ms: int = 400
+
+@dataclass(frozen=True)
+class ExtractionSettings:
+    mode: str = "script"
+    batch_size: int = 50
+    load_more_timeout: int = 1500
+    max_items: Optional[int] = None
+
+@dataclass(frozen=True)
+class Settings:
+    """One immutable, validated snapshot of site_config.yaml"""
+    agent_mode: str
+    price_threshold: float
+    browser: BrowserSettings
+    readiness: ReadinessSettings
+    extraction: ExtractionSettings
+    # Selector profile: named selector lists that replace the built-in registry lists
+    selectors: Mapping[str, Tuple[str, ...]]
+    raw: Mapping[str, Any]
+    version: int = 0
+    _lookups: Dict[str, Any] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], version: int = 0) -> 'Settings':
+        """Validate a parsed config file; every problem is reported at once"""
+        problems: List[str] = []
+        if not isinstance(data, dict):
+            raise SettingsError([f"top level must be a mapping, got {type(data).__name__}"])
+
+        def section(name: str) -> Dict[str, Any]:
+            value = data.get(name) or {}
+            if not isinstance(value, dict):
+                problems.append(f"{name}: must be a mapping")
+                return {}
+            return value
+
+        def number(where: str, value: Any, default, cast=int, minimum=0, optional=False):
+            if value is None:
+                if optional:
+                    return None
+                value = default
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                problems.append(f"{where}: must be a number, got {value!r}")
+                return default
+            if value < minimum:
+                problems.append(f"{where}: must be at least {minimum}, got {value}")
+                return default
+            return cast(value)
+
+        browser = section('browser')
+        readiness = section('readiness')
+        extraction = section('extraction')
+
+        mode = extraction.get('mode', 'script')
+        if mode not in EXTRACTION_MODES:
+            problems.append(f"extraction.mode: must be one of {list(EXTRACTION_MODES)}, got {mode!r}")
+            mode = 'script'
+
+        selectors = {}
+        for name, values in section('selectors').items():
+            if not isinstance(values, list) or not values or not all(isinstance(v, str) for v in values):
+                problems.append(f"selectors.{name}: must be a non-empty list of selector strings")
+                continue
+            selectors[name.lower()] = tuple(values)
+
+        settings = cls(
+            agent_mode=str(data.get('agent_mode', 'browser_use')),
+            price_threshold=number('price_threshold', data.get('price_threshold'), 100.0, cast=float),
+            browser=BrowserSettings(
+                headless=bool(browser.get('headless', False)),
+                viewport_width=number('browser.viewport_width', browser.get('viewport_width'), 1280, minimum=1),
+                viewport_height=number('browser.viewport_height', browser.get('viewport_height'), 720, minimum=1),
+                timeout=number('browser.timeout', browser.get('timeout'), 30000, minimum=1)
+            ),
+            readiness=ReadinessSettings(
+                timeout=number('readiness.timeout', readiness.get('timeout'), 15000, minimum=1),
+                network_quiet_ms=number('readiness.network_quiet_ms', readiness.get('network_quiet_ms'), 500),
+                dom_stable_ms=number('readiness.dom_stable_ms', readiness.get('dom_stable_ms'), 400)
+            ),
+            extraction=ExtractionSettings(
+                mode=mode,
+                batch_size=number('extraction.batch_size', extraction.get('batch_size'), 50, minimum=1),
+                load_more_timeout=number('extraction.load_more_timeout', extraction.get('load_more_timeout'), 1500),
+                max_items=number('extraction.max_items', extraction.get('max_items'), None, minimum=1, optional=True)
+            ),
+            selectors=selectors,
+            raw=data,
+            version=version
+        )
+        if problems:
+            raise SettingsError(problems)
+        return settings
+
+    def get(self, key: str, default=None):
+        """Dotted-path lookup into the raw file, memoized per snapshot"""
+        value = self._lookups.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._lookups[key] = self._walk(key)
+        return default if value is _MISSING else value
+
+    def _walk(self, key: str):
+        value = self.raw
+        for k in key.split('.'):
+            if isinstance(value, dict) and k in value:
+                value = value[k]
+            else:
+                return _MISSING
+        return value
+
+# Snapshot pinned by the running task; tasks that never pin see the latest snapshot
+_pinned_settings: contextvars.ContextVar[Optional[Settings]] = contextvars.ContextVar('pinned_settings', default=None)
+
 class Config:
     def __init__(self, config_path: str = None):
         if config_path is None:
             config_path = Path(__file__).parent / "site_config.yaml"
-        
+
         self.config_path = Path(config_path)
-        self._config = self._load_config()
-    
+        self._snapshot: Optional[Settings] = None
+        self._mtime: Optional[float] = None
+        self._load_lock = threading.Lock()
+        self._listeners: List[Callable[[Settings, Settings], None]] = []
+        self._watch_task = None
+
+    @property
+    def settings(self) -> Settings:
+        """Typed settings for the current task: its pinned snapshot, else the latest one"""
+        return _pinned_settings.get() or self.latest()
+
+    @property
+    def _config(self) -> Dict[str, Any]:
+        """Configuration dict, read from disk on first use rather than at import"""
+        return self.settings.raw
+
+    def latest(self) -> Settings:
+        """Most recently loaded snapshot, read from disk on first use"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._load_lock:
+                if self._snapshot is None:
+                    self._snapshot = self._build(self._load_config(), version=1)
+                snapshot = self._snapshot
+        return snapshot
+
+    def _build(self, data: Dict[str, Any], version: int) -> Settings:
+        try:
+            return Settings.from_dict(data, version=version)
+        except SettingsError as e:
+            logger.error(f"Invalid config in {self.config_path}: {e}; using defaults")
+            return Settings.from_dict(self._get_default_config(), version=version)
+
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from YAML file"""
+        import yaml  # Deferred with the file read itself
+
         try:
+            self._mtime = self.config_path.stat().st_mtime
             with open(self.config_path, 'r') as f:
                 config_data = yaml.safe_load(f)
-                print(f"Loaded config from {self.config_path}")
+                logger.debug(f"Loaded config from {self.config_path}")
                 return config_data
         except FileNotFoundError:
-            print(f"Config file not found at {self.config_path}, using defaults")
+            logger.warning(f"Config file not found at {self.config_path}, using defaults")
             return self._get_default_config()
         except Exception as e:
-            print(f"Error loading config: {e}, using defaults")
+            logger.warning(f"Error loading config: {e}, using defaults")
             return self._get_default_config()
-    
+
     def _get_default_config(self) -> Dict[str, Any]:
         """Return default configuration"""
         return {
@@ -50,39 +225,94 @@ class Config:
                 "safety_mode": True
             }
         }
-    
+
     def get(self, key: str, default=None):
         """Get configuration value"""
-        keys = key.split('.')
-        value = self._config
-        
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-        
-        return value
-    
+        return self.settings.get(key, default)
+
+    @contextmanager
+    def pinned(self, snapshot: Optional[Settings] = None):
+        """Keep one snapshot for everything the current task reads, even if the file is reloaded meanwhile"""
+        token = _pinned_settings.set(snapshot or self.settings)
+        try:
+            yield _pinned_settings.get()
+        finally:
+            _pinned_settings.reset(token)
+
+    def subscribe(self, listener: Callable[[Settings, Settings], None]):
+        """Call listener(old, new) after every successful reload"""
+        self._listeners.append(listener)
+
+    def reload(self) -> bool:
+        """Re-read the file and swap in the new snapshot; invalid files keep the current one"""
+        import yaml
+
+        old = self.latest()
+        try:
+            mtime = self.config_path.stat().st_mtime
+            with open(self.config_path, 'r') as f:
+                new = Settings.from_dict(yaml.safe_load(f), version=old.version + 1)
+        except (OSError, yaml.YAMLError, SettingsError) as e:
+            logger.error(f"Config reload failed, keeping version {old.version}: {e}")
+            return False
+
+        # A single reference assignment, so readers see either the old or the new snapshot
+        self._snapshot = new
+        self._mtime = mtime
+        logger.info(f"Reloaded config from {self.config_path} (version {new.version})")
+        for listener in self._listeners:
+            try:
+                listener(old, new)
+            except Exception as e:
+                logger.warning(f"Config listener failed: {e}")
+        return True
+
+    def check_for_changes(self) -> bool:
+        """Reload if the file changed on disk since it was last read"""
+        self.latest()
+        try:
+            mtime = self.config_path.stat().st_mtime
+        except OSError:
+            return False
+        return mtime != self._mtime and self.reload()
+
+    async def watch(self, interval: Optional[float] = None):
+        """Poll the file and hot-swap settings while the process runs"""
+        import asyncio
+
+        interval = interval or self.latest().get('settings_watch.interval_seconds', 2.0)
+        while True:
+            await asyncio.sleep(interval)
+            self.check_for_changes()
+
+    def start_watching(self, interval: Optional[float] = None):
+        """Run watch() as a background task on the current event loop"""
+        import asyncio  # Only long-running workers watch; keep it off the startup path
+
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.ensure_future(self.watch(interval))
+        return self._watch_task
+
+    def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
     @property
     def browser_config(self) -> Dict[str, Any]:
         return self.get("browser", {})
-    
+
     @property
     def amazon_config(self) -> Dict[str, Any]:
         return self.get("amazon", {})
-    
+
     @property
     def task_config(self) -> Dict[str, Any]:
         return self.get("task", {})
-    
+
     @property
     def browser_use_config(self) -> Dict[str, Any]:
         return self.get("browser_use", {})
 
-# Global config instance
+# Global config instance; the YAML file is read on first access
 config = Config()
-
-# Debug print to see what config actually contains
-print(f"Config type: {type(config._config)}")
-print(f"Config keys: {list(config._config.keys()) if isinstance(config._config, dict) else 'Not a dict'}")
\ No newline at end of file
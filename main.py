@@ -1,10 +1,24 @@
+import argparse
 import asyncio
 import sys
-from src.agents.agent_factory import AgentFactory
+from src.agents.agent_factory import AgentFactory, BUILTIN_AGENTS
 from src.core.page_graph import AmazonGraphBuilder
+from src.utils.logger import configure_logging
 from config.settings import config
 
-async def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Graph-based Amazon cart navigator")
+    parser.add_argument("--mode", help=f"Agent to run, overriding agent_mode ({', '.join(BUILTIN_AGENTS)} or a plugin)")
+    parser.add_argument("--threshold", type=float, help="Price threshold in USD, overriding price_threshold")
+    parser.add_argument("--account", help="Start from this account's stored session, overriding sessions.account")
+    parser.add_argument("--list-agents", action="store_true", help="List the available agents and exit")
+    parser.add_argument("--serve", action="store_true", help="Keep browsers warm and take cart checks over a local HTTP API")
+    parser.add_argument("--host", help="Interface the service binds to (default: service.host)")
+    parser.add_argument("--port", type=int, help="Port the service binds to (default: service.port)")
+    return parser.parse_args(argv)
+
+async def main(args):
+    configure_logging()
     print("Loaded config from", config.config_path)
     print("Config type:", type(config._config))
     print("Config keys:", list(config._config.keys()) if isinstance(config._config, dict) else 'Not a dict')
@@ -18,9 +32,9 @@ async def main():
     print(f"Page graph built with {len(graph.pages)} pages")
     
     # Get configuration from updated YAML structure
-    agent_mode = config._config.get('agent_mode', 'browser_use')  # Top-level agent_mode
+    agent_mode = args.mode or config._config.get('agent_mode', 'browser_use')  # Top-level agent_mode
     llm_provider = config._config.get('llm_provider', 'openai')   # Top-level llm_provider
-    price_threshold = config._config.get('price_threshold', 100.0)  # Top-level price_threshold
+    price_threshold = args.threshold or config._config.get('price_threshold', 100.0)  # Top-level price_threshold
     
     print(f"\nConfiguration:")
     print(f"   Agent Mode: {agent_mode}")
@@ -32,29 +46,20 @@ async def main():
     
     try:
         agent = AgentFactory.create_agent(agent_mode, graph)
+        agent.account = args.account
         await agent.start()
         
         if agent_mode == "manual":
             print("Manual mode ready - follow the instructions below")
+        elif agent_mode == "hybrid":
+            print("Hybrid agent ready")
         else:
             print("Browser Use agent ready")
         
         print(f"\nExecuting task with ${price_threshold:.2f} threshold...")
         
-        # Execute task with proper parameter based on agent type
-        if hasattr(agent, 'execute_task'):
-            if agent_mode == 'browser_use':
-                # For browser_use agent, pass price_threshold parameter
-                result = await agent.execute_task(price_threshold=price_threshold)
-            elif agent_mode == 'manual':
-                # For manual agent, pass goal parameter with threshold info
-                goal = f"Navigate to Amazon cart and check if total exceeds ${price_threshold:.2f}. If below threshold, proceed to checkout and stop when personal info is requested."
-                result = await agent.execute_task(goal)
-            else:
-                # Fallback for any other agent types
-                result = await agent.execute_task(price_threshold=price_threshold)
-        else:
-            raise AttributeError(f"Agent {agent_mode} does not have execute_task method")
+        # Every agent takes the same execute_task(goal, price_threshold) call
+        result = await agent.execute_task(price_threshold=price_threshold)
         
         await agent.close()
         
@@ -81,6 +86,11 @@ async def main():
                     print(f"   Threshold Status: {result.data.get('threshold_status', 'Unknown')}")
                     print(f"   Checkout Reached: {result.data.get('checkout_reached', False)}")
                     print(f"   Behavior Correct: {result.data.get('behavior_correct', 'Unknown')}")
+                elif agent_mode == 'hybrid':
+                    print(f"   Action: {result.data.get('action_taken', 'completed')}")
+                    print(f"   Cart Total: ${result.data.get('total', 0.0):.2f}")
+                    print(f"   Checkout Reached: {result.data.get('checkout_reached', False)}")
+                    print(f"   LLM Calls: {result.data.get('llm_calls', 0)}")
                 elif agent_mode == 'manual':
                     print(f"   Manual Navigation: {result.data.get('navigation_status', 'Completed')}")
                     print(f"   User Input: {result.data.get('user_input', 'Not recorded')}")
@@ -110,6 +120,9 @@ async def main():
         if agent_mode == 'manual':
             print(f"\n Manual Mode Completed")
             print(f"   You navigated Amazon manually with ${price_threshold:.2f} threshold")
+        elif agent_mode == 'hybrid':
+            print(f"\n Hybrid Mode Completed")
+            print(f"   Graph navigation with {result.data.get('llm_calls', 0) if result.data else 0} LLM calls and ${price_threshold:.2f} threshold")
         elif agent_mode == 'browser_use':
             print(f"\n Browser Use Mode Completed")
             print(f"   Automated navigation using {llm_provider} with ${price_threshold:.2f} threshold")
@@ -125,4 +138,11 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    if args.list_agents:
+        print("\n".join(AgentFactory.get_available_agents()))
+    elif args.serve:
+        from src.service.cart_service import serve
+        asyncio.run(serve(args.host, args.port))
+    else:
+        asyncio.run(main(args))
\ No newline at end of file
@@ -1,24 +1,88 @@
-from typing import Literal
-from .manual_agent import ManualBrowserAgent
-from .browser_use_agent import BrowserUseAgent
+import importlib
+from typing import Dict, List, Type
 from ..core.page_graph import PageGraph
 
-AgentType = Literal["manual", "browser_use"]
+# Other packages can add agents under this entry point group, e.g. in pyproject.toml:
+#   [project.entry-points."cart_navigator.agents"]
+#   my_agent = "my_package.agents:MyAgent"
+ENTRY_POINT_GROUP = "cart_navigator.agents"
+
+# Built-in agents as "module:Class" so nothing is imported until an agent is created
+BUILTIN_AGENTS = {
+    "manual": ".manual_agent:ManualBrowserAgent",
+    "browser_use": ".browser_use_agent:BrowserUseAgent",
+    "hybrid": ".hybrid_agent:HybridCartAgent"
+}
+
+AgentType = str
+
+class AgentRegistry:
+    """Resolves agent classes by name, importing each module only when its agent is first used"""
+
+    def __init__(self):
+        self._targets: Dict[str, object] = dict(BUILTIN_AGENTS)
+        self._classes: Dict[str, Type] = {}
+        self._plugins_loaded = False
+
+    def names(self) -> List[str]:
+        self._load_plugins()
+        return list(self._targets)
+
+    def register(self, name: str, target):
+        """Register a class or a "module:Class" string under a name"""
+        self._targets[name] = target
+        self._classes.pop(name, None)
+
+    def resolve(self, name: str) -> Type:
+        cls = self._classes.get(name)
+        if cls is not None:
+            return cls
+
+        target = self._targets.get(name)
+        if target is None:
+            self._load_plugins()
+            target = self._targets.get(name)
+        if target is None:
+            raise ValueError(f"Unknown agent type: {name}")
+
+        if isinstance(target, str):
+            module_name, _, class_name = target.partition(":")
+            module = importlib.import_module(module_name, package=__package__)
+            cls = getattr(module, class_name)
+        elif hasattr(target, 'load'):
+            cls = target.load()
+        else:
+            cls = target
+
+        self._classes[name] = cls
+        return cls
+
+    def _load_plugins(self):
+        """Read entry point metadata once; the plugin modules themselves load on resolve"""
+        if self._plugins_loaded:
+            return
+        self._plugins_loaded = True
+
+        from importlib.metadata import entry_points  # Scans installed distributions; keep it off the startup path
+        discovered = entry_points()
+        group = discovered.select(group=ENTRY_POINT_GROUP) if hasattr(discovered, 'select') else discovered.get(ENTRY_POINT_GROUP, [])
+        for entry_point in group:
+            self._targets.setdefault(entry_point.name, entry_point)
+
+agent_registry = AgentRegistry()
 
 class AgentFactory:
     """Factory to create different types of browser agents"""
-    
+
     @staticmethod
-    def create_agent(agent_type: AgentType, page_graph: PageGraph):
-        """Create an agent of the specified type"""
-        if agent_type == "manual":
-            return ManualBrowserAgent(page_graph)
-        elif agent_type == "browser_use":
-            return BrowserUseAgent(page_graph)
-        else:
-            raise ValueError(f"Unknown agent type: {agent_type}")
-    
+    def create_agent(agent_type: AgentType, page_graph: PageGraph, pool=None):
+        """Create an agent of the specified type, on the shared browser pool if it leases from one"""
+        cls = agent_registry.resolve(agent_type)
+        if pool is not None and getattr(cls, 'uses_pool', True):
+            return cls(page_graph, pool=pool)
+        return cls(page_graph)
+
     @staticmethod
     def get_available_agents() -> list[AgentType]:
         """Get list of available agent types"""
-        return ["manual", "browser_use"]
\ No newline at end of file
+        return agent_registry.names()
@@ -0,0 +1,129 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+from .agent_factory import AgentFactory
+from ..browser.pool import BrowserPool
+from ..core.models import AuditJob, AuditReport, TaskResult
+from ..core.page_graph import PageGraph, AmazonGraphBuilder
+from ..core.graph_loader import graph_library
+from ..utils.logger import logger, console, log_context, configure_logging
+from ..utils.tracing import write_chrome_trace
+from config.settings import config
+
+class CartAuditEngine:
+    """Run many cart checks concurrently, each in its own leased BrowserContext on a shared browser pool"""
+
+    def __init__(self, page_graph: Optional[PageGraph] = None, concurrency: Optional[int] = None, pool: Optional[BrowserPool] = None):
+        audit_config = config.get('audit', {})
+        self.graph = page_graph
+        self.concurrency = concurrency or audit_config.get('concurrency', 4)
+        self.pool = pool or BrowserPool()
+        self._owns_pool = pool is None
+        # Agents that launch their own browser bypass the pool, so they get their own, smaller cap
+        self._own_browser_slots = asyncio.Semaphore(audit_config.get('own_browser_concurrency', 1))
+
+    async def start(self):
+        """Warm up the shared browser pool once for all jobs"""
+        if self._owns_pool:
+            await self.pool.start()
+        if config.get('settings_watch.enabled', False):
+            config.start_watching()
+        logger.info(f"Audit engine started with concurrency {self.concurrency}")
+
+    async def close(self):
+        """Close the browser pool if the engine started it"""
+        config.stop_watching()
+        if self._owns_pool:
+            await self.pool.close()
+        logger.info("Audit engine closed")
+
+    async def run(self, jobs: List[AuditJob]) -> AuditReport:
+        """Run all jobs under the concurrency cap and return one TaskResult per job, in job order"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_limited(job: AuditJob) -> TaskResult:
+            async with semaphore:
+                return await self.run_job(job)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(run_limited(job) for job in jobs))
+        elapsed = time.perf_counter() - started
+
+        report = AuditReport(results=list(results), elapsed_seconds=elapsed, concurrency=self.concurrency)
+        logger.info(
+            f"Audited {len(report.results)} carts in {elapsed:.1f}s "
+            f"({report.succeeded} ok, {report.failed} failed, {report.jobs_per_hour:.0f} carts/hour)"
+        )
+        return report
+
+    async def run_job(self, job: AuditJob, signin_signal: Optional[asyncio.Event] = None) -> TaskResult:
+        """Run a single cart check on a leased, isolated BrowserContext"""
+        started = time.perf_counter()
+
+        # The job keeps the settings it started with, even if the file is reloaded mid-run
+        with config.pinned() as settings, log_context(job_id=job.job_id, agent=job.agent_mode, site=job.site):
+            agent = None
+            try:
+                # An unknown site or agent mode fails this job only, not the whole audit
+                agent = AgentFactory.create_agent(job.agent_mode, self._graph_for(job.site), pool=self.pool)
+                agent.account = job.account
+                agent.job_id = job.job_id
+                agent.signin_signal = signin_signal
+                if agent.uses_pool:
+                    result = await self._run_agent(agent, job)
+                else:
+                    logger.info(f"Agent {job.agent_mode} launches its own browser instead of leasing from the pool")
+                    async with self._own_browser_slots:
+                        result = await self._run_agent(agent, job)
+            except Exception as e:
+                logger.error(f"Audit job {job.job_id} failed: {e}")
+                result = TaskResult(False, f"Audit job failed: {e}", data={"action_taken": "error"})
+            finally:
+                if agent is not None:
+                    await agent.close()
+
+            if result.data is None:
+                result.data = {}
+            result.data["job_id"] = job.job_id
+            result.data["elapsed_seconds"] = time.perf_counter() - started
+            result.data["config_version"] = settings.version
+        return result
+
+    @staticmethod
+    async def _run_agent(agent, job: AuditJob) -> TaskResult:
+        await agent.start()
+        return await agent.execute_task(goal=job.goal, price_threshold=job.price_threshold)
+
+    def _graph_for(self, site: str) -> PageGraph:
+        """Graphs of other sites are loaded from config/graphs the first time a job targets them"""
+        if site == "amazon" and self.graph is not None:
+            return self.graph
+        return graph_library.get(site)
+
+async def main():
+    configure_logging()
+    # Each command line argument is the price threshold of one cart check
+    thresholds = [float(arg) for arg in sys.argv[1:]] or [config.get('price_threshold', 100.0)]
+    jobs = [AuditJob(job_id=f"job-{i + 1}", price_threshold=threshold) for i, threshold in enumerate(thresholds)]
+
+    engine = CartAuditEngine(AmazonGraphBuilder.build())
+    await engine.start()
+    try:
+        report = await engine.run(jobs)
+    finally:
+        await engine.close()
+
+    trace_directory = config.get('tracing.directory')
+    if trace_directory:
+        # All jobs on one timeline, one row per job, to see how they overlap
+        write_chrome_trace(Path(trace_directory) / f"audit-{int(time.time())}.trace.json",
+                           [(result.data.get('job_id'), result.spans) for result in report.results])
+
+    lines = [f"{result.data.get('job_id')}: {'SUCCESS' if result.success else 'FAILED'} - {result.message}" for result in report.results]
+    lines.append(f"Throughput: {report.jobs_per_hour:.0f} carts/hour over {report.elapsed_seconds:.1f}s")
+    console.info("\n".join(lines))
+
+if __name__ == "__main__":
+    asyncio.run(main())
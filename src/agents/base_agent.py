@@ -1,12 +1,57 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from ..core.models import TaskResult
 from ..utils.logger import logger
 
 class BaseAgent(ABC):
-    def __init__(self, config: Dict[str, Any]):
+    # False for agents that launch their own browser instead of leasing from the shared pool
+    uses_pool = True
+    
+    def __init__(self, config: Dict[str, Any], pool=None):
         self.config = config
         self.logger = logger
+        self.pool = pool
+        self.lease = None
+        self._owns_pool = False
+        # Account whose stored session the leased context starts with; None uses sessions.account
+        self.account: Optional[str] = None
+        # Audit or service job this agent runs, used to name per-run output such as HAR recordings
+        self.job_id: Optional[str] = None
+        # Set by whoever can confirm a manual sign-in from outside the page (the service API)
+        self.signin_signal: Optional[asyncio.Event] = None
+    
+    async def acquire_lease(self):
+        """Lease a warm browser context, starting a private pool if none was shared"""
+        if self.pool is None:
+            from ..browser.pool import BrowserPool
+            self.pool = BrowserPool(size=1, warm_contexts=1)
+            await self.pool.start()
+            self._owns_pool = True
+        
+        self.lease = await self.pool.acquire(account=self.account)
+        return self.lease
+    
+    def invalidate_session(self):
+        """The site redirected to sign-in, so the stored session no longer works"""
+        if self.lease is not None:
+            self.pool.invalidate_session(self.lease)
+    
+    def mark_signed_in(self):
+        """Save the session established by a fresh sign-in when the lease is returned"""
+        if self.lease is not None:
+            self.pool.mark_signed_in(self.lease)
+    
+    async def release_lease(self, crashed: bool = False):
+        """Return the leased context and stop the private pool if this agent started it"""
+        if self.lease is not None:
+            await self.pool.release(self.lease, crashed=crashed)
+            self.lease = None
+        
+        if self._owns_pool:
+            await self.pool.close()
+            self.pool = None
+            self._owns_pool = False
     
     @abstractmethod
     async def start(self):
@@ -19,8 +64,8 @@ class BaseAgent(ABC):
         pass
     
     @abstractmethod
-    async def execute_task(self, goal: str) -> TaskResult:
-        """Execute a task based on the goal"""
+    async def execute_task(self, goal: Optional[str] = None, price_threshold: Optional[float] = None) -> TaskResult:
+        """Execute a task; an explicit price_threshold wins over one stated in the goal"""
         pass
     
     def log_task_start(self, goal: str):
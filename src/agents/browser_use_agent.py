@@ -1,12 +1,23 @@
 from browser_use import Agent
 from langchain_openai import ChatOpenAI
+from typing import Optional
 from ..core.models import TaskResult
 from .base_agent import BaseAgent
+from ..browser.network_profile import ResourceBlocker, install_on_browser_use_agent
+from ..browser.dom_pruning import DomPruner
+from ..llm.cache import CachingChatModel
+from .step_controller import AgentStepController
+from ..extractors.price_extractor import PriceExtractor
+from ..utils.logger import console
+from ..utils.tracing import span, trace_task
 from config.settings import config
 import asyncio
 import os
 
 class BrowserUseAgent(BaseAgent):
+    # browser-use launches and drives its own browser, so the audit engine runs it outside the pool
+    uses_pool = False
+    
     def __init__(self, page_graph=None):
         super().__init__(config._config)
         self.page_graph = page_graph
@@ -21,24 +32,62 @@ class BrowserUseAgent(BaseAgent):
             raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY environment variable.")
         
         self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.1)
+        
+        # Answer repeated prompts on unchanged cart pages from the local response cache
+        if config.get('llm_cache.enabled', True):
+            self.llm = CachingChatModel(self.llm)
         self.logger.info("Browser Use agent initialized with OpenAI GPT-4o-mini")
         
     async def close(self):
         """Close agent"""
+        if isinstance(self.llm, CachingChatModel):
+            self.logger.info(f"LLM cache: {self.llm.stats()}")
+            self.llm.store.close()
         self.logger.info("Browser Use agent session ended")
         
-    async def execute_task(self, goal=None, price_threshold=100.00):
+    async def execute_task(self, goal: Optional[str] = None, price_threshold: Optional[float] = None) -> TaskResult:
+        """Execute the task with every step and LLM call timed"""
+        with trace_task("browser_use.execute_task") as trace:
+            result = await self._execute_task(goal, price_threshold)
+        
+        if trace:
+            result.spans = trace.spans
+            result.data["phases_ms"] = trace.phase_totals()
+        return result
+        
+    async def _execute_task(self, goal: Optional[str] = None, price_threshold: Optional[float] = None) -> TaskResult:
         """Execute Amazon cart analysis and conditional checkout task"""
-        self.log_task_start(f"Amazon cart analysis and conditional checkout with ${price_threshold:.2f} threshold")
+        if price_threshold is None:
+            price_threshold = PriceExtractor().extract_threshold(goal) if goal else config.get('price_threshold', 100.0)
+        self.log_task_start(goal or f"Amazon cart analysis and conditional checkout with ${price_threshold:.2f} threshold")
         
         try:
-            # Simple cart analysis and conditional checkout task
+            # The caller's goal leads; the fixed steps keep the output parseable and the checkout rule explicit
             task = f"Go to Amazon.com. Click cart. Print each item name. Only report the total cart price (not individual prices). If total is below ${price_threshold}, click checkout and stop when asked for personal info. If total is above ${price_threshold}, do not checkout."
+            if goal:
+                task = f"{goal.strip()}\n\n{task}"
             
             self.logger.info("Starting Amazon cart conditional checkout with OpenAI GPT-4o-mini...")
             
-            agent = Agent(task=task, llm=self.llm)
-            result = await agent.run()
+            # Watch every step so the run ends as soon as the checkout decision is made
+            controller = AgentStepController(price_threshold)
+            agent = Agent(task=task, llm=self.llm, register_new_step_callback=controller.on_step)
+            controller.attach(agent)
+            
+            # Block images, fonts, ads and trackers on the agent's own browser when reachable
+            blocker = ResourceBlocker()
+            network_installed = await install_on_browser_use_agent(agent, blocker)
+            
+            # Hide everything but the graph's cart regions so each observation stays small
+            pruner = DomPruner(self.page_graph) if self.page_graph and config.get('dom_pruning.enabled', True) else None
+            pruning_installed = pruner is not None and await install_on_browser_use_agent(agent, pruner)
+            
+            try:
+                with span("agent.run", max_steps=controller.max_steps):
+                    result = await asyncio.wait_for(agent.run(max_steps=controller.max_steps), timeout=controller.max_seconds)
+            except asyncio.TimeoutError:
+                controller.stop("max_seconds")
+                result = getattr(getattr(agent, 'state', None), 'history', None) or getattr(agent, 'history', None)
             
             self.logger.info("Browser Use cart conditional checkout completed")
             
@@ -47,7 +96,7 @@ class BrowserUseAgent(BaseAgent):
             
             # Check if checkout was initiated
             checkout_keywords = ["checkout", "sign in", "login", "personal info", "stopped", "address", "payment"]
-            checkout_reached = any(keyword in result_str for keyword in checkout_keywords)
+            checkout_reached = controller.checkout_reached or any(keyword in result_str for keyword in checkout_keywords)
             
             # Try to extract cart value (only total, not individual prices)
             import re
@@ -58,8 +107,11 @@ class BrowserUseAgent(BaseAgent):
                 r'cart total[:\s]*\$(\d+\.?\d*)'
             ]
             
-            cart_total = 0.0
+            # The controller already read the total from the step that showed it
+            cart_total = controller.cart_total or 0.0
             for pattern in total_patterns:
+                if cart_total:
+                    break
                 matches = re.findall(pattern, str(result), re.IGNORECASE)
                 if matches:
                     cart_total = max([float(amount) for amount in matches])
@@ -92,7 +144,7 @@ class BrowserUseAgent(BaseAgent):
                 if item.lower() not in seen:
                     seen.add(item.lower())
                     unique_items.append(item)
-            cart_items = unique_items[:10]  # Limit to first 10 items
+            cart_items = unique_items
             
             # Determine threshold status and expected behavior
             if cart_total > price_threshold:
@@ -143,7 +195,14 @@ class BrowserUseAgent(BaseAgent):
                     "behavior_correct": (should_checkout and checkout_reached) or (not should_checkout and not checkout_reached),
                     "llm_model": "gpt-4o-mini",
                     "cart_analysis": "Cart contents and total price extracted from agent response",
-                    "checkout_logic": f"Only proceed to checkout if total < ${price_threshold:.2f}"
+                    "checkout_logic": f"Only proceed to checkout if total < ${price_threshold:.2f}",
+                    "network": blocker.stats() if network_installed else None,
+                    "llm_cache": self.llm.stats() if isinstance(self.llm, CachingChatModel) else None,
+                    "dom_pruning": pruner.stats() if pruning_installed else None,
+                    "steps": controller.steps,
+                    "stop_reason": controller.stop_reason or "agent_done",
+                    "elapsed_seconds": round(controller.elapsed_seconds, 2),
+                    "step_trace": controller.trace
                 }
             )
             
@@ -163,7 +222,7 @@ async def main():
     browser_agent = BrowserUseAgent()
     await browser_agent.start()
     result = await browser_agent.execute_task(price_threshold=100.00)
-    print(result)
+    console.info(str(result))
     await browser_agent.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,321 @@
+import os
+import re
+import time
+from typing import List, Dict, Any, Optional
+from .base_agent import BaseAgent
+from .step_controller import CHECKOUT_URL_MARKERS
+from ..core.models import TaskResult, Action, ActionType, Page
+from ..core.page_graph import PageGraph
+from ..extractors.cart_extractor import CartExtractor
+from ..extractors.price_extractor import PriceExtractor
+from ..navigation.navigator import Navigator
+from ..navigation.readiness import PageReadiness, ReadinessTimeout
+from ..navigation.selectors import SelectorManager, RegisteredSelectors
+from ..navigation.selector_engine import selector_engine
+from ..navigation.signin import is_signin_url
+from ..utils.tracing import span, trace_task
+from config.settings import config
+
+# Tags every visible clickable element with an index and returns a compact list for the LLM to choose from
+CLICKABLE_CANDIDATES_SCRIPT = """
+(limit) => {
+    document.querySelectorAll('[data-hybrid-index]').forEach((el) => el.removeAttribute('data-hybrid-index'));
+    const nodes = document.querySelectorAll('a[href], button, input[type=submit], [role=button], [role=link]');
+    const candidates = [];
+    for (const el of nodes) {
+        const rect = el.getBoundingClientRect();
+        if (!rect.width || !rect.height) continue;
+        const label = (el.innerText || el.value || el.getAttribute('aria-label') || el.title || '')
+            .replace(/\\s+/g, ' ').trim().slice(0, 80);
+        if (!label) continue;
+        el.setAttribute('data-hybrid-index', String(candidates.length));
+        candidates.push({index: candidates.length, tag: el.tagName.toLowerCase(), label, href: el.getAttribute('href') || ''});
+        if (candidates.length >= limit) break;
+    }
+    return candidates;
+}
+"""
+
+class HybridCartAgent(BaseAgent):
+    """Walks PageGraph paths with Playwright and only asks the LLM when a transition fails or the page is unknown"""
+
+    SIGNIN_SELECTORS = RegisteredSelectors("signin_form")
+
+    def __init__(self, page_graph: PageGraph, pool=None):
+        super().__init__(config._config, pool=pool)
+        hybrid_config = config.get('hybrid', {})
+        self.graph = page_graph
+        self.llm_fallback = hybrid_config.get('llm_fallback', True)
+        self.max_candidates = hybrid_config.get('max_candidates', 150)
+        self.transition_timeout = hybrid_config.get('transition_timeout', 10000)
+        self.page = None
+        self.readiness = None
+        self.navigator = None
+        self.cart_extractor = None
+        self.selector_manager = SelectorManager()
+        self.price_extractor = PriceExtractor()
+        self.llm = None
+        self.llm_calls = 0
+        self.transitions: List[Dict[str, Any]] = []
+
+    async def start(self):
+        """Lease a warm page and set up graph navigation on it"""
+        self.logger.info("Starting hybrid graph/LLM agent...")
+        lease = await self.acquire_lease()
+        self.page = lease.page
+        self.readiness = PageReadiness(self.page)
+        self.navigator = Navigator(self.page, self.selector_manager)
+        self.cart_extractor = CartExtractor(self.page, readiness=self.readiness)
+        if not self.graph.edge_stats():
+            self.graph.load_edge_stats()
+
+    async def close(self):
+        """Return the leased page to the pool"""
+        try:
+            if self.readiness:
+                self.readiness.detach()
+                self.readiness = None
+            await self.selector_manager.flush()
+            self.graph.save_edge_stats()
+            crashed = self.lease.crashed if self.lease else False
+            await self.release_lease(crashed=crashed)
+            self.page = None
+        except Exception as e:
+            self.logger.warning(f"Error during cleanup: {e}")
+
+    async def execute_task(self, goal: Optional[str] = None, price_threshold: Optional[float] = None) -> TaskResult:
+        """Run the task with each transition, wait and extraction timed"""
+        with trace_task("hybrid.execute_task") as trace:
+            result = await self._execute_task(goal, price_threshold)
+
+        if trace:
+            result.spans = trace.spans
+            result.data["phases_ms"] = trace.phase_totals()
+        return result
+
+    async def _execute_task(self, goal: Optional[str] = None, price_threshold: Optional[float] = None) -> TaskResult:
+        """Reach the cart through the page graph, check the total and go to checkout when below the threshold"""
+        if price_threshold is None:
+            price_threshold = self.price_extractor.extract_threshold(goal) if goal else config.get('price_threshold', 100.0)
+        self.log_task_start(goal or f"Hybrid cart check with ${price_threshold:.2f} threshold")
+        self.llm_calls = 0
+        self.transitions = []
+
+        try:
+            amazon_url = config.get('amazon', {}).get('base_url', 'https://amazon.com')
+            with span("navigate.goto", url=amazon_url):
+                await self.page.goto(amazon_url, wait_until="domcontentloaded")
+
+            if not await self.travel_to("cart_page"):
+                return self._result(False, "Could not reach the cart page", price_threshold, action="navigation_failed")
+
+            if await self._on_signin_page():
+                self.invalidate_session()
+                return self._result(False, "Amazon asked for sign-in before showing the cart", price_threshold, action="signin_required")
+
+            cart_info = await self.cart_extractor.extract_cart_info(self.page)
+            total = cart_info.get('total', 0.0)
+            items = cart_info.get('items', [])
+
+            if total == 0.0 and not items:
+                return self._result(True, "Amazon cart is empty", price_threshold, cart_info, action="cart_empty")
+
+            if total >= price_threshold:
+                message = f"Cart total ${total:.2f} meets or exceeds threshold ${price_threshold:.2f}. Do not checkout."
+                return self._result(True, message, price_threshold, cart_info, action="exceeds_threshold")
+
+            if total <= 0:
+                # Items without a parsed price: never check out on an unknown total
+                message = f"Cart has {len(items)} items but no total could be read. Do not checkout."
+                return self._result(False, message, price_threshold, cart_info, action="total_unknown")
+
+            # Checkout stops at sign-in or the first personal info page
+            checkout_reached = await self.travel_to("checkout_page")
+            action = "checkout_reached" if checkout_reached else "checkout_failed"
+            message = f"Cart total ${total:.2f} is below threshold ${price_threshold:.2f}. " + (
+                "Proceeded to checkout and stopped." if checkout_reached else "Could not proceed to checkout."
+            )
+            return self._result(checkout_reached, message, price_threshold, cart_info, action=action, checkout_reached=checkout_reached)
+
+        except ReadinessTimeout as e:
+            return self._result(False, f"Cart contents did not load: {e.reason}", price_threshold, action="readiness_timeout")
+        except Exception as e:
+            self.logger.error(f"Hybrid task failed: {e}")
+            return self._result(False, f"Hybrid task failed: {e}", price_threshold, action="general_error")
+
+    async def travel_to(self, target_page_id: str) -> bool:
+        """Follow the graph path to a page, handing single transitions to the LLM when needed"""
+        current = await self.identify_page()
+        if current and current.id == target_page_id:
+            return True
+
+        path = self.graph.find_path(current.id, target_page_id) if current else []
+        if not path:
+            # Page not in the graph, or no known route from it
+            target = self.graph.get_page(target_page_id)
+            description = target.description if target else target_page_id.replace('_', ' ')
+            return await self._transition_with_llm(current.id if current else None, target_page_id, description)
+
+        for action in path:
+            if not await self._run_action(current.id, action):
+                return False
+            current = self.graph.get_page(action.target_page) or current
+        return True
+
+    async def identify_page(self) -> Optional[Page]:
+        """Match the current page to the graph by URL, then by its elements being present"""
+        page = self.graph.page_for_url(self.page.url)
+        if page:
+            return page
+
+        for candidate in self.graph.pages.values():
+            if candidate.elements and await selector_engine.resolve(self.page, candidate.elements[0].selectors):
+                return candidate
+        return None
+
+    async def _run_action(self, from_page: str, action: Action) -> bool:
+        with span("navigate.transition", source=from_page, target=action.target_page):
+            return await self._run_transition(from_page, action)
+
+    async def _run_transition(self, from_page: str, action: Action) -> bool:
+        started = time.perf_counter()
+        succeeded = await self._run_graph_action(from_page, action)
+        # Teach the router how slow and reliable this edge is
+        self.graph.record_transition(action, (time.perf_counter() - started) * 1000, success=succeeded)
+        if succeeded:
+            self._record_transition(from_page, action.target_page, "graph", started)
+            return True
+
+        self.logger.info(f"Graph transition '{action.description}' failed, handing it to the LLM")
+        if await self._transition_with_llm(from_page, action.target_page, action.description):
+            return True
+
+        # Last resort for pages with a known address
+        target = self.graph.get_page(action.target_page)
+        if target:
+            started = time.perf_counter()
+            await self.page.goto(target.url, wait_until="domcontentloaded")
+            if await self._arrived(action.target_page):
+                self._record_transition(from_page, action.target_page, "url", started)
+                return True
+        return False
+
+    async def _run_graph_action(self, from_page: str, action: Action) -> bool:
+        """Execute one graph action directly with Playwright"""
+        page = self.graph.get_page(from_page)
+        element = next((e for e in page.elements if e.id == action.element_id), None) if page else None
+        if element is None:
+            return False
+
+        if action.action_type == ActionType.CLICK:
+            clicked = await self.navigator.click_element(element.selectors, action.description, element_type=element.id)
+            return clicked and await self._arrived(action.target_page)
+
+        if action.action_type == ActionType.TYPE:
+            match = await selector_engine.wait_for(self.page, element.selectors, timeout=self.transition_timeout)
+            await self.page.fill(match.selector, (action.parameters or {}).get('text', ''))
+            await self.page.press(match.selector, 'Enter')
+            return await self._arrived(action.target_page)
+
+        self.logger.warning(f"Unsupported graph action type: {action.action_type.value}")
+        return False
+
+    async def _arrived(self, page_id: str) -> bool:
+        """Wait until any element of the target page, or a sign-in form, is visible; checkout by its URL"""
+        target = self.graph.get_page(page_id)
+        if target is None:
+            # Checkout is outside the graph; only its sign-in or checkout address counts as arriving
+            if page_id != "checkout_page":
+                return False
+            try:
+                await self.page.wait_for_url(lambda url: any(marker in url.lower() for marker in CHECKOUT_URL_MARKERS),
+                                             timeout=self.transition_timeout)
+                return True
+            except Exception:
+                return False
+
+        selectors = [selector for element in target.elements for selector in element.selectors]
+        if page_id == "cart_page":
+            selectors += CartExtractor.EMPTY_SELECTORS
+        try:
+            await self.readiness.for_any_selector(selectors + self.SIGNIN_SELECTORS, timeout=self.transition_timeout)
+            return True
+        except ReadinessTimeout:
+            return False
+
+    async def _transition_with_llm(self, from_page: Optional[str], target_page_id: str, description: str) -> bool:
+        """Ask the LLM which visible element leads to the target page, then click it ourselves"""
+        if not self.llm_fallback or not self._ensure_llm():
+            return False
+
+        started = time.perf_counter()
+        candidates = await self.page.evaluate(CLICKABLE_CANDIDATES_SCRIPT, self.max_candidates)
+        if not candidates:
+            return False
+
+        listing = "\n".join(f"[{c['index']}] <{c['tag']}> {c['label']} {c['href']}".rstrip() for c in candidates)
+        messages = [
+            ("system", "You pick the single element to click on a web page. Answer with the element number only, or -1 if none fits."),
+            ("human", f"Page: {self.page.url}\nGoal: {description}\nClickable elements:\n{listing}")
+        ]
+
+        self.llm_calls += 1
+        response = await self.llm.ainvoke(messages)
+        match = re.search(r'-?\d+', str(getattr(response, 'content', response)))
+        index = int(match.group(0)) if match else -1
+        if not 0 <= index < len(candidates):
+            self.logger.warning(f"LLM found no element for '{description}'")
+            return False
+
+        self.logger.info(f"LLM chose [{index}] {candidates[index]['label']} for '{description}'")
+        await self.page.click(f'[data-hybrid-index="{index}"]')
+        if not await self._arrived(target_page_id):
+            return False
+
+        self._record_transition(from_page, target_page_id, "llm", started)
+        return True
+
+    def _ensure_llm(self) -> bool:
+        """Create the LLM client on first use, so graph-only runs never need an API key"""
+        if self.llm is not None:
+            return True
+        if not os.getenv("OPENAI_API_KEY"):
+            self.logger.warning("OPENAI_API_KEY not set, LLM fallback unavailable")
+            return False
+
+        from langchain_openai import ChatOpenAI
+        from ..llm.cache import CachingChatModel
+        openai_config = config.get('openai', {})
+        self.llm = ChatOpenAI(model=openai_config.get('model', 'gpt-4o-mini'), temperature=openai_config.get('temperature', 0.1))
+        if config.get('llm_cache.enabled', True):
+            self.llm = CachingChatModel(self.llm)
+        return True
+
+    async def _on_signin_page(self) -> bool:
+        return is_signin_url(self.page.url) or bool(await selector_engine.resolve(self.page, self.SIGNIN_SELECTORS))
+
+    def _record_transition(self, from_page: Optional[str], to_page: str, method: str, started: float):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.transitions.append({"from": from_page, "to": to_page, "method": method, "elapsed_ms": round(elapsed_ms, 1)})
+        self.logger.info(f"{from_page or 'unknown page'} -> {to_page} via {method} in {elapsed_ms:.0f}ms")
+
+    def _result(self, success: bool, message: str, threshold: float, cart_info: Optional[Dict[str, Any]] = None,
+                action: str = "completed", checkout_reached: bool = False) -> TaskResult:
+        cart_info = cart_info or {}
+        items = cart_info.get('items', [])
+        self.log_task_complete(success)
+        return TaskResult(
+            success,
+            message,
+            data={
+                "action_taken": action,
+                "cart_items": [item.get('name', 'Unknown Item') for item in items],
+                "items_count": len(items),
+                "total": cart_info.get('total', 0.0),
+                "threshold": threshold,
+                "checkout_reached": checkout_reached,
+                "llm_calls": self.llm_calls,
+                "transitions": self.transitions
+            },
+            total=cart_info.get('total')
+        )
@@ -1,67 +1,50 @@
-import asyncio
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+import time
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from typing import List, Optional
 from .base_agent import BaseAgent
 from ..core.models import TaskResult, CartItem
 from ..core.page_graph import PageGraph
+from ..browser.har import HarRecorder, recording_path
 from ..extractors.cart_extractor import CartExtractor
 from ..extractors.price_extractor import PriceExtractor
+from ..navigation.navigator import Navigator
+from ..navigation.readiness import PageReadiness, ReadinessTimeout
+from ..navigation.selectors import SelectorManager, RegisteredSelectors
+from ..navigation.signin import SignInWaiter, is_signin_url, WATCH_FAILED
+from ..utils.logger import console
+from ..utils.tracing import span, trace_task
 from config.settings import config
 
 class ManualBrowserAgent(BaseAgent):
-    def __init__(self, page_graph: PageGraph):
+    SIGNIN_SELECTORS = RegisteredSelectors("signin_form")
+    
+    def __init__(self, page_graph: PageGraph, pool=None):
         # Pass the actual config dict
-        super().__init__(config._config)
+        super().__init__(config._config, pool=pool)
         self.graph = page_graph
-        self.browser = None
         self.page = None
-        self.playwright = None
         self.cart_extractor = None
+        self.readiness = None
+        self.har_recorder = None
+        self.selector_manager = SelectorManager()
         self.price_extractor = PriceExtractor()
         self.current_page_id = None
-        self.headless = False  # Default to visible for debugging
         
     async def start(self):
-        """Initialize the browser"""
+        """Lease a warm, pre-configured page from the browser pool"""
         self.logger.info("Starting manual browser agent...")
         
         try:
-            self.playwright = await async_playwright().start()
+            lease = await self.acquire_lease()
+            self.page = lease.page
+            self.readiness = PageReadiness(self.page)
             
-            # Launch browser with better settings
-            browser_config = config.get('browser', {})
-            self.browser = await self.playwright.chromium.launch(
-                headless=getattr(self, 'headless', browser_config.get('headless', False)),
-                slow_mo=500,  # Slow down for stability
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-dev-shm-usage',
-                    '--no-sandbox',
-                    '--disable-web-security',
-                    '--disable-features=VizDisplayCompositor'
-                ]
-            )
-            
-            # Create new page with extended timeouts
-            self.page = await self.browser.new_page()
-            
-            # Set longer timeouts
-            self.page.set_default_timeout(120000)  # 120 seconds
-            self.page.set_default_navigation_timeout(120000)  # 120 seconds
-            
-            # Set viewport on the page
-            await self.page.set_viewport_size({
-                'width': browser_config.get('viewport_width', 1280),
-                'height': browser_config.get('viewport_height', 720)
-            })
-            
-            # FIXED: Correct Playwright API method name
-            await self.page.set_extra_http_headers({
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            })
+            if config.get('network.mode', 'live') == "record":
+                self.har_recorder = HarRecorder()
+                self.har_recorder.attach(lease.context)
             
             # FIXED: Initialize cart extractor with page parameter after page is created
-            self.cart_extractor = CartExtractor(self.page)
+            self.cart_extractor = CartExtractor(self.page, readiness=self.readiness)
             
             self.logger.info("Browser started successfully")
             
@@ -70,142 +53,179 @@ class ManualBrowserAgent(BaseAgent):
             raise
         
     async def close(self):
-        """Close the browser"""
+        """Return the leased page to the pool"""
         try:
-            if self.page:
-                await self.page.close()
-            if self.browser:
-                await self.browser.close()
-            if self.playwright:
-                await self.playwright.stop()
+            if self.har_recorder:
+                self.har_recorder.detach()
+                run_id = self.job_id or time.strftime('%Y%m%d-%H%M%S')
+                await self.har_recorder.save(recording_path(config.get('network.har_path', '.cache/har/manual_run.har.json'), run_id))
+                self.har_recorder = None
+            if self.readiness:
+                self.readiness.detach()
+                self.readiness = None
+            await self.selector_manager.flush()
+            crashed = self.lease.crashed if self.lease else False
+            await self.release_lease(crashed=crashed)
+            self.page = None
             self.logger.info("Browser closed successfully")
         except Exception as e:
             self.logger.warning(f"Error during cleanup: {e}")
             
     def print_cart_contents(self, cart_items: list, total: float, threshold: float):
-        """Print detailed cart contents to console"""
-        print("\n" + "="*60)
-        print(" AMAZON CART CONTENTS")
-        print("="*60)
+        """Print detailed cart contents to console as one block, so concurrent runs do not interleave"""
+        lines = ["", "="*60, " AMAZON CART CONTENTS", "="*60]
         
         if not cart_items or len(cart_items) == 0:
-            print("    Cart Status: EMPTY")
-            print("    Total: $0.00")
+            lines.append("    Cart Status: EMPTY")
+            lines.append("    Total: $0.00")
         else:
-            print(f"    Items Found: {len(cart_items)}")
-            print(f"    Cart Total: ${total:.2f}")
-            print("\n    Items in Cart:")
+            lines.append(f"    Items Found: {len(cart_items)}")
+            lines.append(f"    Cart Total: ${total:.2f}")
+            lines.append("\n    Items in Cart:")
             
             for i, item in enumerate(cart_items, 1):
                 if isinstance(item, dict):
                     name = item.get('name', 'Unknown Item')
                     price = item.get('price', 0.0)
                     if price > 0:
-                        print(f"      {i}. {name} - ${price:.2f}")
+                        lines.append(f"      {i}. {name} - ${price:.2f}")
                     else:
-                        print(f"      {i}. {name}")
+                        lines.append(f"      {i}. {name}")
                 else:
-                    print(f"      {i}. {str(item)}")
+                    lines.append(f"      {i}. {str(item)}")
         
-        print(f"\n    Price Threshold: ${threshold:.2f}")
+        lines.append(f"\n    Price Threshold: ${threshold:.2f}")
         
         if total == 0.0:
-            print(f"    Status: Cart is empty")
-            print(f"    Action: Add items to cart")
+            lines.append(f"    Status: Cart is empty")
+            lines.append(f"    Action: Add items to cart")
         elif total < threshold:
-            print(f"    Status:  BELOW THRESHOLD (${total:.2f} < ${threshold:.2f})")
-            print(f"    Action:  ELIGIBLE FOR CHECKOUT")
-            # print(f"   💡 Recommendation: You can proceed with purchase")
+            lines.append(f"    Status:  BELOW THRESHOLD (${total:.2f} < ${threshold:.2f})")
+            lines.append(f"    Action:  ELIGIBLE FOR CHECKOUT")
         else:
-            print(f"    Status:  EXCEEDS THRESHOLD (${total:.2f} ≥ ${threshold:.2f})")
-            print(f"    Action:  DO NOT CHECKOUT")
-            # print(f"   💡 Recommendation: Remove items or increase threshold")
+            lines.append(f"    Status:  EXCEEDS THRESHOLD (${total:.2f} ≥ ${threshold:.2f})")
+            lines.append(f"    Action:  DO NOT CHECKOUT")
         
-        print("="*60)
+        lines.append("="*60)
+        console.info("\n".join(lines))
             
-    async def execute_task(self, goal: str) -> TaskResult:
+    async def execute_task(self, goal: Optional[str] = None, price_threshold: Optional[float] = None) -> TaskResult:
+        """Execute the cart checking task and report what the network profile saved and where the time went"""
+        with trace_task("manual.execute_task") as trace:
+            result = await self._execute_task(goal, price_threshold)
+        
+        if trace:
+            result.spans = trace.spans
+            if result.data is None:
+                result.data = {}
+            result.data["phases_ms"] = trace.phase_totals()
+        
+        if self.lease and self.lease.network:
+            network_stats = self.lease.network.stats()
+            if result.data is None:
+                result.data = {}
+            result.data["network"] = network_stats
+            self.logger.info(
+                f"Network profile '{network_stats['profile']}' saved {network_stats['requests_saved']} requests "
+                f"(~{network_stats['bytes_saved_estimate'] / 1024:.0f} KB)"
+            )
+        
+        return result
+    
+    async def _execute_task(self, goal: Optional[str] = None, price_threshold: Optional[float] = None) -> TaskResult:
         """Execute the cart checking task - simplified for manual mode"""
-        self.log_task_start(goal)
+        if price_threshold is None:
+            price_threshold = self.price_extractor.extract_threshold(goal) if goal else config.get('price_threshold', 100.0)
+        self.log_task_start(goal or f"Manual cart check with ${price_threshold:.2f} threshold")
         
         try:
-            threshold = self.price_extractor.extract_threshold(goal)
+            threshold = price_threshold
             
             # Step 1: Navigate to Amazon
             self.logger.info("Navigating to Amazon...")
-            print("\n Navigating to Amazon.com...")
+            console.info("\n Navigating to Amazon.com...")
             amazon_url = config.get('amazon', {}).get('base_url', 'https://amazon.com')
             
             try:
-                await self.page.goto(amazon_url, wait_until="domcontentloaded", timeout=60000)
-                await asyncio.sleep(3)
+                with span("navigate.goto", url=amazon_url):
+                    await self.page.goto(amazon_url, wait_until="domcontentloaded", timeout=60000)
                 self.logger.info(f"Successfully navigated to {self.page.url}")
-                print(f" Successfully loaded Amazon homepage")
+                console.info(f" Successfully loaded Amazon homepage")
                 
             except Exception as e:
-                print(f" Failed to navigate to Amazon: {e}")
+                console.error(f" Failed to navigate to Amazon: {e}")
                 return TaskResult(False, f"Failed to navigate to Amazon: {e}")
             
             # Step 2: Navigate to cart
             self.logger.info("Navigating to cart...")
-            print("🛒 Navigating to shopping cart...")
+            console.info("🛒 Navigating to shopping cart...")
             
             cart_success = False
             
-            # Try clicking cart icon first
-            cart_selectors = [
-                "#nav-cart-count-container",
-                "#nav-cart", 
-                ".nav-cart-icon",
-                "a[href*='cart']"
-            ]
-            
-            for selector in cart_selectors:
-                try:
-                    element = await self.page.wait_for_selector(selector, timeout=10000, state="visible")
-                    if element:
-                        await element.click()
-                        self.logger.info(f"Successfully clicked cart link using selector: {selector}")
-                        print(f" Found and clicked cart button")
-                        cart_success = True
-                        break
-                except:
-                    continue
+            # Try clicking cart icon first; the navigator records which ranked link won and which were missing
+            navigator = Navigator(self.page, self.selector_manager)
+            cart_selectors = self.selector_manager.get_selectors("cart_link")
+            if await navigator.click_element(cart_selectors, "cart link", element_type="cart_link", timeout=10000):
+                console.info(f" Found and clicked cart button")
+                cart_success = True
             
             # If cart click failed, navigate directly to cart URL
             if not cart_success:
-                print(" Cart button not found, trying direct URL...")
+                console.info(" Cart button not found, trying direct URL...")
                 try:
-                    await self.page.goto("https://amazon.com/gp/cart/view.html", wait_until="domcontentloaded", timeout=60000)
+                    with span("navigate.goto", url="https://amazon.com/gp/cart/view.html"):
+                        await self.page.goto("https://amazon.com/gp/cart/view.html", wait_until="domcontentloaded", timeout=60000)
                     cart_success = True
-                    print(" Navigated directly to cart page")
+                    console.info(" Navigated directly to cart page")
                 except Exception as e:
-                    print(f" Failed to access cart: {e}")
+                    console.error(f" Failed to access cart: {e}")
                     return TaskResult(False, f"Failed to access cart: {e}")
             
-            # Step 3: Give page time to load and check if sign-in is needed
-            await asyncio.sleep(5)
+            # Step 3: Wait for the cart or a sign-in form and check if sign-in is needed
+            try:
+                await self.readiness.for_any_selector(
+                    CartExtractor.READY_SELECTORS + CartExtractor.EMPTY_SELECTORS + self.SIGNIN_SELECTORS
+                )
+            except ReadinessTimeout as e:
+                console.error(f" Cart page did not load: {e.reason}")
+                return TaskResult(False, f"Cart page did not load: {e.reason}")
             current_url = self.page.url.lower()
             
             # If on sign-in page, give user time to sign in manually
-            if "signin" in current_url or "login" in current_url or "ap/signin" in current_url:
-                print("\n" + "="*60)
-                print(" AMAZON SIGN-IN DETECTED")
-                print("="*60)
-                print("Please sign in to your Amazon account in the browser window.")
-                print("Take your time - the script will wait for you to complete sign-in.")
-                print("Press Enter here after you've signed in and can see your cart...")
-                print("="*60)
-                
-                # Wait for user to press Enter after signing in
-                input("Press Enter after signing in and you can see your cart: ")
+            if is_signin_url(current_url):
+                self.invalidate_session()
+                waiter = SignInWaiter(self.page, CartExtractor.READY_SELECTORS + CartExtractor.EMPTY_SELECTORS)
+                console.info("\n".join([
+                    "", "="*60,
+                    " AMAZON SIGN-IN DETECTED",
+                    "="*60,
+                    "Please sign in to your Amazon account in the browser window.",
+                    f"The cart is picked up as soon as it appears (waiting up to {waiter.timeout / 60:.0f} minutes).",
+                    "Press Enter here to continue right away.",
+                    "="*60
+                ]))
                 
-                # Give page time to load after sign-in
-                await asyncio.sleep(3)
-                print(" Continuing with cart analysis...")
+                # Other sessions in the process keep running while this one waits
+                reason = await waiter.wait(signal=self.signin_signal)
+                if reason is None:
+                    console.error(" Timed out waiting for sign-in")
+                    return TaskResult(
+                        False,
+                        f"Timed out after {waiter.timeout:.0f}s waiting for sign-in",
+                        data={"action_taken": "signin_timeout", "threshold": threshold}
+                    )
+                if reason == WATCH_FAILED:
+                    console.error(" Lost the browser page while waiting for sign-in")
+                    return TaskResult(
+                        False,
+                        "The page could no longer be watched while waiting for sign-in",
+                        data={"action_taken": "signin_failed", "threshold": threshold}
+                    )
+                self.mark_signed_in()
+                console.info(" Continuing with cart analysis...")
             
             # Step 4: Extract cart information regardless of URL
-            print(" Loading cart contents...")
-            print(" Analyzing cart contents...")
+            console.info(" Loading cart contents...\n Analyzing cart contents...")
             
             try:
                 # Check if cart is empty first
@@ -225,7 +245,7 @@ class ManualBrowserAgent(BaseAgent):
                         break
                 
                 if cart_is_empty:
-                    print(" Cart analysis complete!")
+                    console.info(" Cart analysis complete!")
                     self.print_cart_contents([], 0.0, threshold)
                     
                     return TaskResult(
@@ -241,13 +261,17 @@ class ManualBrowserAgent(BaseAgent):
                     )
                 
                 # Use CartExtractor to get cart info
-                cart_info = await self.cart_extractor.extract_cart_info(self.page)
+                try:
+                    cart_info = await self.cart_extractor.extract_cart_info(self.page)
+                except ReadinessTimeout as e:
+                    console.error(f" Cart contents did not load: {e.reason}")
+                    return TaskResult(False, f"Cart contents did not load: {e.reason}")
                 
                 # Extract data from cart_info
                 total = cart_info.get('total', 0.0)
                 items = cart_info.get('items', [])
                 
-                print(" Cart analysis complete!")
+                console.info(" Cart analysis complete!")
                 
                 # Convert items to simple list for printing
                 item_names = []
@@ -288,8 +312,8 @@ class ManualBrowserAgent(BaseAgent):
                     
             except Exception as e:
                 self.logger.error(f"Error extracting cart information: {e}")
-                print(f" Error analyzing cart: {e}")
-                print(f" The browser window is still open - you can manually check your cart contents.")
+                console.error(f" Error analyzing cart: {e}")
+                console.error(f" The browser window is still open - you can manually check your cart contents.")
                 
                 # Still return success but with manual note
                 return TaskResult(
@@ -306,7 +330,7 @@ class ManualBrowserAgent(BaseAgent):
                 
         except Exception as e:
             self.logger.error(f"Task execution failed: {e}")
-            print(f" Task execution failed: {e}")
+            console.error(f" Task execution failed: {e}")
             return TaskResult(
                 False,
                 f"Task execution failed: {e}",
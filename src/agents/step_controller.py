@@ -0,0 +1,151 @@
+import re
+import time
+from typing import Any, List, Optional, Dict
+from ..extractors.price_parser import parse_price
+from ..utils.logger import logger
+from ..utils.tracing import add_span
+from config.settings import config
+
+# Subtotal labels are trusted anywhere; a bare "total" only in content extracted from the cart page
+SUBTOTAL_PATTERN = re.compile(r'(?:cart\s+)?sub\s?total[^$\n]{0,40}?(\$\s?\d[\d,]*(?:\.\d{2})?)', re.IGNORECASE)
+TOTAL_PATTERNS = [
+    SUBTOTAL_PATTERN,
+    re.compile(r'\btotal[^$\n]{0,40}?(\$\s?\d[\d,]*(?:\.\d{2})?)', re.IGNORECASE)
+]
+# The model restates the threshold in its memory and goals ("check the total is below $100")
+THRESHOLD_WORDS = ("threshold", "below", "exceed", "above", "under", "less than", "more than")
+
+# Where the checkout flow asks for personal info or sign-in
+CHECKOUT_URL_MARKERS = ["/ap/signin", "/checkout", "/gp/buy/", "/buy/"]
+CHECKOUT_TEXT_MARKERS = ["sign in", "personal info", "shipping address", "payment method", "select a delivery address"]
+
+class AgentStepController:
+    """Watches browser_use agent steps as they happen and stops the run once the cart decision is made"""
+
+    def __init__(self, price_threshold: float, max_steps: Optional[int] = None, max_seconds: Optional[float] = None):
+        browser_use_config = config.get('browser_use', {})
+        self.price_threshold = price_threshold
+        self.max_steps = max_steps or browser_use_config.get('max_steps', 15)
+        self.max_seconds = max_seconds or browser_use_config.get('max_seconds', 180)
+        self.agent = None
+        self.started_at = time.perf_counter()
+        self._last_step_at = self.started_at
+        self.steps = 0
+        self.cart_total: Optional[float] = None
+        self.checkout_reached = False
+        self.stop_reason: Optional[str] = None
+        self.trace: List[Dict[str, Any]] = []
+
+    def attach(self, agent: Any):
+        """Bind the agent whose run this controller may stop"""
+        self.agent = agent
+        self.started_at = self._last_step_at = time.perf_counter()
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def should_checkout(self) -> bool:
+        return self.cart_total is not None and 0 < self.cart_total < self.price_threshold
+
+    def on_step(self, state: Any, model_output: Any, step_number: int):
+        """register_new_step_callback hook: read the step, then stop the agent if nothing is left to do"""
+        self.steps = step_number
+        # Each step spans from the previous callback (or the start) to this one
+        now = time.perf_counter()
+        add_span("agent.step", self._last_step_at, now, step=step_number)
+        self._last_step_at = now
+        url = str(getattr(state, 'url', '') or '')
+        step_texts = self._step_texts(model_output)
+        extracted = self._last_results()
+        texts = step_texts + extracted
+
+        if self.cart_total is None:
+            self.cart_total = self.find_total(extracted, self.price_threshold)
+            if self.cart_total is None:
+                self.cart_total = self.find_total(step_texts, self.price_threshold, patterns=[SUBTOTAL_PATTERN])
+            if self.cart_total is not None:
+                logger.info(f"Cart total ${self.cart_total:.2f} seen at step {step_number}")
+
+        if not self.checkout_reached:
+            self.checkout_reached = self.is_checkout(url, texts)
+
+        self.trace.append({
+            "step": step_number,
+            "url": url,
+            "elapsed_seconds": round(self.elapsed_seconds, 2),
+            "cart_total": self.cart_total
+        })
+
+        reason = self.stop_condition()
+        if reason:
+            self.stop(reason)
+
+    def stop_condition(self) -> Optional[str]:
+        """Why the run can end now, or None to keep going"""
+        if self.cart_total is not None and self.cart_total >= self.price_threshold:
+            return "total_above_threshold"
+        if self.should_checkout and self.checkout_reached:
+            return "checkout_reached"
+        if self.steps >= self.max_steps:
+            return "max_steps"
+        if self.elapsed_seconds >= self.max_seconds:
+            return "max_seconds"
+        return None
+
+    def stop(self, reason: str):
+        if self.stop_reason:
+            return
+        self.stop_reason = reason
+        logger.info(f"Stopping agent after {self.steps} steps ({reason}, {self.elapsed_seconds:.1f}s)")
+        if self.agent is None:
+            return
+        if hasattr(self.agent, 'stop'):
+            self.agent.stop()
+        elif hasattr(self.agent, 'state') and hasattr(self.agent.state, 'stopped'):
+            self.agent.state.stopped = True
+        else:
+            self.agent._stopped = True
+
+    @staticmethod
+    def find_total(texts: List[str], price_threshold: Optional[float] = None, patterns: Optional[List[re.Pattern]] = None) -> Optional[float]:
+        """First cart total mentioned in the texts, skipping restatements of the threshold"""
+        for pattern in patterns or TOTAL_PATTERNS:
+            for text in texts:
+                for match in pattern.finditer(text):
+                    if any(word in match.group(0).lower() for word in THRESHOLD_WORDS):
+                        continue
+                    total = parse_price(match.group(1))
+                    if total > 0 and total != price_threshold:
+                        return total
+        return None
+
+    @staticmethod
+    def is_checkout(url: str, texts: List[str]) -> bool:
+        lowered_url = url.lower()
+        if any(marker in lowered_url for marker in CHECKOUT_URL_MARKERS):
+            return True
+        lowered = " ".join(texts).lower()
+        return "checkout" in lowered and any(marker in lowered for marker in CHECKOUT_TEXT_MARKERS)
+
+    @staticmethod
+    def _step_texts(model_output: Any) -> List[str]:
+        """Memory, goals and evaluation the model wrote for this step"""
+        brain = getattr(model_output, 'current_state', None)
+        if brain is None:
+            return []
+        fields = ['evaluation_previous_goal', 'memory', 'next_goal']
+        return [str(getattr(brain, field)) for field in fields if getattr(brain, field, None)]
+
+    def _last_results(self) -> List[str]:
+        """Extracted content of the previous step, which usually carries the cart text"""
+        if self.agent is None:
+            return []
+        state = getattr(self.agent, 'state', None)
+        history = getattr(state, 'history', None) or getattr(self.agent, 'history', None)
+        entries = getattr(history, 'history', None) or []
+        if not entries:
+            return []
+        results = getattr(entries[-1], 'result', None) or []
+        return [str(r.extracted_content) for r in results if getattr(r, 'extracted_content', None)]
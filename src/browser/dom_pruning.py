@@ -0,0 +1,155 @@
+import json
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlsplit
+from playwright.async_api import BrowserContext, ConsoleMessage
+from ..core.page_graph import PageGraph
+from ..utils.logger import logger
+from config.settings import config
+
+REPORT_PREFIX = "[cart-prune] "
+
+# Hides every subtree that holds none of the graph elements of the current page. The agent's
+# DOM snapshot skips hidden nodes, so the observation sent to the LLM only covers the kept regions.
+# Re-runs on DOM mutations (debounced) and reports token estimates through the console.
+PRUNE_SCRIPT = """
+(spec) => {
+    if (window.__cartPruneInstalled) return;
+    window.__cartPruneInstalled = true;
+
+    const ATTR = 'data-cart-pruned';
+    const SKIPPED_TAGS = ['SCRIPT', 'STYLE', 'LINK', 'META'];
+    const path = location.pathname.replace(/\\/$/, '');
+    const rule = spec.pages.find((p) => p.path === path || (p.path && path.startsWith(p.path)));
+    if (!rule) return;
+
+    const safeQueryAll = (selector) => {
+        try { return Array.from(document.querySelectorAll(selector)); } catch (e) { return []; }
+    };
+    const estimateTokens = () => Math.ceil((document.body ? document.body.innerText.length : 0) / spec.charsPerToken);
+
+    let scheduled = false;
+    let lastReport = '';
+    const prune = () => {
+        scheduled = false;
+        const keep = new Set(rule.selectors.flatMap(safeQueryAll));
+        if (!document.body || !keep.size) return;
+
+        document.querySelectorAll('[' + ATTR + ']').forEach((el) => el.removeAttribute(ATTR));
+        const before = estimateTokens();
+
+        // Kept elements and their ancestors stay; every other child of an ancestor is hidden
+        const onPath = new Set();
+        for (const el of keep) {
+            for (let node = el; node && node !== document.documentElement; node = node.parentElement) onPath.add(node);
+        }
+        for (const node of onPath) {
+            if (keep.has(node)) continue;
+            for (const child of node.children) {
+                if (!onPath.has(child) && !SKIPPED_TAGS.includes(child.tagName)) child.setAttribute(ATTR, '');
+            }
+        }
+
+        const report = JSON.stringify({page: rule.id, before, after: estimateTokens(), kept: keep.size});
+        if (report !== lastReport) {
+            lastReport = report;
+            console.debug(spec.reportPrefix + report);
+        }
+    };
+    const schedule = () => {
+        if (scheduled) return;
+        scheduled = true;
+        setTimeout(prune, spec.debounceMs);
+    };
+    const start = () => {
+        const style = document.createElement('style');
+        style.textContent = '[' + ATTR + '] { display: none !important; }';
+        (document.head || document.documentElement).appendChild(style);
+        prune();
+        new MutationObserver(schedule).observe(document.body, {childList: true, subtree: true});
+    };
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', start);
+    } else {
+        start();
+    }
+}
+"""
+
+class DomPruner:
+    """Strips everything outside the graph elements of a page before the agent observes it"""
+
+    def __init__(self, graph: PageGraph, page_ids: Optional[List[str]] = None):
+        pruning_config = config.get('dom_pruning', {})
+        self.page_ids = page_ids or pruning_config.get('pages', ['cart_page'])
+        self.chars_per_token = pruning_config.get('chars_per_token', 4)
+        self.debounce_ms = pruning_config.get('debounce_ms', 100)
+        self.spec = self._build_spec(graph)
+        self.measurements: List[Dict[str, Any]] = []
+
+    def _build_spec(self, graph: PageGraph) -> Dict[str, Any]:
+        pages = []
+        for page_id in self.page_ids:
+            page = graph.get_page(page_id)
+            if page is None:
+                logger.warning(f"DOM pruning skips unknown page '{page_id}'")
+                continue
+            pages.append({
+                "id": page.id,
+                "path": self._path(page.url),
+                "selectors": [selector for element in page.elements for selector in element.selectors]
+            })
+        return {
+            "pages": pages,
+            "charsPerToken": self.chars_per_token,
+            "debounceMs": self.debounce_ms,
+            "reportPrefix": REPORT_PREFIX
+        }
+
+    @staticmethod
+    def _path(url: str) -> str:
+        return urlsplit(url).path.rstrip('/')
+
+    @property
+    def script(self) -> str:
+        return f"({PRUNE_SCRIPT})({json.dumps(self.spec)})"
+
+    async def install(self, context: BrowserContext):
+        """Prune every document the context loads from now on, and the pages already open"""
+        context.on("console", self._on_console)
+        await context.add_init_script(script=self.script)
+        for page in context.pages:
+            try:
+                await page.evaluate(self.script)
+            except Exception as e:
+                logger.debug(f"Could not prune already open page: {e}")
+
+    def _on_console(self, message: ConsoleMessage):
+        text = message.text
+        if not text.startswith(REPORT_PREFIX):
+            return
+        try:
+            report = json.loads(text[len(REPORT_PREFIX):])
+        except ValueError:
+            return
+
+        self.measurements.append(report)
+        saved = 1 - report['after'] / report['before'] if report['before'] else 0.0
+        logger.info(
+            f"DOM pruning on {report['page']}: ~{report['before']} -> ~{report['after']} tokens "
+            f"({saved:.0%} smaller, {report['kept']} regions kept)"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Token estimates of the most recent prune and over all prunes"""
+        if not self.measurements:
+            return {"prunes": 0}
+        last = self.measurements[-1]
+        before = sum(m['before'] for m in self.measurements)
+        after = sum(m['after'] for m in self.measurements)
+        return {
+            "prunes": len(self.measurements),
+            "last_tokens_before": last['before'],
+            "last_tokens_after": last['after'],
+            "reduction": round(1 - after / before, 3) if before else 0.0
+        }
@@ -0,0 +1,202 @@
+import asyncio
+import base64
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+from playwright.async_api import BrowserContext, Response, Route
+from ..utils.logger import logger
+from config.settings import config, SettingsError
+
+# Headers that would be wrong once a body is served from disk
+SKIPPED_REPLAY_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+def _without_query(url: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+def recording_path(har_path: str, run_id: str) -> Path:
+    """har_path with the run ID added to the file name, so concurrent recordings never overwrite each other"""
+    path = Path(har_path)
+    stem, dot, suffixes = path.name.partition('.')
+    return path.with_name(f"{stem}-{run_id}{dot}{suffixes}")
+
+def replay_path(har_path: str, run_id: Optional[str] = None) -> Path:
+    """Archive to replay: the given run's recording, else har_path itself, else the newest recording next to it"""
+    if run_id:
+        return recording_path(har_path, run_id)
+    path = Path(har_path)
+    if path.exists():
+        return path
+    stem, dot, suffixes = path.name.partition('.')
+    recordings = sorted(path.parent.glob(f"{stem}-*{dot}{suffixes}"), key=lambda p: p.stat().st_mtime)
+    return recordings[-1] if recordings else path
+
+class HarRecorder:
+    """Captures every response of a BrowserContext into a HAR 1.2-style archive"""
+
+    def __init__(self):
+        self.entries: List[Dict[str, Any]] = []
+        self._pending = set()
+        self._context: Optional[BrowserContext] = None
+
+    def attach(self, context: BrowserContext):
+        self._context = context
+        context.on("response", self._on_response)
+
+    def detach(self):
+        if self._context:
+            self._context.remove_listener("response", self._on_response)
+            self._context = None
+
+    def _on_response(self, response: Response):
+        # Bodies must be read asynchronously; keep the task so save() can wait for it
+        task = asyncio.ensure_future(self._record(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _record(self, response: Response):
+        request = response.request
+        try:
+            body = await response.body()
+        except Exception:
+            body = b""  # Redirects and aborted responses have no body
+
+        timing = request.timing or {}
+        headers = await response.all_headers()
+        self.entries.append({
+            "startedDateTime": datetime.now(timezone.utc).isoformat(),
+            "time": max(timing.get("responseEnd", 0.0), 0.0),
+            "request": {
+                "method": request.method,
+                "url": request.url,
+                "headers": [{"name": k, "value": v} for k, v in request.headers.items()],
+                "postData": {"text": request.post_data} if request.post_data else None,
+                "resourceType": request.resource_type
+            },
+            "response": {
+                "status": response.status,
+                "statusText": response.status_text,
+                "headers": [{"name": k, "value": v} for k, v in headers.items()],
+                "content": {
+                    "size": len(body),
+                    "mimeType": headers.get("content-type", ""),
+                    "text": base64.b64encode(body).decode("ascii"),
+                    "encoding": "base64"
+                }
+            }
+        })
+
+    async def save(self, path: str):
+        """Wait for in-flight bodies and write the archive"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+        archive = {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "agentic-browser-cart-navigator", "version": "1.0"},
+                "entries": self.entries
+            }
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(archive, f)
+        logger.info(f"Recorded {len(self.entries)} network exchanges to {path}")
+
+class HarReplayer:
+    """Serves a recorded archive back through request routing, with optional injected latency"""
+
+    def __init__(self, path: str, latency_ms: float = 0.0, fallback_to_network: bool = False):
+        self.path = path
+        self.latency_ms = latency_ms
+        self.fallback_to_network = fallback_to_network
+        self.hits = 0
+        self.misses = 0
+        self._exact: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._loose: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        # Per-context replay positions, so every run replays the archive from its start
+        self._served: Dict[int, Dict[Tuple[str, str], int]] = {}
+        self._load()
+
+    @classmethod
+    def from_config(cls) -> 'HarReplayer':
+        network_config = config.get('network', {})
+        return cls(
+            str(replay_path(network_config.get('har_path', '.cache/har/manual_run.har.json'), network_config.get('replay_run_id'))),
+            latency_ms=network_config.get('replay_latency_ms', 0),
+            fallback_to_network=network_config.get('replay_fallback_to_network', False)
+        )
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)["log"]["entries"]
+            for entry in entries:
+                method = entry["request"]["method"]
+                url = entry["request"]["url"]
+                self._exact.setdefault((method, url), []).append(entry)
+                self._loose.setdefault((method, _without_query(url)), []).append(entry)
+        except FileNotFoundError:
+            raise SettingsError([f"network.har_path: no archive to replay at {self.path}; record one with network.mode: record first"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise SettingsError([f"network.har_path: {self.path} is not a readable HAR archive ({type(e).__name__}: {e})"])
+
+        logger.info(f"Loaded {len(entries)} recorded exchanges from {self.path}")
+
+    def lookup(self, method: str, url: str, served: Optional[Dict[Tuple[str, str], int]] = None) -> Optional[Dict[str, Any]]:
+        """Find a recorded exchange, ignoring the query string if there is no exact match"""
+        key = (method, url)
+        candidates = self._exact.get(key)
+        if not candidates:
+            key = (method, _without_query(url))
+            candidates = self._loose.get(key)
+        if not candidates:
+            return None
+
+        # Repeated requests replay their recorded responses in order, then repeat the last one
+        served = {} if served is None else served
+        position = served.get(key, 0)
+        served[key] = position + 1
+        return candidates[min(position, len(candidates) - 1)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"archive": self.path, "hits": self.hits, "misses": self.misses, "latency_ms": self.latency_ms}
+
+    async def install(self, context: BrowserContext):
+        served = self._served[id(context)] = {}
+        await context.route("**/*", lambda route: self._handle(route, served))
+
+    def reset(self, context: BrowserContext):
+        """Rewind a context to the start of the archive; called whenever it is leased"""
+        self._served.get(id(context), {}).clear()
+
+    def forget(self, context: BrowserContext):
+        self._served.pop(id(context), None)
+
+    async def _handle(self, route: Route, served: Dict[Tuple[str, str], int]):
+        request = route.request
+        entry = self.lookup(request.method, request.url, served)
+
+        if entry is None:
+            self.misses += 1
+            if self.fallback_to_network:
+                await route.fallback()
+            else:
+                await route.abort("internetdisconnected")
+            return
+
+        self.hits += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+        response = entry["response"]
+        content = response["content"]
+        body = base64.b64decode(content["text"]) if content.get("encoding") == "base64" else content.get("text", "").encode()
+        headers = {
+            header["name"]: header["value"]
+            for header in response["headers"]
+            if header["name"].lower() not in SKIPPED_REPLAY_HEADERS
+        }
+        await route.fulfill(status=response["status"], headers=headers, body=body)
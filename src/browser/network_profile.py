@@ -0,0 +1,236 @@
+import base64
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse
+from playwright.async_api import BrowserContext, Page as PlaywrightPage, Route
+from ..utils.logger import logger
+from config.settings import config
+
+# Rough transfer sizes used to estimate what a blocked request would have cost
+DEFAULT_ESTIMATED_BYTES = {
+    "image": 40000,
+    "media": 500000,
+    "font": 35000,
+    "script": 60000,
+    "stylesheet": 30000,
+    "xhr": 5000,
+    "fetch": 5000,
+    "other": 10000
+}
+
+# CDP names of Playwright resource types that are not simply capitalized
+CDP_RESOURCE_TYPES = {
+    "xhr": "XHR",
+    "eventsource": "EventSource",
+    "websocket": "WebSocket",
+    "texttrack": "TextTrack",
+    "cspviolationreport": "CSPViolationReport",
+    "signedexchange": "SignedExchange"
+}
+
+STUB_CONTENT_TYPES = {
+    "script": "application/javascript",
+    "stylesheet": "text/css",
+    "xhr": "application/json",
+    "fetch": "application/json"
+}
+
+@dataclass
+class NetworkProfile:
+    name: str
+    block_resource_types: List[str] = field(default_factory=list)
+    stub_resource_types: List[str] = field(default_factory=list)
+    block_domains: List[str] = field(default_factory=list)
+    stub_domains: List[str] = field(default_factory=list)
+    estimated_bytes: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_ESTIMATED_BYTES))
+
+    @classmethod
+    def from_config(cls, name: Optional[str] = None) -> 'NetworkProfile':
+        """Load a named profile from network_profiles, defaulting to network.profile"""
+        name = name or config.get('network.profile', 'none')
+        profile_config = config.get('network_profiles', {}).get(name, {}) or {}
+        estimated_bytes = dict(DEFAULT_ESTIMATED_BYTES)
+        estimated_bytes.update(profile_config.get('estimated_bytes', {}))
+        return cls(
+            name=name,
+            block_resource_types=profile_config.get('block_resource_types', []),
+            stub_resource_types=profile_config.get('stub_resource_types', []),
+            block_domains=profile_config.get('block_domains', []),
+            stub_domains=profile_config.get('stub_domains', []),
+            estimated_bytes=estimated_bytes
+        )
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self.block_resource_types or self.stub_resource_types or self.block_domains or self.stub_domains)
+
+class ResourceBlocker:
+    """Intercepts the requests a network profile blocks or stubs and counts what it saved
+
+    Chromium pages get CDP Fetch interception limited to the profile's resource types and
+    domains, which leaves the HTTP cache of warm contexts working. Playwright routing turns
+    that cache off for the whole context, so routing every request is only the fallback.
+    """
+
+    def __init__(self, profile: Optional[NetworkProfile] = None):
+        self.profile = profile or NetworkProfile.from_config()
+        self._cdp = None
+        self._page: Optional[PlaywrightPage] = None
+        self._routed = False
+        self.reset()
+
+    def reset(self):
+        """Start a new per-run tally"""
+        self.requests_seen = 0
+        self.requests_allowed = 0
+        self.requests_blocked = 0
+        self.requests_stubbed = 0
+        self.bytes_saved_estimate = 0
+        self.saved_by_type: Dict[str, int] = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests and estimated bytes saved since the last reset"""
+        saved = self.requests_blocked + self.requests_stubbed
+        # Under CDP interception allowed requests never reach the handler, so they are counted from page events
+        allowed = self.requests_allowed if self._routed else max(self.requests_seen - saved, 0)
+        return {
+            "profile": self.profile.name,
+            "interception": "route" if self._routed else "cdp",
+            "requests_allowed": allowed,
+            "requests_blocked": self.requests_blocked,
+            "requests_stubbed": self.requests_stubbed,
+            "requests_saved": self.requests_blocked + self.requests_stubbed,
+            "bytes_saved_estimate": self.bytes_saved_estimate,
+            "saved_by_type": dict(self.saved_by_type)
+        }
+
+    def fetch_patterns(self) -> List[Dict[str, str]]:
+        """CDP Fetch patterns matching only the requests the profile blocks or stubs"""
+        patterns = []
+        for resource_type in self.profile.block_resource_types + self.profile.stub_resource_types:
+            cdp_type = CDP_RESOURCE_TYPES.get(resource_type, resource_type.capitalize())
+            patterns.append({"urlPattern": "*", "resourceType": cdp_type, "requestStage": "Request"})
+        for domain in self.profile.block_domains + self.profile.stub_domains:
+            patterns.append({"urlPattern": f"*://{domain}/*", "requestStage": "Request"})
+            patterns.append({"urlPattern": f"*://*.{domain}/*", "requestStage": "Request"})
+        return patterns
+
+    async def install(self, context: BrowserContext, page: Optional[PlaywrightPage] = None):
+        """Intercept the profile's requests on the page (the context's first page by default)"""
+        if not self.profile.is_active:
+            return
+        page = page or (context.pages[0] if context.pages else None)
+        if page is not None:
+            try:
+                cdp = await context.new_cdp_session(page)
+                cdp.on("Fetch.requestPaused", self._on_request_paused)
+                await cdp.send("Fetch.enable", {"patterns": self.fetch_patterns()})
+                page.on("request", self._on_request)
+                self._cdp, self._page = cdp, page
+                logger.info(f"Network profile '{self.profile.name}' installed")
+                return
+            except Exception as e:
+                logger.debug(f"CDP interception unavailable, routing every request instead: {e}")
+
+        await context.route("**/*", self._handle)
+        self._routed = True
+        logger.info(f"Network profile '{self.profile.name}' installed through routing (HTTP cache disabled)")
+
+    async def uninstall(self, context: BrowserContext):
+        if self._cdp is not None:
+            self._page.remove_listener("request", self._on_request)
+            await self._cdp.send("Fetch.disable")
+            await self._cdp.detach()
+            self._cdp = self._page = None
+        if self._routed:
+            await context.unroute("**/*", self._handle)
+            self._routed = False
+
+    def decide(self, url: str, resource_type: str) -> str:
+        """Return 'block', 'stub' or 'allow' for a request"""
+        host = urlparse(url).hostname or ""
+        if resource_type in self.profile.block_resource_types or self._domain_in(host, self.profile.block_domains):
+            return "block"
+        if resource_type in self.profile.stub_resource_types or self._domain_in(host, self.profile.stub_domains):
+            return "stub"
+        return "allow"
+
+    def _on_request(self, request):
+        self.requests_seen += 1
+
+    async def _on_request_paused(self, event: Dict[str, Any]):
+        request_id = event["requestId"]
+        url = event["request"]["url"]
+        resource_type = event.get("resourceType", "Other").lower()
+        decision = self.decide(url, resource_type)
+
+        try:
+            if decision == "allow":
+                await self._cdp.send("Fetch.continueRequest", {"requestId": request_id})
+                return
+
+            self._count_saved(resource_type)
+            if decision == "block":
+                self.requests_blocked += 1
+                await self._cdp.send("Fetch.failRequest", {"requestId": request_id, "errorReason": "BlockedByClient"})
+            else:
+                self.requests_stubbed += 1
+                content_type = STUB_CONTENT_TYPES.get(resource_type, "text/plain")
+                body = "{}" if content_type == "application/json" else ""
+                await self._cdp.send("Fetch.fulfillRequest", {
+                    "requestId": request_id,
+                    "responseCode": 200,
+                    "responseHeaders": [{"name": "Content-Type", "value": content_type}],
+                    "body": base64.b64encode(body.encode()).decode("ascii")
+                })
+        except Exception as e:
+            # The page may have navigated away while the request was paused
+            logger.debug(f"Network profile could not handle {url}: {e}")
+
+    async def _handle(self, route: Route):
+        request = route.request
+        decision = self.decide(request.url, request.resource_type)
+
+        try:
+            if decision == "allow":
+                self.requests_allowed += 1
+                await route.fallback()
+                return
+
+            self._count_saved(request.resource_type)
+            if decision == "block":
+                self.requests_blocked += 1
+                await route.abort("blockedbyclient")
+            else:
+                self.requests_stubbed += 1
+                content_type = STUB_CONTENT_TYPES.get(request.resource_type, "text/plain")
+                body = "{}" if content_type == "application/json" else ""
+                await route.fulfill(status=200, content_type=content_type, body=body)
+        except Exception as e:
+            # The page may have navigated away while the request was routed
+            logger.debug(f"Network profile could not handle {request.url}: {e}")
+
+    def _count_saved(self, resource_type: str):
+        estimate = self.profile.estimated_bytes.get(resource_type, self.profile.estimated_bytes.get("other", 0))
+        self.bytes_saved_estimate += estimate
+        self.saved_by_type[resource_type] = self.saved_by_type.get(resource_type, 0) + 1
+
+    @staticmethod
+    def _domain_in(host: str, domains: List[str]) -> bool:
+        return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+async def install_on_browser_use_agent(agent, component) -> bool:
+    """Best-effort install of a ResourceBlocker, DomPruner or anything else with an async
+    install(context) on a browser-use Agent's Playwright context; returns False if not reachable
+    """
+    browser_context = getattr(agent, 'browser_context', None)
+    if browser_context is None or not hasattr(browser_context, 'get_session'):
+        return False
+
+    try:
+        session = await browser_context.get_session()
+        await component.install(session.context)
+        return True
+    except Exception as e:
+        logger.debug(f"Could not install {type(component).__name__} on browser-use context: {e}")
+        return False
@@ -0,0 +1,269 @@
+import asyncio
+from typing import List, Optional, Dict, Any
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page as PlaywrightPage
+from .network_profile import NetworkProfile, ResourceBlocker
+from .har import HarReplayer
+from .session_store import SessionStore
+from ..utils.logger import logger
+from config.settings import config
+
+# Chromium flags shared by every browser launched for cart runs
+BROWSER_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor'
+]
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+class ContextLease:
+    """A warm BrowserContext and page lent to one agent at a time"""
+
+    def __init__(self, browser: Browser, context: BrowserContext, page: PlaywrightPage, network: Optional[ResourceBlocker] = None):
+        self.browser = browser
+        self.context = context
+        self.page = page
+        self.network = network
+        self.uses = 0
+        self.crashed = False
+        self.timeout: Optional[int] = None
+        # Account whose session this context carries; None for anonymous contexts
+        self.account: Optional[str] = None
+        # Only a restored session or a confirmed sign-in is saved back; anonymous cookies never become the account's session
+        self.signed_in = False
+        page.on("crash", self._on_crash)
+
+    def _on_crash(self, *args):
+        self.crashed = True
+
+    def apply_timeout(self, timeout: int):
+        """Apply the configured default timeouts if they changed since this context last ran"""
+        if timeout != self.timeout:
+            self.context.set_default_timeout(timeout)
+            self.context.set_default_navigation_timeout(timeout)
+            self.timeout = timeout
+
+    def is_healthy(self) -> bool:
+        """Check the lease can still be handed out"""
+        return not self.crashed and self.browser.is_connected() and not self.page.is_closed()
+
+class BrowserPool:
+    """Keeps browsers and pre-configured contexts warm and leases them to agents"""
+
+    def __init__(self, size: Optional[int] = None, warm_contexts: Optional[int] = None, max_context_uses: Optional[int] = None):
+        pool_config = config.get('pool', {})
+        self.size = size or pool_config.get('browsers', 1)
+        self.warm_contexts = warm_contexts if warm_contexts is not None else pool_config.get('warm_contexts', 1)
+        self.max_context_uses = max_context_uses or pool_config.get('max_context_uses', 20)
+        # "live", "record" (agents capture a HAR) or "replay" (serve a HAR from disk)
+        self.network_mode = config.get('network.mode', 'live')
+        self.replayer = HarReplayer.from_config() if self.network_mode == "replay" else None
+        self.sessions = SessionStore()
+        self.default_account = config.get('sessions.account')
+        self.playwright = None
+        self.browsers: List[Browser] = []
+        self._idle: List[ContextLease] = []
+        self._leased: List[ContextLease] = []
+        self._next_browser = 0
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        """Launch the browsers and pre-create warm contexts"""
+        self.playwright = await async_playwright().start()
+
+        for _ in range(self.size):
+            self.browsers.append(await self._launch_browser())
+
+        for i in range(self.warm_contexts * self.size):
+            self._idle.append(await self._new_lease(self.browsers[i % self.size], self.default_account))
+
+        logger.info(f"Browser pool started with {self.size} browsers and {len(self._idle)} warm contexts")
+
+    async def close(self):
+        """Close every context and browser owned by the pool"""
+        try:
+            for lease in self._idle + self._leased:
+                await self._discard(lease)
+            self._idle = []
+            self._leased = []
+            for browser in self.browsers:
+                if browser.is_connected():
+                    await browser.close()
+            self.browsers = []
+            if self.playwright:
+                await self.playwright.stop()
+                self.playwright = None
+            logger.info("Browser pool closed")
+        except Exception as e:
+            logger.warning(f"Error during browser pool cleanup: {e}")
+
+    async def acquire(self, account: Optional[str] = None) -> ContextLease:
+        """Lease a warm context signed in as the account, creating one if none is idle"""
+        account = account or self.default_account
+        async with self._lock:
+            await self._health_check()
+
+            profile = NetworkProfile.from_config()
+            lease = self._take_idle(account)
+            if lease is not None and lease.network.profile != profile:
+                # Routes are installed per context, so a reloaded network profile needs a fresh one
+                await self._discard(lease)
+                lease = await self._new_lease(self._pick_browser(), account, profile)
+            elif lease is None:
+                if self._idle:
+                    # Sessions cannot be swapped inside a context; replace one of another account
+                    await self._discard(self._idle.pop(0))
+                lease = await self._new_lease(self._pick_browser(), account, profile)
+            lease.uses += 1
+            lease.network.reset()
+            if self.replayer:
+                self.replayer.reset(lease.context)
+            # Hot-reloaded timeouts reach warm contexts without restarting their browser
+            lease.apply_timeout(config.settings.browser.timeout)
+            self._leased.append(lease)
+            return lease
+
+    async def release(self, lease: ContextLease, crashed: bool = False):
+        """Return a lease, recycling its context after max uses or a crash"""
+        async with self._lock:
+            if lease in self._leased:
+                self._leased.remove(lease)
+
+            await self._save_session(lease)
+
+            if crashed or not lease.is_healthy() or lease.uses >= self.max_context_uses:
+                reason = "crash" if crashed or lease.crashed else f"{lease.uses} uses"
+                logger.info(f"Recycling browser context after {reason}")
+                await self._discard(lease)
+                return
+
+            try:
+                if lease.account is None:
+                    # Only account contexts keep state between jobs, on purpose; anonymous jobs stay isolated
+                    await self._clear_state(lease)
+                # Reset the page so the next agent starts from a blank tab
+                await lease.page.goto("about:blank")
+                self._idle.append(lease)
+            except Exception as e:
+                logger.warning(f"Could not reset leased page, recycling context: {e}")
+                await self._discard(lease)
+
+    def invalidate_session(self, lease: ContextLease):
+        """The site asked for sign-in: drop the stored session until the account signs in again"""
+        lease.signed_in = False
+        if lease.account:
+            self.sessions.invalidate(lease.account)
+
+    def mark_signed_in(self, lease: ContextLease):
+        """The account signed in on this context; its new session is saved on release"""
+        lease.signed_in = True
+
+    async def _save_session(self, lease: ContextLease):
+        """Store the context's cookies and local storage, picking up rotated session tokens"""
+        if not lease.account or not lease.signed_in or lease.crashed or not self.sessions.enabled:
+            return
+        try:
+            self.sessions.save(lease.account, await lease.context.storage_state())
+        except Exception as e:
+            logger.warning(f"Could not read session state for account {self.sessions.account_id(lease.account)}: {e}")
+
+    async def _clear_state(self, lease: ContextLease):
+        """Drop the cookies, web storage and IndexedDB a job left in a context"""
+        if not lease.page.url.startswith("about:"):
+            # sessionStorage lives with the tab, so it survives the reset to about:blank
+            await lease.page.evaluate("() => { try { sessionStorage.clear(); localStorage.clear(); } catch (e) {} }")
+        state = await lease.context.storage_state()
+        if state.get('origins'):
+            cdp = await lease.context.new_cdp_session(lease.page)
+            try:
+                for origin in state['origins']:
+                    await cdp.send("Storage.clearDataForOrigin", {
+                        "origin": origin['origin'],
+                        "storageTypes": "local_storage,indexeddb,cache_storage,service_workers"
+                    })
+            finally:
+                await cdp.detach()
+        await lease.context.clear_cookies()
+
+    def _take_idle(self, account: Optional[str]) -> Optional[ContextLease]:
+        for lease in reversed(self._idle):
+            if lease.account == account:
+                self._idle.remove(lease)
+                return lease
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Current pool occupancy"""
+        return {
+            "browsers": len(self.browsers),
+            "idle_contexts": len(self._idle),
+            "leased_contexts": len(self._leased)
+        }
+
+    async def _health_check(self):
+        """Relaunch disconnected browsers and drop idle contexts that are no longer usable"""
+        for i, browser in enumerate(self.browsers):
+            if not browser.is_connected():
+                logger.warning(f"Browser {i} disconnected, relaunching")
+                self.browsers[i] = await self._launch_browser()
+
+        healthy = []
+        for lease in self._idle:
+            if lease.is_healthy():
+                healthy.append(lease)
+            else:
+                await self._discard(lease)
+        self._idle = healthy
+
+    async def _launch_browser(self) -> Browser:
+        # Read at launch, so a reload applies to browsers relaunched after it
+        return await self.playwright.chromium.launch(
+            headless=config.settings.browser.headless,
+            slow_mo=config.get('pool.slow_mo', 0),
+            args=BROWSER_ARGS
+        )
+
+    def _pick_browser(self) -> Browser:
+        """Spread new contexts round-robin across the browsers"""
+        browser = self.browsers[self._next_browser % len(self.browsers)]
+        self._next_browser += 1
+        return browser
+
+    async def _new_lease(self, browser: Browser, account: Optional[str] = None, profile: Optional[NetworkProfile] = None) -> ContextLease:
+        """Create a context with viewport, headers, timeouts and the account's stored session configured once"""
+        browser_settings = config.settings.browser
+        storage_state = self.sessions.load(account) if account else None
+        context = await browser.new_context(
+            viewport={
+                'width': browser_settings.viewport_width,
+                'height': browser_settings.viewport_height
+            },
+            user_agent=USER_AGENT,
+            storage_state=storage_state
+        )
+
+        # Replayed runs are offline, so routing every request (which turns off the HTTP cache) costs nothing there
+        if self.replayer:
+            await self.replayer.install(context)
+
+        page = await context.new_page()
+
+        # Block or stub resources the cart run does not need
+        network = ResourceBlocker(profile or NetworkProfile.from_config())
+        await network.install(context, page)
+
+        lease = ContextLease(browser, context, page, network)
+        lease.account = account
+        lease.signed_in = storage_state is not None
+        lease.apply_timeout(browser_settings.timeout)
+        return lease
+
+    async def _discard(self, lease: ContextLease):
+        if self.replayer:
+            self.replayer.forget(lease.context)
+        try:
+            await lease.context.close()
+        except Exception as e:
+            logger.debug(f"Error closing browser context: {e}")
@@ -0,0 +1,125 @@
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional
+from ..utils.logger import logger
+from config.settings import config
+
+class SessionStore:
+    """Per-account Playwright storage_state (cookies and local storage), encrypted at rest with Fernet"""
+
+    def __init__(self, directory: Optional[str] = None, key_env: Optional[str] = None, max_age_hours: Optional[float] = None):
+        sessions_config = config.get('sessions', {})
+        self.directory = Path(directory or sessions_config.get('directory', '.cache/sessions'))
+        self.key_env = key_env or sessions_config.get('key_env', 'CART_SESSION_KEY')
+        max_age_hours = max_age_hours if max_age_hours is not None else sessions_config.get('max_age_hours', 72)
+        self.max_age = int(max_age_hours * 3600) if max_age_hours else None
+        self._fernet = None
+        self._digests: Dict[str, str] = {}
+        self._warned = False
+
+    @property
+    def enabled(self) -> bool:
+        return self._cipher() is not None
+
+    def _cipher(self):
+        """Fernet built from the key in the environment; None disables the store"""
+        if self._fernet is None:
+            key = os.getenv(self.key_env)
+            if not key:
+                if not self._warned:
+                    logger.warning(f"{self.key_env} not set, sessions will not be saved between runs")
+                    self._warned = True
+                return None
+            from cryptography.fernet import Fernet  # Only needed when sessions are in use
+            self._fernet = Fernet(key.encode())
+        return self._fernet
+
+    @staticmethod
+    def account_id(account: str) -> str:
+        """Hashed account name used in file names and logs, so e-mail addresses never reach the disk"""
+        return hashlib.sha256(account.encode()).hexdigest()[:16]
+
+    def path(self, account: str) -> Path:
+        return self.directory / f"{self.account_id(account)}.session"
+
+    def load(self, account: str) -> Optional[Dict[str, Any]]:
+        """Decrypted storage_state of an account, or None when missing, expired or unreadable"""
+        cipher = self._cipher()
+        path = self.path(account)
+        if cipher is None or not path.exists():
+            return None
+
+        from cryptography.fernet import InvalidToken
+        try:
+            # Fernet tokens carry their creation time, so the TTL also covers copied files
+            plaintext = cipher.decrypt(path.read_bytes(), ttl=self.max_age)
+        except InvalidToken:
+            logger.info(f"Stored session for account {self.account_id(account)} expired or was encrypted with another key, discarding it")
+            self.invalidate(account)
+            return None
+        except OSError as e:
+            logger.warning(f"Could not read session for account {self.account_id(account)}: {e}")
+            return None
+
+        self._digests[account] = hashlib.sha256(plaintext).hexdigest()
+        logger.info(f"Restored session for account {self.account_id(account)}")
+        return json.loads(plaintext)
+
+    def save(self, account: str, state: Dict[str, Any]) -> bool:
+        """Encrypt and store the state; unchanged states are not rewritten"""
+        cipher = self._cipher()
+        if cipher is None:
+            return False
+
+        plaintext = json.dumps(state, sort_keys=True).encode()
+        digest = hashlib.sha256(plaintext).hexdigest()
+        if self._digests.get(account) == digest and self.path(account).exists():
+            return False
+
+        path = self.path(account)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            # Owner-only from creation, so the token is never world-readable
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(cipher.encrypt(plaintext))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not save session for account {self.account_id(account)}: {e}")
+            return False
+
+        self._digests[account] = digest
+        logger.info(f"Saved session for account {self.account_id(account)} ({len(state.get('cookies', []))} cookies)")
+        return True
+
+    def invalidate(self, account: str):
+        """Forget an account's session, e.g. after the site asked it to sign in again"""
+        self._digests.pop(account, None)
+        try:
+            self.path(account).unlink()
+            logger.info(f"Invalidated stored session for account {self.account_id(account)}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove session for account {self.account_id(account)}: {e}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage encrypted browser sessions")
+    parser.add_argument("--generate-key", action="store_true", help="Print a new key for the session key variable")
+    parser.add_argument("--forget", metavar="ACCOUNT", help="Delete the stored session of an account")
+    args = parser.parse_args(argv)
+
+    if args.generate_key:
+        from cryptography.fernet import Fernet
+        print(Fernet.generate_key().decode())
+    elif args.forget:
+        SessionStore().invalidate(args.forget)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
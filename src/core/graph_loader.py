@@ -0,0 +1,203 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+from .models import Page, PageElement, Action, ElementType, ActionType
+from .page_graph import PageGraph
+from ..navigation.selectors import selector_registry
+from ..utils.logger import logger
+from config.settings import config
+
+# Bump when the compiled layout changes so old caches are ignored
+COMPILED_FORMAT = 1
+
+GRAPH_SUFFIXES = (".yaml", ".yml", ".json")
+
+class GraphDefinitionError(ValueError):
+    """A page graph file that does not describe a valid graph"""
+
+    def __init__(self, path: Path, problems: List[str]):
+        self.path = path
+        self.problems = problems
+        super().__init__(f"{path}: " + "; ".join(problems))
+
+def _require(data: Dict[str, Any], key: str, where: str, problems: List[str]) -> Any:
+    value = data.get(key) if isinstance(data, dict) else None
+    if value in (None, "", []):
+        problems.append(f"{where}: missing '{key}'")
+    return value
+
+def compile_definition(path: Path, definition: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a parsed graph file and normalize it into the compiled layout"""
+    problems: List[str] = []
+    element_types = {t.value for t in ElementType}
+    action_types = {t.value for t in ActionType}
+    pages = []
+    page_ids = set()
+
+    for page_index, page in enumerate(_require(definition, 'pages', 'graph', problems) or []):
+        page_id = _require(page, 'id', f"pages[{page_index}]", problems)
+        where = f"page '{page_id or page_index}'"
+        if page_id in page_ids:
+            problems.append(f"{where}: duplicate page id")
+        page_ids.add(page_id)
+
+        elements = []
+        for element in page.get('elements', []) if isinstance(page, dict) else []:
+            element_id = _require(element, 'id', where, problems)
+            element_where = f"{where} element '{element_id}'"
+            if element.get('type') not in element_types:
+                problems.append(f"{element_where}: type must be one of {sorted(element_types)}")
+            selector_set = element.get('selector_set')
+            selectors = element.get('selectors')
+            if selector_set and not selector_registry.get(selector_set):
+                problems.append(f"{element_where}: unknown selector_set '{selector_set}'")
+            elif not selector_set and not (isinstance(selectors, list) and selectors):
+                problems.append(f"{element_where}: needs selector_set or a non-empty selectors list")
+            elements.append({
+                'id': element_id,
+                'type': element.get('type'),
+                'selector_set': selector_set,
+                'selectors': list(selectors or []),
+                'description': element.get('description', element_id)
+            })
+
+        element_ids = {element['id'] for element in elements}
+        actions = []
+        for action in page.get('actions', []) if isinstance(page, dict) else []:
+            element_id = _require(action, 'element', f"{where} action", problems)
+            target = _require(action, 'target', f"{where} action", problems)
+            if element_id and element_id not in element_ids:
+                problems.append(f"{where} action: unknown element '{element_id}'")
+            if action.get('type', 'click') not in action_types:
+                problems.append(f"{where} action: type must be one of {sorted(action_types)}")
+            actions.append({
+                'element': element_id,
+                'type': action.get('type', 'click'),
+                'target': target,
+                'description': action.get('description', f"Go to {target}"),
+                'parameters': action.get('parameters')
+            })
+
+        pages.append({
+            'id': page_id,
+            'url': _require(page, 'url', where, problems),
+            'description': page.get('description', page_id) if isinstance(page, dict) else '',
+            'elements': elements,
+            'actions': actions
+        })
+
+    if problems:
+        raise GraphDefinitionError(path, problems)
+    return {'format': COMPILED_FORMAT, 'site': definition.get('site', path.stem), 'pages': pages}
+
+def build_graph(compiled: Dict[str, Any]) -> PageGraph:
+    """Turn a compiled definition into a PageGraph; selector-set elements keep following the registry"""
+    graph = PageGraph()
+    for page in compiled['pages']:
+        elements = []
+        for element in page['elements']:
+            selectors = selector_registry.get(element['selector_set']) if element['selector_set'] else element['selectors']
+            elements.append(PageElement(
+                id=element['id'],
+                type=ElementType(element['type']),
+                selector=selectors[0],
+                description=element['description'],
+                fallback_selectors=selectors[1:],
+                selector_set=element['selector_set']
+            ))
+        actions = [
+            Action(action['element'], ActionType(action['type']), action['target'], action['description'], action['parameters'])
+            for action in page['actions']
+        ]
+        graph.add_page(Page(page['id'], page['url'], page['description'], elements, actions))
+
+    # Make the element fallbacks resolvable by name through the shared registry
+    selector_registry.register_graph(graph)
+    return graph
+
+class GraphLibrary:
+    """Page graphs defined in config/graphs, compiled once into a hash-keyed cache and loaded per site on demand"""
+
+    def __init__(self, directory: Optional[str] = None, cache_dir: Optional[str] = None):
+        graphs_config = config.get('graphs', {})
+        self.directory = Path(directory or graphs_config.get('directory') or Path(config.config_path).parent / "graphs")
+        self.cache_dir = Path(cache_dir or graphs_config.get('cache_dir', '.cache/graphs'))
+        self._graphs: Dict[str, PageGraph] = {}
+
+    def sites(self) -> List[str]:
+        """Sites with a graph file, without loading any of them"""
+        return sorted(path.stem for path in self.directory.iterdir() if path.suffix in GRAPH_SUFFIXES)
+
+    def get(self, site: str) -> PageGraph:
+        """The graph of a site, compiled or read from cache the first time it is asked for"""
+        graph = self._graphs.get(site)
+        if graph is None:
+            graph = self._graphs[site] = build_graph(self.load_compiled(site))
+        return graph
+
+    def load_compiled(self, site: str) -> Dict[str, Any]:
+        path = self._source(site)
+        source = path.read_bytes()
+        digest = hashlib.sha256(source + f"format={COMPILED_FORMAT}".encode()).hexdigest()[:16]
+        cache_path = self.cache_dir / f"{site}-{digest}.pickle"
+
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Recompiling {site} graph, cache {cache_path} unreadable: {e}")
+
+        compiled = compile_definition(path, self._parse(path, source))
+        self._write_cache(site, cache_path, compiled)
+        logger.info(f"Compiled {site} page graph ({len(compiled['pages'])} pages) to {cache_path}")
+        return compiled
+
+    def _source(self, site: str) -> Path:
+        for suffix in GRAPH_SUFFIXES:
+            path = self.directory / f"{site}{suffix}"
+            if path.exists():
+                return path
+        raise KeyError(f"No page graph for site '{site}' in {self.directory}")
+
+    @staticmethod
+    def _parse(path: Path, source: bytes) -> Dict[str, Any]:
+        if path.suffix == ".json":
+            return json.loads(source)
+        import yaml  # Only needed on a cache miss
+        return yaml.safe_load(source)
+
+    def _write_cache(self, site: str, cache_path: Path, compiled: Dict[str, Any]):
+        """Write atomically and drop caches of older versions of the same file"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+            for stale in self.cache_dir.glob(f"{site}-*.pickle"):
+                if stale != cache_path:
+                    stale.unlink()
+        except OSError as e:
+            logger.warning(f"Could not cache compiled {site} graph: {e}")
+
+# Shared library; nothing is read until a site is requested
+graph_library = GraphLibrary()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate and compile page graph files")
+    parser.add_argument("sites", nargs="*", help="Sites to compile (default: every graph file)")
+    args = parser.parse_args(argv)
+
+    library = GraphLibrary()
+    for site in args.sites or library.sites():
+        graph = library.get(site)
+        print(f" {site}: {len(graph.pages)} pages OK")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, field
 from typing import List, Optional, Dict, Any
 from enum import Enum
+from ..navigation.selectors import selector_registry
 
 class ElementType(Enum):
     BUTTON = "button"
@@ -9,6 +10,7 @@ class ElementType(Enum):
     LINK = "link"
     FORM = "form"
     IMAGE = "image"
+    TEXT = "text"
 
 class ActionType(Enum):
     CLICK = "click"
@@ -24,6 +26,17 @@ class PageElement:
     selector: str
     description: str
     fallback_selectors: Optional[List[str]] = None
+    # Named registry list the selectors come from; read on every access so reloaded profiles apply
+    selector_set: Optional[str] = None
+    
+    @property
+    def selectors(self) -> List[str]:
+        """Primary selector followed by its fallbacks"""
+        if self.selector_set:
+            resolved = selector_registry.get(self.selector_set)
+            if resolved:
+                return resolved
+        return [self.selector] + list(self.fallback_selectors or [])
     
 @dataclass
 class Action:
@@ -51,10 +64,79 @@ class CartItem:
     def total_price(self) -> float:
         return self.price * self.quantity
 
+@dataclass
+class TraceSpan:
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    start_ms: float  # Milliseconds since the epoch, so spans of different runs line up
+    duration_ms: float = 0.0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
 @dataclass
 class TaskResult:
     success: bool
     message: str
     data: Optional[Dict[str, Any]] = None
     cart_items: Optional[List[CartItem]] = None
-    total: Optional[float] = None
\ No newline at end of file
+    total: Optional[float] = None
+    spans: Optional[List[TraceSpan]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+@dataclass
+class AuditJob:
+    job_id: str
+    price_threshold: float = 100.0
+    goal: Optional[str] = None
+    site: str = "amazon"
+    agent_mode: str = "manual"
+    # Account whose stored session to start from; None uses sessions.account
+    account: Optional[str] = None
+    # Higher priorities leave the service queue first
+    priority: int = 0
+    
+@dataclass
+class ServiceJob:
+    job: AuditJob
+    submitted_at: float
+    status: str = "queued"  # queued, running, done or failed
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[TaskResult] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job.job_id,
+            "status": self.status,
+            "agent_mode": self.job.agent_mode,
+            "priority": self.job.priority,
+            "queued_seconds": round((self.started_at or self.finished_at or self.submitted_at) - self.submitted_at, 3),
+            "run_seconds": round(self.finished_at - self.started_at, 3) if self.finished_at and self.started_at else None,
+            "result": self.result.to_dict() if self.result else None
+        }
+
+@dataclass
+class AuditReport:
+    results: List[TaskResult]
+    elapsed_seconds: float
+    concurrency: int
+    
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for result in self.results if result.success)
+    
+    @property
+    def failed(self) -> int:
+        return len(self.results) - self.succeeded
+    
+    @property
+    def jobs_per_hour(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return len(self.results) * 3600.0 / self.elapsed_seconds
@@ -1,107 +1,205 @@
+import heapq
+import json
+import os
+from pathlib import Path
 from typing import Dict, List, Optional
-from .models import Page, PageElement, Action, ElementType, ActionType
+from urllib.parse import urlsplit
+from .models import Page, Action
+from ..utils.logger import logger
+from config.settings import config
+
+class EdgeStats:
+    """Learned latency and failure rate of one transition, as exponentially weighted averages"""
+    
+    def __init__(self, latency_ms: float, failure_rate: float = 0.0, samples: int = 0):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.samples = samples
+    
+    def observe(self, elapsed_ms: float, success: bool, latency_alpha: float, failure_alpha: float):
+        if success:
+            # Failed attempts time out, so only successful ones say how slow the transition is
+            self.latency_ms += latency_alpha * (elapsed_ms - self.latency_ms)
+        self.failure_rate += failure_alpha * ((0.0 if success else 1.0) - self.failure_rate)
+        self.samples += 1
+    
+    def cost(self) -> float:
+        """Expected time to get through, counting retries after failures"""
+        return self.latency_ms / max(1.0 - self.failure_rate, 0.05)
 
 class PageGraph:
+    """Pages and transitions, with cached weighted next-hop tables for routing"""
+    
     def __init__(self):
+        routing_config = config.get('routing', {})
         self.pages: Dict[str, Page] = {}
         self.current_page: Optional[str] = None
+        self.default_latency_ms = routing_config.get('default_latency_ms', 1000)
+        self.latency_alpha = routing_config.get('latency_alpha', 0.3)
+        self.failure_alpha = routing_config.get('failure_alpha', 0.2)
+        # Relative cost change that makes cached routes stale
+        self.recompute_threshold = routing_config.get('recompute_threshold', 0.1)
+        self.stats_path = routing_config.get('stats_path', '.cache/route_stats.json')
+        self._incoming: Dict[str, List[Action]] = {}
+        self._action_source: Dict[int, str] = {}
+        self._edge_stats: Dict[str, EdgeStats] = {}
+        self._next_hops: Dict[str, Dict[str, Action]] = {}
+        self._route_costs: Dict[str, float] = {}
     
     def add_page(self, page: Page):
         """Add a page to the graph"""
+        previous = self.pages.get(page.id)
+        if previous:
+            for action in previous.actions:
+                incoming = self._incoming[action.target_page]
+                incoming[:] = [other for other in incoming if other is not action]
+                del self._action_source[id(action)]
+        
         self.pages[page.id] = page
+        for action in page.actions:
+            self._incoming.setdefault(action.target_page, []).append(action)
+            self._action_source[id(action)] = page.id
+        self.invalidate_routes()
     
     def get_page(self, page_id: str) -> Optional[Page]:
         """Get a page by ID"""
         return self.pages.get(page_id)
     
+    def page_for_url(self, url: str) -> Optional[Page]:
+        """Match a browser URL to a graph page by path segments, preferring the longest match; the site root only matches itself"""
+        path = urlsplit(url).path.rstrip('/')
+        best, best_length = None, 0
+        for page in self.pages.values():
+            page_path = urlsplit(page.url).path.rstrip('/')
+            if page_path == path:
+                return page
+            # /gp/cart matches /gp/cart/view.html but not /gp/cartfoo
+            if page_path and path.startswith(page_path + '/') and len(page_path) > best_length:
+                best, best_length = page, len(page_path)
+        return best
+    
+    def copy(self) -> 'PageGraph':
+        """Independent graph over the same pages, with its own learned statistics and route caches"""
+        graph = PageGraph()
+        for page in self.pages.values():
+            graph.add_page(page)
+        graph._edge_stats = {key: EdgeStats(**vars(stats)) for key, stats in self._edge_stats.items()}
+        return graph
+    
     def get_actions_from_page(self, page_id: str) -> List[Action]:
         """Get all available actions from a page"""
         page = self.get_page(page_id)
         return page.actions if page else []
     
     def find_path(self, start_page: str, target_page: str) -> List[Action]:
-        """Find path between two pages using BFS"""
+        """Cheapest known path between two pages, following the cached next-hop table of the target"""
         if start_page == target_page:
             return []
-            
-        visited = set()
-        queue = [(start_page, [])]
         
-        while queue:
-            current, path = queue.pop(0)
-            if current in visited:
+        next_hops = self._next_hops.get(target_page)
+        if next_hops is None:
+            next_hops = self._build_next_hops(target_page)
+        
+        path = []
+        current = start_page
+        while current != target_page:
+            action = next_hops.get(current)
+            if action is None or len(path) > len(self.pages):
+                return []  # No path found
+            path.append(action)
+            current = action.target_page
+        return path
+    
+    def path_cost(self, path: List[Action]) -> float:
+        """Expected time in milliseconds to walk a path"""
+        return sum(self.edge_cost(action) for action in path)
+    
+    def edge_cost(self, action: Action) -> float:
+        stats = self._edge_stats.get(self._edge_key(action))
+        return stats.cost() if stats else float(self.default_latency_ms)
+    
+    def record_transition(self, action: Action, elapsed_ms: float, success: bool = True):
+        """Learn from one attempt at a transition; cached routes are dropped when its cost moved enough"""
+        key = self._edge_key(action)
+        stats = self._edge_stats.get(key)
+        if stats is None:
+            stats = self._edge_stats[key] = EdgeStats(float(self.default_latency_ms))
+        
+        old_cost = self._route_costs.get(key, stats.cost())
+        stats.observe(elapsed_ms, success, self.latency_alpha, self.failure_alpha)
+        if abs(stats.cost() - old_cost) > self.recompute_threshold * old_cost:
+            self.invalidate_routes()
+    
+    def invalidate_routes(self):
+        self._next_hops.clear()
+        self._route_costs.clear()
+    
+    def edge_stats(self) -> Dict[str, Dict[str, float]]:
+        """Learned statistics per transition, keyed by from_page:element:to_page"""
+        return {key: vars(stats).copy() for key, stats in self._edge_stats.items()}
+    
+    def load_edge_stats(self, path: Optional[str] = None):
+        """Restore learned transition statistics saved by an earlier run"""
+        stats_path = Path(path or self.stats_path)
+        if not stats_path.exists():
+            return
+        try:
+            with open(stats_path, 'r') as f:
+                data = json.load(f)
+            for key, values in data.items():
+                self._edge_stats[key] = EdgeStats(**values)
+            self.invalidate_routes()
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable route statistics at {stats_path}: {e}")
+    
+    def save_edge_stats(self, path: Optional[str] = None):
+        """Write learned transition statistics to disk atomically"""
+        stats_path = Path(path or self.stats_path)
+        try:
+            stats_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = stats_path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(self.edge_stats(), f, indent=2)
+            os.replace(tmp_path, stats_path)
+        except OSError as e:
+            logger.warning(f"Could not save route statistics to {stats_path}: {e}")
+    
+    def _edge_key(self, action: Action) -> str:
+        return f"{self._action_source.get(id(action), '?')}:{action.element_id}:{action.target_page}"
+    
+    def _build_next_hops(self, target_page: str) -> Dict[str, Action]:
+        """Dijkstra backwards from the target: for every page, the first action of its cheapest path there"""
+        distances = {target_page: 0.0}
+        next_hops: Dict[str, Action] = {}
+        heap = [(0.0, 0, target_page)]
+        counter = 1
+        
+        while heap:
+            distance, _, page_id = heapq.heappop(heap)
+            if distance > distances.get(page_id, float('inf')):
                 continue
-                
-            visited.add(current)
             
-            for action in self.get_actions_from_page(current):
-                new_path = path + [action]
-                if action.target_page == target_page:
-                    return new_path
-                queue.append((action.target_page, new_path))
+            for action in self._incoming.get(page_id, []):
+                key = self._edge_key(action)
+                cost = self.edge_cost(action)
+                self._route_costs[key] = cost
+                source = self._action_source[id(action)]
+                candidate = distance + cost
+                if candidate < distances.get(source, float('inf')):
+                    distances[source] = candidate
+                    next_hops[source] = action
+                    heapq.heappush(heap, (candidate, counter, source))
+                    counter += 1
         
-        return []  # No path found
+        self._next_hops[target_page] = next_hops
+        return next_hops
 
 class AmazonGraphBuilder:
     @staticmethod
     def build() -> PageGraph:
-        """Build Amazon-specific page graph"""
-        graph = PageGraph()
-        
-        # Homepage
-        homepage = Page(
-            id="homepage",
-            url="https://amazon.com",
-            description="Amazon homepage",
-            elements=[
-                PageElement(
-                    id="search_box",
-                    type=ElementType.TEXTBOX,
-                    selector="#twotabsearchtextbox",
-                    description="Main search box",
-                    fallback_selectors=["[data-cy='search-input']", ".nav-search-field input"]
-                ),
-                PageElement(
-                    id="cart_link",
-                    type=ElementType.LINK,
-                    selector="#nav-cart",
-                    description="Shopping cart link",
-                    fallback_selectors=["#nav-cart-count-container", ".nav-cart-icon"]
-                ),
-            ],
-            actions=[
-                Action("cart_link", ActionType.CLICK, "cart_page", "Go to shopping cart"),
-            ]
-        )
-        
-        # Cart page
-        cart_page = Page(
-            id="cart_page",
-            url="https://amazon.com/gp/cart/view.html",
-            description="Shopping cart page",
-            elements=[
-                PageElement(
-                    id="cart_items",
-                    type=ElementType.TABLE,
-                    selector="#sc-active-cart",
-                    description="Cart items container",
-                    fallback_selectors=[".sc-list-item", "[data-name='Active Items']"]
-                ),
-                PageElement(
-                    id="checkout_btn",
-                    type=ElementType.BUTTON,
-                    selector="input[name='proceedToRetailCheckout']",
-                    description="Proceed to checkout",
-                    fallback_selectors=["#sc-buy-box-ptc-button", ".sc-proceed-to-checkout button"]
-                ),
-            ],
-            actions=[
-                Action("checkout_btn", ActionType.CLICK, "checkout_page", "Proceed to checkout"),
-            ]
-        )
-        
-        # Add pages to graph
-        graph.add_page(homepage)
-        graph.add_page(cart_page)
-        
-        return graph
\ No newline at end of file
+        """Build Amazon-specific page graph from config/graphs/amazon.yaml
+
+        Returns a copy of the cached library graph, so statistics learned by the caller stay with it.
+        """
+        from .graph_loader import graph_library
+        return graph_library.get("amazon").copy()
@@ -1,14 +1,112 @@
-from playwright.async_api import Page as PlaywrightPage
-from typing import List, Dict, Any
-import re
-import asyncio
+from playwright.async_api import Page as PlaywrightPage, TimeoutError as PlaywrightTimeoutError
+from dataclasses import asdict
+from typing import List, Dict, Any, Optional, AsyncIterator
+from ..core.models import CartItem
+from .price_parser import parse_price, default_locale
+from ..navigation.readiness import PageReadiness, ReadinessTimeout
+from ..navigation.selectors import RegisteredSelectors
+from ..navigation.selector_engine import selector_engine
+from ..utils.logger import logger
+from ..utils.tracing import span, traced
+from config.settings import config
+
+# Walks the cart DOM with the fallback selector lists and returns a batch of rows starting at
+# args.start plus the subtotal candidates in one payload. Once a row selector has matched it is
+# pinned through args.itemSelector so later batches index the same rows. Price and total
+# candidates are returned as text so parsing stays in _parse_price.
+EXTRACT_CART_SCRIPT = """
+(args) => {
+    const text = (el) => (el && el.textContent ? el.textContent.trim() : '');
+    const safeQueryAll = (root, selector) => {
+        try { return Array.from(root.querySelectorAll(selector)); } catch (e) { return []; }
+    };
+    const safeQuery = (root, selector) => {
+        try { return root.querySelector(selector); } catch (e) { return null; }
+    };
+    const readQuantity = (row) => {
+        const attr = parseInt(row.getAttribute('data-quantity') || '', 10);
+        if (attr > 0) return attr;
+        for (const selector of args.quantitySelectors) {
+            const el = safeQuery(row, selector);
+            if (!el) continue;
+            const value = parseInt((el.value !== undefined && el.value !== '' ? el.value : text(el)).replace(/[^0-9]/g, ''), 10);
+            if (value > 0) return value;
+        }
+        return 1;
+    };
+
+    let rows = [];
+    let itemSelector = args.itemSelector || null;
+    if (itemSelector) {
+        rows = safeQueryAll(document, itemSelector);
+    } else {
+        for (const selector of args.itemSelectors) {
+            rows = safeQueryAll(document, selector);
+            if (rows.length) { itemSelector = selector; break; }
+        }
+    }
+
+    const items = rows.slice(args.start, args.start + args.limit).map((row) => {
+        let name = null;
+        for (const selector of args.nameSelectors) {
+            const value = text(safeQuery(row, selector));
+            if (value.length > 3) { name = value; break; }
+        }
+        const priceTexts = [];
+        for (const selector of args.priceSelectors) {
+            const value = text(safeQuery(row, selector));
+            if (value) priceTexts.push(value);
+        }
+        return {name, priceTexts, quantity: readQuantity(row)};
+    });
+
+    const totals = [];
+    for (const selector of args.totalSelectors) {
+        const value = text(safeQuery(document, selector));
+        if (value) totals.push({selector, text: value});
+    }
+
+    return {itemSelector, itemCount: rows.length, items, totals};
+}
+"""
+
+SCROLL_TO_LAST_ROW_SCRIPT = """
+(selector) => {
+    const rows = document.querySelectorAll(selector);
+    if (rows.length) rows[rows.length - 1].scrollIntoView({block: 'end'});
+    window.scrollTo(0, document.body.scrollHeight);
+}
+"""
 
 class CartExtractor:
     """Cart extractor for Amazon cart page"""
     
-    def __init__(self, page: PlaywrightPage):
+    # Fallback lists come from the shared selector registry
+    READY_SELECTORS = RegisteredSelectors("cart_ready")
+    EMPTY_SELECTORS = RegisteredSelectors("cart_empty")
+    ITEM_SELECTORS = RegisteredSelectors("cart_items")
+    NAME_SELECTORS = RegisteredSelectors("item_name")
+    PRICE_SELECTORS = RegisteredSelectors("item_price")
+    QUANTITY_SELECTORS = RegisteredSelectors("item_quantity")
+    TOTAL_SELECTORS = RegisteredSelectors("cart_total")
+    
+    SHOW_MORE_SELECTORS = RegisteredSelectors("cart_show_more")
+    
+    def __init__(self, page: PlaywrightPage, readiness: Optional[PageReadiness] = None, mode: Optional[str] = None):
+        extraction_config = config.get('extraction', {})
         self.page = page
+        self.readiness = readiness
+        self.batch_size = extraction_config.get('batch_size', 50)
+        self.load_more_timeout = extraction_config.get('load_more_timeout', 1500)
+        # Optional safety cap; None streams the whole cart
+        self.max_items = extraction_config.get('max_items')
+        # "script" extracts in one page.evaluate call, "element" queries element by element,
+        # "snapshot" parses page.content() with lxml
+        self.mode = mode or config.get('extraction.mode', 'script')
+        # Resolved once per extraction so per-row parsing never goes back to the settings
+        self.locale = default_locale()
     
+    @traced("extract")
     async def extract_cart_info(self, page: PlaywrightPage = None) -> Dict[str, Any]:
         """
         Extract cart information from the current page.
@@ -18,9 +116,13 @@ class CartExtractor:
             
         Returns:
             dict: Cart information including items and total
+            
+        Raises:
+            ReadinessTimeout: If neither cart contents nor an empty cart appear in time
         """
         # Use provided page or fallback to self.page
         current_page = page or self.page
+        self.locale = default_locale()
         
         cart_info = {
             'items': [],
@@ -28,60 +130,73 @@ class CartExtractor:
             'subtotal': 0.0,
             'item_count': 0
         }
+        if self.readiness and self.readiness.page is current_page:
+            readiness = self.readiness
+        else:
+            readiness = PageReadiness(current_page)
         
         try:
-            # Wait a moment for cart to load
-            await asyncio.sleep(3)
+            # Wait for the cart to render either with items or as empty. An empty cart still
+            # renders the #sc-active-cart container, so the empty markers take priority.
+            matched = await readiness.for_any_selector(self.EMPTY_SELECTORS + self.READY_SELECTORS)
+            if matched in self.EMPTY_SELECTORS:
+                return cart_info  # Return empty cart info
             
-            # Check if cart is empty
-            empty_selectors = [
-                "[data-name='empty-cart']",
-                ".sc-empty-cart",
-                "#sc-empty-cart",
-                "text=Your cart is empty",
-                "text=Your Shopping Cart is empty"
-            ]
+            # Let subtotal XHRs and late DOM updates inside the cart finish
+            await readiness.settle(root_selectors=self.READY_SELECTORS)
             
-            for selector in empty_selectors:
-                try:
-                    if await current_page.locator(selector).is_visible(timeout=3000):
-                        return cart_info  # Return empty cart info
-                except:
-                    continue
+            # The container can render before the empty-cart message fills it
+            if await selector_engine.resolve(current_page, self.EMPTY_SELECTORS, visible=True):
+                return cart_info
             
-            # Extract items
-            await self._extract_items(current_page, cart_info)
+            extracted = False
+            if self.mode == "snapshot":
+                # Parse the rendered HTML offline instead of querying the live DOM
+                from .html_extractor import HtmlSnapshotExtractor
+                with span("extract.snapshot"):
+                    cart_info.update(HtmlSnapshotExtractor(locale=self.locale).extract_cart_info(await current_page.content()))
+                extracted = True
+            elif self.mode == "script":
+                try:
+                    # Items and subtotal in one round trip
+                    await self._extract_in_page(current_page, cart_info)
+                    extracted = True
+                except Exception as e:
+                    logger.warning(f"In-page extraction failed, falling back to per-element extraction: {e}")
+                    cart_info.update(items=[], total=0.0, subtotal=0.0, item_count=0)
             
-            # Extract total/subtotal
-            await self._extract_totals(current_page, cart_info)
+            if not extracted:
+                # Extract items
+                await self._extract_items(current_page, cart_info)
+                
+                # Extract total/subtotal
+                await self._extract_totals(current_page, cart_info)
             
+        except ReadinessTimeout:
+            raise
         except Exception as e:
-            print(f"Error extracting cart info: {e}")
+            logger.error(f"Error extracting cart info: {e}")
+        finally:
+            if readiness is not self.readiness:
+                readiness.detach()
         
         return cart_info
     
+    @traced("extract.items")
     async def _extract_items(self, page: PlaywrightPage, cart_info: Dict[str, Any]):
         """Extract individual cart items"""
-        item_selectors = [
-            "[data-name='Active Items'] .sc-list-item",
-            ".sc-list-item-content",
-            ".sc-list-item",
-            "[data-item-index]",
-            ".a-spacing-mini"
-        ]
-        
-        for selector in item_selectors:
-            try:
-                items = await page.query_selector_all(selector)
-                if items:
-                    print(f"Found {len(items)} items with selector: {selector}")
-                    for item in items[:10]:  # Limit to 10 items
-                        item_info = await self._extract_single_item(item)
-                        if item_info:
-                            cart_info['items'].append(item_info)
-                    break
-            except Exception as e:
-                continue
+        try:
+            # Find the first row selector with matches in one combined query
+            match = await selector_engine.resolve(page, self.ITEM_SELECTORS)
+            if match:
+                items = await page.query_selector_all(match.selector)
+                logger.info(f"Found {len(items)} items with selector: {match.selector}")
+                for item in items[:self.max_items]:
+                    item_info = await self._extract_single_item(item)
+                    if item_info:
+                        cart_info['items'].append(item_info)
+        except Exception as e:
+            logger.error(f"Error finding cart items: {e}")
         
         cart_info['item_count'] = len(cart_info['items'])
     
@@ -91,17 +206,7 @@ class CartExtractor:
         
         try:
             # Extract item name
-            name_selectors = [
-                ".sc-product-title",
-                "[data-truncate-title]",
-                ".a-size-medium",
-                "h4",
-                ".s-size-mini",
-                "h3 span",
-                ".a-link-normal"
-            ]
-            
-            for selector in name_selectors:
+            for selector in self.NAME_SELECTORS:
                 try:
                     name_element = await item_locator.query_selector(selector)
                     if name_element:
@@ -113,29 +218,20 @@ class CartExtractor:
                     continue
             
             # Extract price
-            price_selectors = [
-                ".sc-price",
-                ".a-price-whole",
-                "[data-a-color='price']",
-                ".a-color-price",
-                ".a-price .a-offscreen"
-            ]
-            
-            for selector in price_selectors:
+            for selector in self.PRICE_SELECTORS:
                 try:
                     price_element = await item_locator.query_selector(selector)
                     if price_element:
                         price_text = await price_element.text_content()
                         if price_text:
-                            price = self._parse_price(price_text)
+                            price = self._parse_price(price_text, self.locale)
                             if price > 0:
                                 item_info['price'] = price
                                 break
                 except:
                     continue
             
-            # Extract quantity (simplified)
-            item_info['quantity'] = 1  # Default to 1 for simplicity
+            item_info['quantity'] = await self._extract_quantity(item_locator)
             
             # Set defaults
             if 'name' not in item_info:
@@ -144,68 +240,171 @@ class CartExtractor:
                 item_info['price'] = 0.0
                 
         except Exception as e:
-            print(f"Error extracting item: {e}")
+            logger.warning(f"Error extracting item: {e}")
         
         return item_info if item_info.get('name') else None
     
+    async def _extract_quantity(self, item_locator) -> int:
+        """Read quantity from data-quantity, then the quantity box, select or dropdown prompt, as the script does"""
+        quantity = self._quantity_from_text(await item_locator.get_attribute('data-quantity'))
+        if quantity:
+            return quantity
+        
+        for selector in self.QUANTITY_SELECTORS:
+            try:
+                quantity_element = await item_locator.query_selector(selector)
+                if quantity_element:
+                    quantity = self._quantity_from_text(await quantity_element.evaluate(
+                        "el => el.value !== undefined && el.value !== '' ? el.value : el.textContent"
+                    ))
+                    if quantity:
+                        return quantity
+            except Exception:
+                continue
+        return 1
+    
+    @staticmethod
+    def _quantity_from_text(text: Optional[str]) -> int:
+        digits = ''.join(ch for ch in text or '' if ch.isdigit())
+        return int(digits) if digits else 0
+    
+    @traced("extract.totals")
     async def _extract_totals(self, page: PlaywrightPage, cart_info: Dict[str, Any]):
         """Extract cart totals"""
-        total_selectors = [
-            "#sc-subtotal-amount-activecart",
-            "#sc-subtotal-amount-buybox",
-            ".sc-price-container",
-            "[data-testid='cart-subtotal']",
-            ".a-size-medium.a-color-price",
-            "#sc-subtotal-amount-buybox .a-price .a-offscreen",
-            ".sc-subtotal .a-price .a-offscreen"
-        ]
-        
-        for selector in total_selectors:
+        for selector in self.TOTAL_SELECTORS:
             try:
                 total_element = await page.query_selector(selector)
                 if total_element:
                     total_text = await total_element.text_content()
                     if total_text:
-                        total = self._parse_price(total_text)
+                        total = self._parse_price(total_text, self.locale)
                         if total > 0:
                             cart_info['total'] = total
                             cart_info['subtotal'] = total
-                            print(f"Found cart total: ${total:.2f} (selector: {selector})")
+                            logger.info(f"Found cart total: ${total:.2f} (selector: {selector})")
                             return
             except Exception as e:
                 continue
         
-        # If no total found, sum up individual items
+        self._sum_item_totals(cart_info)
+    
+    async def iter_items(self, page: PlaywrightPage = None) -> AsyncIterator[CartItem]:
+        """
+        Yield cart items as they are parsed, loading lazy or paginated rows on demand.
+        
+        Rows are read in batches of extraction.batch_size with one page.evaluate call each.
+        When the rendered rows run out, "show more" is clicked, or the page is scrolled if the
+        last batch was full, until no new rows appear, so memory stays flat for carts with
+        hundreds of lines.
+        """
+        self.locale = default_locale()
+        async for payload in self._stream_batches(page or self.page):
+            for raw_item in payload.get('items', []):
+                yield self._to_cart_item(raw_item)
+    
+    async def _stream_batches(self, page: PlaywrightPage) -> AsyncIterator[Dict[str, Any]]:
+        """Yield raw script payloads batch by batch until the cart has no more rows"""
+        start = 0
+        item_selector = None
+        
+        while True:
+            limit = self.batch_size
+            if self.max_items:
+                limit = min(limit, self.max_items - start)
+            
+            payload = await page.evaluate(EXTRACT_CART_SCRIPT, {
+                'itemSelectors': self.ITEM_SELECTORS,
+                'itemSelector': item_selector,
+                'nameSelectors': self.NAME_SELECTORS,
+                'priceSelectors': self.PRICE_SELECTORS,
+                'quantitySelectors': self.QUANTITY_SELECTORS,
+                'totalSelectors': self.TOTAL_SELECTORS,
+                'start': start,
+                'limit': limit
+            })
+            
+            if item_selector is None and payload.get('itemSelector'):
+                item_selector = payload['itemSelector']
+                logger.info(f"Found {payload.get('itemCount')} items with selector: {item_selector}")
+            
+            batch = len(payload.get('items', []))
+            start += batch
+            yield payload
+            
+            if not item_selector or (self.max_items and start >= self.max_items):
+                return
+            if start < payload.get('itemCount', 0):
+                continue
+            if not await self._load_more(page, item_selector, start, full_batch=batch >= limit):
+                return
+    
+    @traced("extract.load_more")
+    async def _load_more(self, page: PlaywrightPage, item_selector: str, row_count: int, full_batch: bool = True) -> bool:
+        """Click "show more", or scroll after a full batch, then wait for new rows to render"""
+        try:
+            match = await selector_engine.resolve(page, self.SHOW_MORE_SELECTORS, visible=True)
+            if match:
+                await page.click(match.selector, timeout=self.load_more_timeout)
+            elif full_batch:
+                await page.evaluate(SCROLL_TO_LAST_ROW_SCRIPT, item_selector)
+            else:
+                # A short batch with no "show more" control is the end of the cart; waiting would only add dead time
+                return False
+            
+            await page.wait_for_function(
+                "([selector, count]) => document.querySelectorAll(selector).length > count",
+                arg=[item_selector, row_count],
+                timeout=self.load_more_timeout
+            )
+            return True
+        except PlaywrightTimeoutError:
+            return False
+        except Exception as e:
+            logger.warning(f"Could not load more cart rows: {e}")
+            return False
+    
+    @traced("extract.script")
+    async def _extract_in_page(self, page: PlaywrightPage, cart_info: Dict[str, Any]):
+        """Extract items and subtotal in one page.evaluate round trip per batch of rows"""
+        payload = {}
+        async for payload in self._stream_batches(page):
+            for raw_item in payload.get('items', []):
+                cart_info['items'].append(asdict(self._to_cart_item(raw_item)))
+        
+        cart_info['item_count'] = len(cart_info['items'])
+        
+        # Subtotal candidates from the last batch reflect the fully loaded cart
+        for candidate in payload.get('totals', []):
+            total = self._parse_price(candidate['text'], self.locale)
+            if total > 0:
+                cart_info['total'] = total
+                cart_info['subtotal'] = total
+                logger.info(f"Found cart total: ${total:.2f} (selector: {candidate['selector']})")
+                return
+        
+        self._sum_item_totals(cart_info)
+    
+    def _to_cart_item(self, raw_item: Dict[str, Any]) -> CartItem:
+        price = 0.0
+        for price_text in raw_item.get('priceTexts', []):
+            price = self._parse_price(price_text, self.locale)
+            if price > 0:
+                break
+        return CartItem(
+            name=raw_item.get('name') or "Unknown Item",
+            price=price,
+            quantity=raw_item.get('quantity') or 1
+        )
+    
+    def _sum_item_totals(self, cart_info: Dict[str, Any]):
+        """If no total was found, sum up individual items"""
         if cart_info['total'] == 0.0 and cart_info['items']:
             total = sum(item.get('price', 0.0) * item.get('quantity', 1) for item in cart_info['items'])
             cart_info['total'] = total
             cart_info['subtotal'] = total
-            print(f"Calculated total from items: ${total:.2f}")
+            logger.info(f"Calculated total from items: ${total:.2f}")
     
-    def _parse_price(self, price_text: str) -> float:
+    @staticmethod
+    def _parse_price(price_text: str, locale: Optional[str] = None) -> float:
         """Parse price from text"""
-        if not price_text:
-            return 0.0
-        
-        # Remove currency symbols and extract numbers
-        price_text = re.sub(r'[^\d.,]', '', price_text.strip())
-        
-        # Handle different decimal formats
-        if ',' in price_text and '.' in price_text:
-            # Format like 1,234.56
-            if price_text.rindex(',') < price_text.rindex('.'):
-                price_text = price_text.replace(',', '')
-            else:
-                # Format like 1.234,56
-                price_text = price_text.replace('.', '').replace(',', '.')
-        elif ',' in price_text:
-            # Could be 1,234 or 12,34
-            if len(price_text.split(',')[1]) == 2:
-                price_text = price_text.replace(',', '.')
-            else:
-                price_text = price_text.replace(',', '')
-        
-        try:
-            return float(price_text)
-        except (ValueError, TypeError):
-            return 0.0
\ No newline at end of file
+        return parse_price(price_text, locale)
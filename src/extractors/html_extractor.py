@@ -0,0 +1,141 @@
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+from cssselect import SelectorError
+from .cart_extractor import CartExtractor
+from .price_parser import default_locale
+from ..navigation.selectors import RegisteredSelectors
+
+@lru_cache(maxsize=None)
+def _compile(selector: str) -> Optional[CSSSelector]:
+    """Compile a CSS selector once; Playwright-only syntax such as text= is skipped"""
+    if selector.startswith("text="):
+        return None
+    try:
+        return CSSSelector(selector)
+    except SelectorError:
+        return None
+
+class HtmlSnapshotExtractor:
+    """Extracts cart information from a saved page.content() snapshot without a browser"""
+
+    # Same shared registry lists as CartExtractor
+    ITEM_SELECTORS = RegisteredSelectors("cart_items")
+    NAME_SELECTORS = RegisteredSelectors("item_name")
+    PRICE_SELECTORS = RegisteredSelectors("item_price")
+    QUANTITY_SELECTORS = RegisteredSelectors("item_quantity")
+    TOTAL_SELECTORS = RegisteredSelectors("cart_total")
+    EMPTY_SELECTORS = RegisteredSelectors("cart_empty")
+
+    def __init__(self, max_items: Optional[int] = None, locale: Optional[str] = None):
+        self.max_items = max_items
+        self.locale = locale or default_locale()
+
+    def extract_cart_info(self, html: str) -> Dict[str, Any]:
+        """Extract items and totals from cart page HTML, in the same shape as CartExtractor"""
+        cart_info = {
+            'items': [],
+            'total': 0.0,
+            'subtotal': 0.0,
+            'item_count': 0
+        }
+
+        if not html or not html.strip():
+            return cart_info
+
+        document = lxml_html.fromstring(html)
+
+        if self.is_empty(document):
+            return cart_info
+
+        for row in self._first_match(document, self.ITEM_SELECTORS)[:self.max_items]:
+            cart_info['items'].append(self._extract_single_item(row))
+        cart_info['item_count'] = len(cart_info['items'])
+
+        for selector in self.TOTAL_SELECTORS:
+            element = self._query(document, selector)
+            if element is not None:
+                total = CartExtractor._parse_price(element.text_content(), self.locale)
+                if total > 0:
+                    cart_info['total'] = total
+                    cart_info['subtotal'] = total
+                    return cart_info
+
+        if cart_info['items']:
+            total = sum(item['price'] * item['quantity'] for item in cart_info['items'])
+            cart_info['total'] = total
+            cart_info['subtotal'] = total
+
+        return cart_info
+
+    def is_empty(self, document) -> bool:
+        """Check the empty-cart markers, including Playwright text= selectors"""
+        page_text = None
+        for selector in self.EMPTY_SELECTORS:
+            if selector.startswith("text="):
+                if page_text is None:
+                    page_text = document.text_content().lower()
+                if selector[len("text="):].lower() in page_text:
+                    return True
+            elif self._query(document, selector) is not None:
+                return True
+        return False
+
+    def _extract_single_item(self, row) -> Dict[str, Any]:
+        item_info = {'name': "Unknown Item", 'price': 0.0, 'quantity': self._extract_quantity(row)}
+
+        for selector in self.NAME_SELECTORS:
+            element = self._query(row, selector)
+            if element is not None:
+                name = element.text_content().strip()
+                if len(name) > 3:
+                    item_info['name'] = name
+                    break
+
+        for selector in self.PRICE_SELECTORS:
+            element = self._query(row, selector)
+            if element is not None:
+                price = CartExtractor._parse_price(element.text_content(), self.locale)
+                if price > 0:
+                    item_info['price'] = price
+                    break
+
+        return item_info
+
+    def _extract_quantity(self, row) -> int:
+        """Read quantity from data-quantity, the quantity box, select or dropdown prompt"""
+        candidates = [row.get('data-quantity', '')]
+        for selector in self.QUANTITY_SELECTORS:
+            element = self._query(row, selector)
+            if element is None:
+                continue
+            if element.tag == 'input':
+                candidates.append(element.get('value', ''))
+            elif element.tag == 'select':
+                selected = element.xpath(".//option[@selected]")
+                candidates.append(selected[0].get('value', '') if selected else '')
+            else:
+                candidates.append(element.text_content())
+
+        for candidate in candidates:
+            digits = ''.join(ch for ch in candidate if ch.isdigit())
+            if digits and int(digits) > 0:
+                return int(digits)
+        return 1
+
+    def _first_match(self, root, selectors: List[str]) -> list:
+        for selector in selectors:
+            compiled = _compile(selector)
+            if compiled is not None:
+                matches = compiled(root)
+                if matches:
+                    return matches
+        return []
+
+    def _query(self, root, selector: str):
+        compiled = _compile(selector)
+        if compiled is None:
+            return None
+        matches = compiled(root)
+        return matches[0] if matches else None
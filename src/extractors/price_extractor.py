@@ -1,43 +1,27 @@
 import re
 from typing import Optional
+from .price_parser import parse_price
+
+# Goal phrasings that carry a budget, tried in order
+THRESHOLD_PATTERNS = [
+    re.compile(r'\$(\d+(?:\.\d{2})?)', re.IGNORECASE),
+    re.compile(r'(\d+(?:\.\d{2})?) dollars?', re.IGNORECASE),
+    re.compile(r'(\d+(?:\.\d{2})?) USD', re.IGNORECASE)
+]
 
 class PriceExtractor:
-    def __init__(self):
-        self.price_patterns = [
-            r'\$?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',  # $1,234.56 or 1234.56
-            r'(\d+\.\d{2})',  # 12.34
-            r'(\d+)',  # 123
-        ]
+    def __init__(self, locale: Optional[str] = None):
+        self.locale = locale
     
     def extract_price(self, text: str) -> float:
         """Extract price from text"""
-        if not text:
-            return 0.0
-        
-        # Clean the text
-        cleaned_text = text.replace(',', '').replace('$', '').strip()
-        
-        for pattern in self.price_patterns:
-            match = re.search(pattern, cleaned_text)
-            if match:
-                try:
-                    return float(match.group(1))
-                except ValueError:
-                    continue
-        
-        return 0.0
+        return parse_price(text, self.locale)
     
     def extract_threshold(self, goal: str) -> float:
         """Extract monetary threshold from goal text"""
-        patterns = [
-            r'\$(\d+(?:\.\d{2})?)',
-            r'(\d+(?:\.\d{2})?) dollars?',
-            r'(\d+(?:\.\d{2})?) USD'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, goal, re.IGNORECASE)
+        for pattern in THRESHOLD_PATTERNS:
+            match = pattern.search(goal)
             if match:
                 return float(match.group(1))
         
-        return 100.0  # Default threshold
\ No newline at end of file
+        return 100.0  # Default threshold
@@ -0,0 +1,102 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional
+from config.settings import config
+
+# A number with optional thousands groups (1,234 / 1.234 / 1 234) and decimals
+_NUMBER_PATTERN = r'\d+(?:[.,\s\u00a0]\d{3})*(?:[.,]\d+)?'
+# Next to a currency mark the integer part may be left out, as in $.99
+_AMOUNT_PATTERN = rf'(?:{_NUMBER_PATTERN}|[.,]\d+)'
+_CURRENCY_CODES = r'\b(?:USD|EUR|GBP|CAD|AUD|INR|JPY)\b'
+
+# Compiled once at import; every parse reuses them
+_CURRENCY_PREFIX = re.compile(rf'(?:[$€£¥₹]|{_CURRENCY_CODES})\s*({_AMOUNT_PATTERN})')
+_CURRENCY_SUFFIX = re.compile(rf'({_AMOUNT_PATTERN})\s*(?:[€£]|{_CURRENCY_CODES})')
+_NUMBER = re.compile(_NUMBER_PATTERN)
+_SPACES = re.compile(r'[\s\u00a0]')
+
+# Languages that write 1.234,56; everything else is read as 1,234.56
+DECIMAL_COMMA_LANGUAGES = {"de", "fr", "es", "it", "nl", "pt", "pl", "sv", "da", "fi", "nb", "tr", "ru", "cs"}
+
+# (snapshot, locale) for the last settings snapshot a locale was resolved from
+_locale_for_snapshot = (None, "auto")
+
+def default_locale() -> str:
+    """Locale from extraction.locale in the current settings snapshot"""
+    global _locale_for_snapshot
+    settings = config.settings
+    snapshot, locale = _locale_for_snapshot
+    if snapshot is not settings:
+        locale = settings.get('extraction.locale', 'auto') or 'auto'
+        _locale_for_snapshot = (settings, locale)
+    return locale
+
+def _decimal_separator(number: str, locale: str) -> Optional[str]:
+    """Decide which separator, if any, marks the decimals"""
+    has_comma = "," in number
+    has_dot = "." in number
+    if has_comma and has_dot:
+        # Format like 1,234.56 or 1.234,56: the last separator holds the decimals
+        return "." if number.rindex(",") < number.rindex(".") else ","
+
+    if locale != "auto":
+        # Only one kind of separator: the locale says whether it groups thousands
+        separator = "," if locale.split("_")[0].split("-")[0].lower() in DECIMAL_COMMA_LANGUAGES else "."
+        return separator if number.count(separator) == 1 else None
+
+    if has_comma:
+        # Could be 1,234 or 12,34
+        return "," if len(number.split(",")[1]) == 2 else None
+    if has_dot:
+        # 1.234.567 only ever groups thousands
+        return "." if number.count(".") == 1 else None
+    return None
+
+@lru_cache(maxsize=16384)
+def parse_price_cents(text: str, locale: str = "auto") -> int:
+    """Parse the price in a string to integer cents; 0 if there is none"""
+    if not text:
+        return 0
+
+    match = _CURRENCY_PREFIX.search(text) or _CURRENCY_SUFFIX.search(text)
+    if match:
+        number = _SPACES.sub("", match.group(1))
+    else:
+        match = _NUMBER.search(text)
+        if not match:
+            return 0
+        number = _SPACES.sub("", match.group(0))
+
+    separator = _decimal_separator(number, locale)
+    if separator:
+        whole, _, fraction = number.rpartition(separator)
+    else:
+        whole, fraction = number, ""
+
+    whole_digits = "".join(ch for ch in whole if ch.isdigit()) or "0"
+    cents = int(whole_digits) * 100
+    if fraction:
+        cents += int(fraction[:2].ljust(2, "0"))
+        if len(fraction) > 2 and fraction[2] >= "5":
+            cents += 1
+    return cents
+
+def parse_price(text: str, locale: Optional[str] = None) -> float:
+    """Parse the price in a string to dollars (or the local unit)"""
+    return parse_price_cents(text, locale or default_locale()) / 100
+
+def parse_prices(texts: Iterable[str], locale: Optional[str] = None) -> List[int]:
+    """Parse many price strings at once into integer cents"""
+    locale = locale or default_locale()
+    memo = {}
+    results = []
+    for text in texts:
+        cents = memo.get(text)
+        if cents is None:
+            cents = memo[text] = parse_price_cents(text, locale)
+        results.append(cents)
+    return results
+
+def cache_info():
+    """Hit/miss statistics of the memo cache"""
+    return parse_price_cents.cache_info()
@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+from .html_extractor import HtmlSnapshotExtractor
+from ..utils.logger import logger, configure_logging
+
+_extractor: Optional[HtmlSnapshotExtractor] = None
+
+def _init_worker():
+    """Build one extractor per worker process so compiled selectors are reused"""
+    global _extractor
+    _extractor = HtmlSnapshotExtractor()
+
+def process_snapshot(path: str, threshold: Optional[float] = None) -> Dict[str, Any]:
+    """Extract cart information from one saved snapshot file"""
+    extractor = _extractor or HtmlSnapshotExtractor()
+    record = {'file': path}
+
+    try:
+        html = Path(path).read_text(encoding='utf-8', errors='replace')
+        cart_info = extractor.extract_cart_info(html)
+        record.update(cart_info)
+        if threshold is not None:
+            total = cart_info['total']
+            if total == 0.0:
+                record['threshold_status'] = "UNKNOWN_TOTAL"
+            elif total < threshold:
+                record['threshold_status'] = "BELOW_THRESHOLD"
+            else:
+                record['threshold_status'] = "ABOVE_THRESHOLD"
+    except Exception as e:
+        record['error'] = str(e)
+
+    return record
+
+def find_snapshots(inputs: List[str], pattern: str) -> Iterator[str]:
+    """Expand files and directories into snapshot file paths"""
+    for entry in inputs:
+        path = Path(entry)
+        if path.is_dir():
+            for match in sorted(path.rglob(pattern)):
+                yield str(match)
+        else:
+            yield str(path)
+
+def run_batch(paths: List[str], workers: int, threshold: Optional[float] = None, chunksize: int = 16) -> Iterator[Dict[str, Any]]:
+    """Fan snapshots across a process pool and yield results as they come back, in input order"""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        yield from executor.map(process_snapshot, paths, [threshold] * len(paths), chunksize=chunksize)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Re-score saved cart page HTML snapshots without a browser")
+    parser.add_argument("inputs", nargs="+", help="Snapshot files or directories")
+    parser.add_argument("--pattern", default="*.html", help="Glob used inside directories (default: *.html)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=16, help="Snapshots handed to a worker at a time")
+    parser.add_argument("--threshold", type=float, default=None, help="Price threshold to classify each cart against")
+    parser.add_argument("--output", default="-", help="JSON-lines output file (default: stdout)")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    paths = list(find_snapshots(args.inputs, args.pattern))
+    output = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+
+    started = time.perf_counter()
+    errors = 0
+    try:
+        for record in run_batch(paths, args.workers, args.threshold, args.chunksize):
+            errors += 1 if 'error' in record else 0
+            output.write(json.dumps(record) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    rate = len(paths) / elapsed if elapsed > 0 else 0.0
+    logger.info(f"Processed {len(paths)} snapshots in {elapsed:.1f}s ({rate:.0f}/s, {errors} errors)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import pickle
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from ..core.models import TraceSpan
+from ..utils.logger import logger
+from ..utils.tracing import span
+from config.settings import config
+
+# Page-state noise that changes between runs without changing what the LLM should do
+_TIMESTAMPS = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?')
+_OPAQUE_TOKENS = re.compile(r'[A-Za-z0-9_\-]{32,}')
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_text(text: str) -> str:
+    """Strip timestamps, session tokens and whitespace differences from prompt text"""
+    text = _TIMESTAMPS.sub('<time>', text)
+    text = _OPAQUE_TOKENS.sub('<token>', text)
+    return _WHITESPACE.sub(' ', text).strip()
+
+def _content_text(content: Any) -> str:
+    """Text of a message content; screenshots and other binary parts are dropped"""
+    if isinstance(content, str):
+        return normalize_text(content)
+    if isinstance(content, list):
+        parts = []
+        for part in content:
+            if isinstance(part, str):
+                parts.append(normalize_text(part))
+            elif isinstance(part, dict) and part.get('type') == 'text':
+                parts.append(normalize_text(part.get('text', '')))
+            else:
+                parts.append('<image>')
+        return ' '.join(parts)
+    return normalize_text(str(content))
+
+def normalize_prompt(messages: Any) -> List[List[str]]:
+    """Role and normalized text of every message in a LangChain prompt"""
+    if isinstance(messages, str):
+        return [['human', normalize_text(messages)]]
+
+    normalized = []
+    for message in messages:
+        if isinstance(message, tuple):
+            role, content = message
+        elif isinstance(message, dict):
+            role, content = message.get('role', ''), message.get('content', '')
+        else:
+            role, content = getattr(message, 'type', type(message).__name__), getattr(message, 'content', message)
+        normalized.append([str(role), _content_text(content)])
+    return normalized
+
+def page_fingerprint(messages: Any) -> str:
+    """Stable hash of the normalized prompt, which carries the page state"""
+    payload = json.dumps(normalize_prompt(messages), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def model_name(llm: Any) -> str:
+    return str(getattr(llm, 'model_name', None) or getattr(llm, 'model', None) or type(llm).__name__)
+
+class LLMResponseStore:
+    """SQLite-backed response store with TTL expiry and least-recently-used eviction"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        cache_config = config.get('llm_cache', {})
+        self.path = Path(path or cache_config.get('path', '.cache/llm_cache.sqlite3'))
+        self.max_entries = max_entries or cache_config.get('max_entries', 2000)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else cache_config.get('ttl_hours', 24) * 3600
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, value BLOB, created_at REAL, accessed_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        return self._db
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Stored value for a key, or None if missing or expired"""
+        db = self._connect()
+        now = time.time()
+        row = db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.evictions += 1
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, model: str, value: bytes):
+        db = self._connect()
+        now = time.time()
+        db.execute(
+            "INSERT OR REPLACE INTO responses (key, model, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, model, value, now, now)
+        )
+        self.stores += 1
+        self._evict(now)
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the least recently used ones above max_entries"""
+        db = self._connect()
+        if self.ttl_seconds:
+            self.evictions += db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+
+        overflow = db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self.evictions += db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            ).rowcount
+
+    def clear(self):
+        self._connect().execute("DELETE FROM responses")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        entries = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries
+        }
+
+def _encode(value: Any) -> Any:
+    """Make an LLM result picklable; pydantic outputs are stored as plain data"""
+    if hasattr(value, 'model_dump') and not hasattr(value, 'content'):
+        return {'__model__': value.model_dump()}
+    if isinstance(value, dict) and 'parsed' in value:
+        return {key: _encode(item) for key, item in value.items()}
+    return value
+
+def _decode(value: Any, schema: Any) -> Any:
+    if isinstance(value, dict) and '__model__' in value:
+        return schema.model_validate(value['__model__']) if hasattr(schema, 'model_validate') else value['__model__']
+    if isinstance(value, dict) and 'parsed' in value:
+        return {key: _decode(item, schema) for key, item in value.items()}
+    return value
+
+def _cacheable(value: Any) -> bool:
+    """Failed structured parses are retried by the caller and must not be replayed"""
+    if value is None:
+        return False
+    if isinstance(value, dict) and 'parsed' in value:
+        return value.get('parsed') is not None and not value.get('parsing_error')
+    return True
+
+class CachingChatModel:
+    """Wraps a LangChain chat model and answers repeated prompts from the response store"""
+
+    def __init__(self, llm: Any, store: Optional[LLMResponseStore] = None, schema: Any = None, structured_kwargs: Optional[Dict[str, Any]] = None):
+        self.llm = llm
+        self.store = store or LLMResponseStore()
+        self.schema = schema
+        self.structured_kwargs = structured_kwargs or {}
+        self.model_name = model_name(llm)
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything the agent reads besides ainvoke (model_name, temperature, ...) comes from the wrapped model
+        return getattr(self.llm, name)
+
+    def with_structured_output(self, schema: Any, **kwargs) -> 'CachingChatModel':
+        structured = self.llm.with_structured_output(schema, **kwargs)
+        wrapper = CachingChatModel(structured, self.store, schema, kwargs)
+        wrapper.model_name = self.model_name
+        return wrapper
+
+    def cache_key(self, messages: Any, **kwargs) -> str:
+        """Hash of model, output schema, call options and the normalized prompt"""
+        schema_name = getattr(self.schema, '__name__', str(self.schema)) if self.schema is not None else ''
+        payload = json.dumps({
+            'model': self.model_name,
+            'temperature': getattr(self.llm, 'temperature', None),
+            'schema': schema_name,
+            'structured': sorted((k, repr(v)) for k, v in self.structured_kwargs.items()),
+            'options': sorted((k, repr(v)) for k, v in kwargs.items()),
+            'prompt': page_fingerprint(messages)
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    async def ainvoke(self, messages: Any, config: Any = None, **kwargs) -> Any:
+        with span("llm", model=self.model_name) as record:
+            return await self._ainvoke(messages, config, record, **kwargs)
+
+    async def _ainvoke(self, messages: Any, config: Any, record: Optional[TraceSpan], **kwargs) -> Any:
+        key = self.cache_key(messages, **kwargs)
+        cached = self.store.get(key)
+        if cached is not None:
+            try:
+                result = _decode(pickle.loads(cached), self.schema)
+                if record:
+                    record.attrs['cached'] = True
+                return result
+            except Exception as e:
+                logger.debug(f"Discarding unreadable LLM cache entry: {e}")
+
+        result = await self.llm.ainvoke(messages, config, **kwargs)
+        if _cacheable(result):
+            try:
+                self.store.put(key, self.model_name, pickle.dumps(_encode(result)))
+            except Exception as e:
+                logger.debug(f"LLM response not cached: {e}")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return self.store.stats()
@@ -1,24 +1,58 @@
 from playwright.async_api import Page as PlaywrightPage
 from typing import Optional
 from ..utils.logger import logger
+from ..utils.tracing import span
 from .selectors import SelectorManager
+from .selector_engine import SelectorEngine, selector_engine
 
 class Navigator:
-    def __init__(self, page: PlaywrightPage, selector_manager: SelectorManager = None):
+    def __init__(self, page: PlaywrightPage, selector_manager: SelectorManager = None, engine: SelectorEngine = None):
         self.page = page
         self.selector_manager = selector_manager or SelectorManager()
+        self.selector_engine = engine or selector_engine
     
-    async def click_element(self, selectors: list, description: str = "element") -> bool:
-        """Try to click an element using multiple selectors"""
-        for selector in selectors:
+    async def click_element(self, selectors: list, description: str = "element", element_type: str = None, timeout: int = 5000) -> bool:
+        """Try to click an element using multiple selectors, learning the winner when element_type is given"""
+        with span("navigate.click", target=description):
+            return await self._click_element(selectors, description, element_type, timeout)
+    
+    async def _click_element(self, selectors: list, description: str, element_type: Optional[str], timeout: int) -> bool:
+        if element_type:
+            selectors = self.selector_manager.rank(element_type, selectors)
+        
+        try:
+            # One combined query for every fallback instead of a timeout per stale selector
+            match = await self.selector_engine.wait_for(self.page, selectors, timeout=timeout, visible=True)
+        except Exception as e:
+            logger.error(f"Failed to click {description} with any selector: {e}")
+            if element_type:
+                for selector in selectors:
+                    self.selector_manager.record_failure(element_type, selector)
+            return False
+        
+        offset = 0
+        while match is not None:
+            position = offset + match.index
+            if element_type:
+                # Higher-ranked alternatives were absent when the match was found
+                for selector in selectors[offset:position]:
+                    self.selector_manager.record_failure(element_type, selector)
+            
             try:
-                await self.page.wait_for_selector(selector, timeout=5000)
-                await self.page.click(selector)
-                logger.info(f"Successfully clicked {description} using selector: {selector}")
+                # The first element a selector matches may be a hidden duplicate
+                await self.page.click(f"{match.selector} >> visible=true", timeout=5000)
+                logger.info(f"Successfully clicked {description} using selector: {match.selector}")
+                if element_type:
+                    self.selector_manager.record_success(element_type, match.selector)
                 return True
             except Exception as e:
-                logger.debug(f"Failed to click {description} with selector {selector}: {e}")
-                continue
+                logger.warning(f"Failed to click {description} with selector {match.selector}: {e}")
+                if element_type:
+                    self.selector_manager.record_failure(element_type, match.selector)
+            
+            # Fall back to the next visible alternative below the one that failed
+            offset = position + 1
+            match = await self.selector_engine.resolve(self.page, selectors[offset:], visible=True) if offset < len(selectors) else None
         
         logger.error(f"Failed to click {description} with any selector")
         return False
@@ -26,8 +60,10 @@ class Navigator:
     async def navigate_to_url(self, url: str) -> bool:
         """Navigate to a URL"""
         try:
-            await self.page.goto(url)
-            await self.page.wait_for_load_state('networkidle')
+            with span("navigate.goto", url=url):
+                await self.page.goto(url)
+            with span("wait.load_state", state="networkidle"):
+                await self.page.wait_for_load_state('networkidle')
             logger.info(f"Successfully navigated to {url}")
             return True
         except Exception as e:
@@ -40,8 +76,9 @@ class Navigator:
         
         cart_selectors = self.selector_manager.get_selectors("cart_link")
         
-        if await self.click_element(cart_selectors, "cart link"):
-            await self.page.wait_for_load_state('networkidle')
+        if await self.click_element(cart_selectors, "cart link", element_type="cart_link"):
+            with span("wait.load_state", state="networkidle"):
+                await self.page.wait_for_load_state('networkidle')
             return True
         
         # Fallback: direct navigation
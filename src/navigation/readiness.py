@@ -0,0 +1,138 @@
+import asyncio
+import re
+import time
+from typing import List, Optional
+from playwright.async_api import Page as PlaywrightPage, TimeoutError as PlaywrightTimeoutError
+from .selector_engine import selector_engine
+from ..utils.logger import logger
+from ..utils.tracing import traced
+from config.settings import config
+
+# Resolves once no DOM mutation has been seen for quietMs, or reports failure at timeoutMs. Only the
+# first root selector present is observed, and attribute changes are ignored: Amazon's page keeps
+# toggling classes and ad attributes outside the cart, which would otherwise never look stable.
+STABLE_DOM_SCRIPT = """
+([quietMs, timeoutMs, rootSelectors]) => new Promise((resolve) => {
+    let root = null;
+    for (const selector of rootSelectors) {
+        try { root = document.querySelector(selector); } catch (e) {}
+        if (root) break;
+    }
+    let mutations = 0;
+    let quietTimer = null;
+    let deadline = null;
+    const observer = new MutationObserver((records) => {
+        mutations += records.length;
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish(true), quietMs);
+    });
+    const finish = (stable) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(deadline);
+        resolve({stable, mutations});
+    };
+    observer.observe(root || document.documentElement, {childList: true, subtree: true, characterData: true});
+    quietTimer = setTimeout(() => finish(true), quietMs);
+    deadline = setTimeout(() => finish(false), timeoutMs);
+})
+"""
+
+class ReadinessTimeout(Exception):
+    """Raised when a page never reaches the awaited ready state"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class PageReadiness:
+    """Waits on real page signals (selectors, network quiet, DOM stability) instead of fixed sleeps"""
+
+    def __init__(self, page: PlaywrightPage, timeout: Optional[int] = None):
+        readiness_config = config.get('readiness', {})
+        self.page = page
+        self.timeout = timeout or readiness_config.get('timeout', 15000)
+        self.network_quiet_ms = readiness_config.get('network_quiet_ms', 500)
+        self.dom_stable_ms = readiness_config.get('dom_stable_ms', 400)
+        self.cart_xhr_patterns = [re.compile(p) for p in readiness_config.get('cart_xhr_patterns', [r'/gp/cart', r'/cart/'])]
+        self._in_flight = set()
+        self._last_activity = time.monotonic()
+
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_request_done)
+        self.page.on("requestfailed", self._on_request_done)
+
+    def detach(self):
+        """Stop tracking network activity on the page"""
+        self.page.remove_listener("request", self._on_request)
+        self.page.remove_listener("requestfinished", self._on_request_done)
+        self.page.remove_listener("requestfailed", self._on_request_done)
+        self._in_flight.clear()
+
+    def _on_request(self, request):
+        if request.resource_type in ("xhr", "fetch") and self._matches(request.url):
+            self._in_flight.add(request)
+            self._last_activity = time.monotonic()
+
+    def _on_request_done(self, request):
+        if request in self._in_flight:
+            self._in_flight.discard(request)
+            self._last_activity = time.monotonic()
+
+    def _matches(self, url: str) -> bool:
+        return any(pattern.search(url) for pattern in self.cart_xhr_patterns)
+
+    @traced("wait.selector")
+    async def for_any_selector(self, selectors: List[str], timeout: Optional[int] = None, state: str = "visible") -> str:
+        """Wait until any selector matches and return the highest-priority one that did"""
+        timeout = timeout or self.timeout
+
+        try:
+            match = await selector_engine.wait_for(self.page, selectors, timeout=timeout, visible=(state == "visible"))
+        except PlaywrightTimeoutError:
+            raise ReadinessTimeout(f"none of {selectors} became {state} within {timeout}ms on {self.page.url}")
+
+        return match.selector
+
+    @traced("wait.network")
+    async def for_network_quiet(self, quiet_ms: Optional[int] = None, timeout: Optional[int] = None):
+        """Wait until no cart XHR has been in flight for quiet_ms"""
+        quiet_ms = quiet_ms or self.network_quiet_ms
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout / 1000
+
+        while time.monotonic() < deadline:
+            idle_for = (time.monotonic() - self._last_activity) * 1000
+            if not self._in_flight and idle_for >= quiet_ms:
+                return
+            await asyncio.sleep(0.05)
+
+        pending = [request.url for request in self._in_flight]
+        raise ReadinessTimeout(f"cart requests still active after {timeout}ms: {pending[:3]}")
+
+    @traced("wait.dom")
+    async def for_stable_dom(self, quiet_ms: Optional[int] = None, timeout: Optional[int] = None,
+                             root_selectors: Optional[List[str]] = None) -> int:
+        """Wait until the DOM under the first matching root stops mutating for quiet_ms and return the mutation count seen"""
+        quiet_ms = quiet_ms or self.dom_stable_ms
+        timeout = timeout or self.timeout
+        result = await self.page.evaluate(STABLE_DOM_SCRIPT, [quiet_ms, timeout, root_selectors or []])
+
+        if not result.get('stable'):
+            raise ReadinessTimeout(f"DOM still mutating after {timeout}ms ({result.get('mutations')} mutations)")
+
+        logger.debug(f"DOM stable after {result.get('mutations')} mutations")
+        return result.get('mutations', 0)
+
+    async def settle(self, timeout: Optional[int] = None, root_selectors: Optional[List[str]] = None):
+        """Best-effort wait for cart XHRs and DOM updates to finish within one shared timeout; logs instead of failing"""
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout / 1000
+        try:
+            await self.for_network_quiet(timeout=timeout)
+            remaining = int((deadline - time.monotonic()) * 1000)
+            if remaining <= 0:
+                raise ReadinessTimeout(f"no time left for the DOM to settle within {timeout}ms")
+            await self.for_stable_dom(timeout=remaining, root_selectors=root_selectors)
+        except ReadinessTimeout as e:
+            logger.warning(f"Page did not fully settle: {e.reason}")
@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+from typing import List, Optional, Union
+from playwright.async_api import Page as PlaywrightPage, ElementHandle
+from .selectors import SelectorRegistry, selector_registry
+from ..utils.tracing import span
+
+# Resolves a whole fallback list in one DOM pass. CSS alternatives are joined into a
+# single querySelectorAll; each hit is checked with matches() against the alternatives
+# ranked above the current best, so the highest-priority alternative with any match wins.
+# Playwright text= alternatives are matched against the rendered text of the root.
+RESOLVE_FUNCTION = """
+function (root, alternatives, visible) {
+    const isVisible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    const cssIndexes = [];
+    const textIndexes = [];
+    alternatives.forEach((alternative, i) => (alternative.startsWith('text=') ? textIndexes : cssIndexes).push(i));
+
+    let best = -1;
+    let combined = null;
+    try {
+        combined = cssIndexes.length ? root.querySelectorAll(cssIndexes.map((i) => alternatives[i]).join(', ')) : [];
+    } catch (e) {
+        combined = null;
+    }
+
+    if (combined) {
+        for (const el of combined) {
+            if (visible && !isVisible(el)) continue;
+            for (const i of cssIndexes) {
+                if (best !== -1 && i >= best) break;
+                if (el.matches(alternatives[i])) { best = i; break; }
+            }
+            if (best === cssIndexes[0]) break;
+        }
+    } else {
+        // One alternative is invalid CSS, so the joined query failed: check them one by one
+        for (const i of cssIndexes) {
+            try {
+                const els = Array.from(root.querySelectorAll(alternatives[i]));
+                if (els.some((el) => !visible || isVisible(el))) { best = i; break; }
+            } catch (e) {}
+        }
+    }
+
+    if (textIndexes.some((i) => best === -1 || i < best)) {
+        const haystack = ((root === document ? document.body : root).innerText || '').toLowerCase();
+        for (const i of textIndexes) {
+            if (best !== -1 && i >= best) break;
+            if (haystack.includes(alternatives[i].slice(5).toLowerCase())) { best = i; break; }
+        }
+    }
+
+    if (best === -1) return null;
+    const selector = alternatives[best];
+    let count = 1;
+    if (!selector.startsWith('text=')) {
+        count = Array.from(root.querySelectorAll(selector)).filter((el) => !visible || isVisible(el)).length;
+    }
+    return {index: best, selector, count};
+}
+"""
+
+RESOLVE_PAGE_SCRIPT = f"(args) => ({RESOLVE_FUNCTION})(document, args.alternatives, args.visible)"
+
+RESOLVE_ELEMENT_SCRIPT = f"(root, args) => ({RESOLVE_FUNCTION})(root, args.alternatives, args.visible)"
+
+@dataclass
+class SelectorMatch:
+    index: int
+    selector: str
+    count: int
+
+Query = Union[str, List[str]]
+
+class SelectorEngine:
+    """Resolves fallback selector lists in a single DOM query while keeping priority order"""
+
+    def __init__(self, registry: Optional[SelectorRegistry] = None):
+        self.registry = registry or selector_registry
+
+    def alternatives(self, query: Query) -> List[str]:
+        """A query is either a registry name or an explicit list in priority order"""
+        if isinstance(query, str):
+            return self.registry.get(query)
+        return list(query)
+
+    async def resolve(self, page: PlaywrightPage, query: Query, visible: bool = False) -> Optional[SelectorMatch]:
+        """Return the highest-priority alternative present on the page, or None"""
+        alternatives = self.alternatives(query)
+        if not alternatives:
+            return None
+        with span("selector.probe", alternatives=len(alternatives)):
+            result = await page.evaluate(RESOLVE_PAGE_SCRIPT, {'alternatives': alternatives, 'visible': visible})
+        return SelectorMatch(**result) if result else None
+
+    async def resolve_within(self, element: ElementHandle, query: Query, visible: bool = False) -> Optional[SelectorMatch]:
+        """Like resolve, but only searches descendants of an element"""
+        alternatives = self.alternatives(query)
+        if not alternatives:
+            return None
+        with span("selector.probe", alternatives=len(alternatives), scoped=True):
+            result = await element.evaluate(RESOLVE_ELEMENT_SCRIPT, {'alternatives': alternatives, 'visible': visible})
+        return SelectorMatch(**result) if result else None
+
+    async def wait_for(self, page: PlaywrightPage, query: Query, timeout: float = 30000, visible: bool = True) -> SelectorMatch:
+        """Poll the combined query in-page until any alternative matches; raises Playwright's TimeoutError"""
+        alternatives = self.alternatives(query)
+        with span("selector.wait", alternatives=len(alternatives)):
+            handle = await page.wait_for_function(
+                RESOLVE_PAGE_SCRIPT,
+                arg={'alternatives': alternatives, 'visible': visible},
+                timeout=timeout,
+                polling="raf"
+            )
+            result = await handle.json_value()
+            await handle.dispose()
+        return SelectorMatch(**result)
+
+# Shared engine over the shared registry
+selector_engine = SelectorEngine()
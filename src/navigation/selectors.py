@@ -1,8 +1,30 @@
-from typing import List, Dict
+import asyncio
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Optional
+from ..utils.logger import logger
+from config.settings import config
+
+try:
+    import fcntl  # Serializes stats writers across processes where available
+except ImportError:
+    fcntl = None
+
+# Serializes stats writers within the process
+_stats_lock = threading.Lock()
 
 class AmazonSelectors:
     """Centralized Amazon selectors with fallbacks"""
     
+    SEARCH_BOX = [
+        "#twotabsearchtextbox",
+        "[data-cy='search-input']",
+        ".nav-search-field input"
+    ]
+    
     CART_LINK = [
         "#nav-cart",
         "#nav-cart-count-container", 
@@ -10,29 +32,70 @@ class AmazonSelectors:
         "a[href*='cart']"
     ]
     
+    # Signals that the cart has rendered; an empty cart renders #sc-active-cart as well
+    CART_READY = [
+        "#sc-active-cart",
+        "[data-name='Active Items']",
+        "#sc-subtotal-amount-activecart"
+    ]
+    
+    CART_EMPTY = [
+        "[data-name='empty-cart']",
+        ".sc-empty-cart",
+        "#sc-empty-cart",
+        "text=Your cart is empty",
+        "text=Your Shopping Cart is empty"
+    ]
+    
     CART_ITEMS = [
+        "[data-name='Active Items'] .sc-list-item",
+        ".sc-list-item-content",
+        ".sc-list-item",
+        "[data-item-index]",
         "#sc-active-cart [data-name='Active Items'] .sc-list-item",
         "#sc-active-cart .sc-list-item",
-        ".sc-list-item",
-        "[data-name='Active Items'] > div"
+        "[data-name='Active Items'] > div",
+        # Generic spacing class that also matches non-item blocks; only a last resort
+        ".a-spacing-mini"
     ]
     
     ITEM_NAME = [
         ".sc-product-title",
+        "[data-truncate-title]",
         ".a-size-medium",
+        "h4",
+        ".s-size-mini",
         "h3 span",
+        ".a-link-normal",
         ".sc-grid-item-product-title",
         "[data-cy='title']"
     ]
     
     ITEM_PRICE = [
-        ".sc-price .a-price-whole",
+        ".sc-price",
         ".a-price-whole",
-        ".sc-product-price .a-price",
+        "[data-a-color='price']",
+        ".a-color-price",
         ".a-price .a-offscreen",
+        ".sc-price .a-price-whole",
+        ".sc-product-price .a-price",
         "[data-cy='price']"
     ]
     
+    ITEM_QUANTITY = [
+        "input[name='quantityBox']",
+        "select[name='quantity']",
+        ".a-dropdown-prompt"
+    ]
+    
+    # Pagination for long carts that only render the first rows
+    CART_SHOW_MORE = [
+        "#sc-active-cart .sc-list-show-more a",
+        "[data-action='sc-show-more'] a",
+        ".sc-show-more-items",
+        "text=Show more items"
+    ]
+    
     CHECKOUT_BUTTON = [
         "input[name='proceedToRetailCheckout']",
         ".sc-proceed-to-checkout button",
@@ -41,16 +104,225 @@ class AmazonSelectors:
     ]
     
     CART_TOTAL = [
+        "#sc-subtotal-amount-activecart",
+        "#sc-subtotal-amount-buybox",
+        ".sc-price-container",
+        "[data-testid='cart-subtotal']",
+        ".a-size-medium.a-color-price",
         "#sc-subtotal-amount-buybox .a-price .a-offscreen",
-        ".sc-subtotal .a-price .a-offscreen", 
+        ".sc-subtotal .a-price .a-offscreen",
         "#sc-subtotal-amount-activecart .a-price-whole",
         ".a-price.a-text-bold .a-offscreen"
     ]
+    
+    SIGNIN_FORM = [
+        "#ap_email",
+        "#ap_password",
+        "form[name='signIn']"
+    ]
+
+class SelectorRegistry:
+    """Single source of named fallback selector lists shared by every caller"""
+    
+    def __init__(self):
+        self._selectors: Dict[str, List[str]] = {}
+        # Graph element names that follow a named list, e.g. 'cart_page.cart_items' -> 'cart_items'
+        self._aliases: Dict[str, str] = {}
+    
+    @classmethod
+    def from_class(cls, selectors_class) -> 'SelectorRegistry':
+        """Register every upper-case list attribute of a selectors class"""
+        registry = cls()
+        for name in dir(selectors_class):
+            value = getattr(selectors_class, name)
+            if name.isupper() and isinstance(value, list):
+                registry.register(name, value)
+        return registry
+    
+    def register(self, name: str, selectors: List[str]):
+        """Register or replace a named list, highest priority first"""
+        self._aliases.pop(name.lower(), None)
+        self._selectors[name.lower()] = list(selectors)
+    
+    def register_graph(self, graph):
+        """Register each page element of a PageGraph as '<page_id>.<element_id>'; selector-set elements follow their set"""
+        for page in graph.pages.values():
+            for element in page.elements:
+                name = f"{page.id}.{element.id}".lower()
+                if element.selector_set:
+                    self._selectors.pop(name, None)
+                    self._aliases[name] = element.selector_set.lower()
+                else:
+                    self.register(name, element.selectors)
+    
+    def get(self, name: str) -> List[str]:
+        """Get a named list; the active selector profile in the config overrides the built-in list"""
+        name = name.lower()
+        override = config.settings.selectors.get(name)
+        if override is None and name in self._aliases:
+            return self.get(self._aliases[name])
+        return list(override if override is not None else self._selectors.get(name, []))
+    
+    def names(self) -> List[str]:
+        return sorted(set(self._selectors) | set(self._aliases))
+
+# Shared registry used by the navigator, extractors, agents and page graph
+selector_registry = SelectorRegistry.from_class(AmazonSelectors)
+
+class RegisteredSelectors:
+    """Class attribute that reads a named registry list on every access, so reloaded selector profiles apply"""
+    
+    def __init__(self, name: str, registry: Optional[SelectorRegistry] = None):
+        self.name = name
+        self.registry = registry or selector_registry
+    
+    def __get__(self, instance, owner) -> List[str]:
+        return self.registry.get(self.name)
 
 class SelectorManager:
-    def __init__(self, selectors_class=AmazonSelectors):
-        self.selectors = selectors_class
+    """Serves fallback selectors ranked by their recent success, persisted across runs"""
+    
+    def __init__(self, selectors_class=AmazonSelectors, stats_path: Optional[str] = None):
+        ranking_config = config.get('selector_ranking', {})
+        if selectors_class is AmazonSelectors:
+            self.registry = selector_registry
+        else:
+            self.registry = SelectorRegistry.from_class(selectors_class)
+        self.stats_path = Path(stats_path or ranking_config.get('stats_path', '.cache/selector_stats.json'))
+        self.half_life = ranking_config.get('half_life_hours', 24) * 3600
+        self.save_interval = ranking_config.get('save_interval_seconds', 5)
+        self._stats: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None
+        # Counts recorded since the last save; merged into the file rather than overwriting other writers
+        self._pending: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._last_save = 0.0
+        self._flush_task: Optional[asyncio.Task] = None
     
     def get_selectors(self, element_type: str) -> List[str]:
-        """Get selectors for a specific element type"""
-        return getattr(self.selectors, element_type.upper(), [])
\ No newline at end of file
+        """Get selectors for a specific element type, most likely winner first"""
+        candidates = self.registry.get(element_type)
+        return self.rank(element_type, candidates)
+    
+    def rank(self, element_type: str, candidates: List[str]) -> List[str]:
+        """Order candidates by decayed success rate; unseen selectors keep their static order"""
+        stats = self._load().get(element_type.lower(), {})
+        if not stats:
+            return list(candidates)
+        
+        now = time.time()
+        scores = {selector: self._score(stats.get(selector), now) for selector in candidates}
+        # sorted() is stable, so equal scores keep the hand-written priority order
+        return sorted(candidates, key=lambda selector: -scores[selector])
+    
+    def record_success(self, element_type: str, selector: str):
+        """Record that a selector matched for an element type"""
+        self._record(element_type, selector, 'successes')
+    
+    def record_failure(self, element_type: str, selector: str):
+        """Record that a selector did not match for an element type"""
+        self._record(element_type, selector, 'failures')
+    
+    def save(self):
+        """Add the counts recorded since the last save to the ranking on disk, atomically"""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        
+        try:
+            self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+            with _stats_lock, open(self.stats_path.with_suffix('.lock'), 'w') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # Other agents and processes may have saved since this manager loaded the file
+                merged = self._read_stats()
+                self._merge(merged, pending, time.time())
+                
+                tmp_path = self.stats_path.with_suffix(f'.{os.getpid()}.tmp')
+                with open(tmp_path, 'w') as f:
+                    json.dump(merged, f, indent=2)
+                os.replace(tmp_path, self.stats_path)
+            # Counts recorded while the file was written stay pending for the next save
+            self._stats = merged
+            self._last_save = time.time()
+        except OSError as e:
+            # Keep the counts so the next save retries them
+            for element_type, selectors in pending.items():
+                for selector, counts in selectors.items():
+                    kept = self._pending.setdefault(element_type, {}).setdefault(selector, {'successes': 0.0, 'failures': 0.0})
+                    kept['successes'] += counts['successes']
+                    kept['failures'] += counts['failures']
+            logger.warning(f"Could not save selector ranking to {self.stats_path}: {e}")
+    
+    async def flush(self):
+        """Save on a worker thread, so the file lock and write never block the event loop"""
+        if self._flush_task is not None:
+            await self._flush_task
+        await asyncio.to_thread(self.save)
+    
+    def _merge(self, stats: Dict[str, Dict[str, Dict[str, float]]], counts: Dict[str, Dict[str, Dict[str, float]]], now: float):
+        """Add recorded counts to a ranking, decaying the entries they touch"""
+        for element_type, selectors in counts.items():
+            for selector, recorded in selectors.items():
+                entry = stats.setdefault(element_type, {}).setdefault(
+                    selector, {'successes': 0.0, 'failures': 0.0, 'updated_at': now}
+                )
+                self._decay(entry, now)
+                entry['successes'] += recorded['successes']
+                entry['failures'] += recorded['failures']
+    
+    def _record(self, element_type: str, selector: str, field: str):
+        now = time.time()
+        entry = self._load().setdefault(element_type.lower(), {}).setdefault(
+            selector, {'successes': 0.0, 'failures': 0.0, 'updated_at': now}
+        )
+        self._decay(entry, now)
+        entry[field] += 1.0
+        pending = self._pending.setdefault(element_type.lower(), {}).setdefault(selector, {'successes': 0.0, 'failures': 0.0})
+        pending[field] += 1.0
+        
+        if now - self._last_save < self.save_interval or self._flush_task is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()  # No event loop to block
+            return
+        # Periodic save in the background; close() awaits the final flush
+        self._last_save = now
+        self._flush_task = loop.create_task(asyncio.to_thread(self.save))
+        self._flush_task.add_done_callback(self._flush_done)
+    
+    def _flush_done(self, task: asyncio.Task):
+        self._flush_task = None
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Background save of the selector ranking failed: {task.exception()}")
+    
+    def _decay(self, entry: Dict[str, float], now: float):
+        """Halve old evidence every half-life so stale winners drift back to the static order"""
+        factor = 0.5 ** (max(now - entry['updated_at'], 0.0) / self.half_life)
+        entry['successes'] *= factor
+        entry['failures'] *= factor
+        entry['updated_at'] = now
+    
+    def _score(self, entry: Optional[Dict[str, float]], now: float) -> float:
+        """Laplace-smoothed success rate; an unseen selector scores 0.5"""
+        if not entry:
+            return 0.5
+        factor = 0.5 ** (max(now - entry['updated_at'], 0.0) / self.half_life)
+        successes = entry['successes'] * factor
+        failures = entry['failures'] * factor
+        return (successes + 1.0) / (successes + failures + 2.0)
+    
+    def _load(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        if self._stats is None:
+            self._stats = self._read_stats()
+        return self._stats
+    
+    def _read_stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        try:
+            with open(self.stats_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable selector ranking {self.stats_path}: {e}")
+            return {}
@@ -0,0 +1,113 @@
+import asyncio
+import sys
+from collections import deque
+from typing import List, Optional
+from urllib.parse import urlparse
+from playwright.async_api import Page as PlaywrightPage, TimeoutError as PlaywrightTimeoutError
+from .selector_engine import selector_engine
+from ..utils.logger import logger
+from ..utils.tracing import span
+from config.settings import config
+
+# Amazon sign-in, one-time-password and captcha pages all live under /ap/. Only the path is
+# checked: post-sign-in redirects carry markers like ref_=nav_ya_signin in their query string.
+SIGNIN_PATH_MARKERS = ("/ap/", "/signin")
+
+# Returned by SignInWaiter.wait when no watcher could run, e.g. the page was closed
+WATCH_FAILED = "watch_failed"
+
+def is_signin_url(url: str) -> bool:
+    path = urlparse(url).path.lower()
+    return any(marker in path for marker in SIGNIN_PATH_MARKERS)
+
+class ConsoleSignal:
+    """Enter on the terminal, read without blocking the event loop; each line releases the longest waiting session"""
+
+    def __init__(self):
+        self._waiters = deque()
+        self._reading = False
+
+    def available(self) -> bool:
+        return sys.stdin is not None and sys.stdin.isatty()
+
+    def register(self) -> Optional[asyncio.Event]:
+        """An event set by the next unclaimed line typed on the console, or None without a terminal"""
+        if not self.available():
+            return None
+        if not self._reading:
+            try:
+                asyncio.get_running_loop().add_reader(sys.stdin.fileno(), self._on_line)
+            except (NotImplementedError, OSError, ValueError):
+                return None  # Event loops without reader support (Windows)
+            self._reading = True
+        event = asyncio.Event()
+        self._waiters.append(event)
+        return event
+
+    def unregister(self, event: Optional[asyncio.Event]):
+        if event in self._waiters:
+            self._waiters.remove(event)
+        if not self._waiters and self._reading:
+            asyncio.get_running_loop().remove_reader(sys.stdin.fileno())
+            self._reading = False
+
+    def _on_line(self):
+        sys.stdin.readline()
+        if self._waiters:
+            self._waiters.popleft().set()
+
+console_signal = ConsoleSignal()
+
+class SignInWaiter:
+    """Waits for a human to sign in while other sessions in the process keep running"""
+
+    def __init__(self, page: PlaywrightPage, ready_selectors: List[str], timeout: Optional[float] = None):
+        self.page = page
+        self.ready_selectors = ready_selectors
+        self.timeout = timeout or config.get('manual.signin_timeout_seconds', 300)
+
+    async def wait(self, signal: Optional[asyncio.Event] = None, use_console: bool = True) -> Optional[str]:
+        """Return why waiting ended ("left_signin", "cart_visible", "signal" or WATCH_FAILED), or None on timeout"""
+        # The deadline below ends the wait; the watchers get no timeout of their own (0) so they cannot race it
+        watchers = {
+            asyncio.ensure_future(self.page.wait_for_url(lambda url: not is_signin_url(url), timeout=0)): "left_signin",
+            asyncio.ensure_future(selector_engine.wait_for(self.page, self.ready_selectors, timeout=0)): "cart_visible"
+        }
+        console_event = console_signal.register() if use_console else None
+        for event in (signal, console_event):
+            if event is not None:
+                watchers[asyncio.ensure_future(event.wait())] = "signal"
+
+        pending = set(watchers)
+        try:
+            with span("wait.signin", timeout_seconds=self.timeout) as record:
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + self.timeout
+                while pending:
+                    done, pending = await asyncio.wait(pending, timeout=max(0.0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        break
+                    for task in done:
+                        # A watcher that failed (page closed, navigation aborted) leaves the others running
+                        if not task.cancelled() and task.exception() is None:
+                            reason = watchers[task]
+                            if record:
+                                record.attrs['reason'] = reason
+                            logger.info(f"Sign-in wait ended: {reason}")
+                            return reason
+
+                errors = [task.exception() for task in watchers if task.done() and not task.cancelled() and task.exception()]
+                # Watchers that timed out on their own still mean nobody signed in in time
+                timed_out = bool(errors) and all(isinstance(error, PlaywrightTimeoutError) for error in errors)
+                if not pending and not timed_out:
+                    if record:
+                        record.attrs['reason'] = WATCH_FAILED
+                    logger.warning(f"Could not watch for sign-in: {errors[0] if errors else 'all watchers stopped'}")
+                    return WATCH_FAILED
+                logger.warning(f"No sign-in within {self.timeout:g}s")
+                return None
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            console_signal.unregister(console_event)
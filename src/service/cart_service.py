@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import itertools
+import json
+import re
+import signal
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
+from ..agents.agent_factory import agent_registry
+from ..agents.audit_engine import CartAuditEngine
+from ..core.models import AuditJob, ServiceJob, TaskResult
+from ..core.page_graph import AmazonGraphBuilder
+from ..utils.logger import logger, configure_logging
+from config.settings import config
+
+MAX_BODY_BYTES = 64 * 1024
+
+# Job IDs end up in URLs and recording file names, so only plain names are accepted
+JOB_ID_PATTERN = re.compile(r'[A-Za-z0-9_-]{1,128}')
+
+REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 503: "Service Unavailable"}
+
+class ServiceError(Exception):
+    """A request the service rejects, answered with its HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        self.status = status
+        super().__init__(message)
+
+class CartCheckService:
+    """Long-running cart checker: keeps the graph, agent classes and browser pool warm and runs queued jobs over a local HTTP API"""
+
+    def __init__(self, engine: Optional[CartAuditEngine] = None, host: Optional[str] = None, port: Optional[int] = None,
+                 concurrency: Optional[int] = None):
+        service_config = config.get('service', {})
+        self.host = host or service_config.get('host', '127.0.0.1')
+        self.port = port if port is not None else service_config.get('port', 8765)
+        self.concurrency = concurrency or service_config.get('concurrency', 2)
+        self.max_queue = service_config.get('max_queue', 100)
+        self.max_results = service_config.get('max_results', 1000)
+        self.warm_agents = service_config.get('warm_agents', ['manual'])
+        self.engine = engine or CartAuditEngine(AmazonGraphBuilder.build(), concurrency=self.concurrency)
+        self.jobs: "OrderedDict[str, ServiceJob]" = OrderedDict()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count(1)
+        self._workers: List[asyncio.Task] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._done: Dict[str, asyncio.Event] = {}
+        self._signed_in: Dict[str, asyncio.Event] = {}
+        self.running = 0
+        self.completed = 0
+
+    async def start(self):
+        """Warm the browser pool and agent modules, then start accepting jobs"""
+        started = time.perf_counter()
+        for agent_mode in self.warm_agents:
+            try:
+                agent_registry.resolve(agent_mode)
+            except Exception as e:
+                logger.warning(f"Could not preload {agent_mode} agent: {e}")
+        await self.engine.start()
+
+        self._queue = asyncio.PriorityQueue(maxsize=self.max_queue)
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Cart check service listening on http://{self.host}:{self.port} "
+                    f"({self.concurrency} workers, warm in {time.perf_counter() - started:.1f}s)")
+
+    async def close(self):
+        """Stop accepting requests, cancel the workers and close the warm browsers"""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.engine.close()
+        logger.info("Cart check service stopped")
+
+    def submit(self, job: AuditJob) -> ServiceJob:
+        """Queue a job; raises ServiceError when the ID or mode is invalid or the queue is full"""
+        if not JOB_ID_PATTERN.fullmatch(job.job_id):
+            raise ServiceError(400, "job_id may only contain letters, digits, '_' and '-' (at most 128)")
+        if job.agent_mode not in agent_registry.names():
+            raise ServiceError(400, f"Unknown agent mode '{job.agent_mode}'")
+        if job.job_id in self.jobs:
+            raise ServiceError(400, f"Job '{job.job_id}' already exists")
+
+        record = ServiceJob(job, submitted_at=time.time())
+        try:
+            # Highest priority first, then first come first served
+            self._queue.put_nowait((-job.priority, next(self._sequence), record))
+        except asyncio.QueueFull:
+            raise ServiceError(503, f"Queue is full ({self.max_queue} jobs)")
+
+        self.jobs[job.job_id] = record
+        self._done[job.job_id] = asyncio.Event()
+        self._signed_in[job.job_id] = asyncio.Event()
+        self._forget_old_jobs()
+        logger.info(f"Queued job {job.job_id} ({job.agent_mode}, priority {job.priority}, {self._queue.qsize()} waiting)")
+        return record
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> ServiceJob:
+        """Wait until a job finishes, or the timeout passes, and return its record"""
+        record = self.jobs.get(job_id)
+        if record is None:
+            raise ServiceError(404, f"Unknown job '{job_id}'")
+        if not record.finished:
+            try:
+                await asyncio.wait_for(self._done[job_id].wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return record
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": self.running,
+            "completed": self.completed,
+            "workers": self.concurrency,
+            "agents": agent_registry.names(),
+            "pool": self.engine.pool.stats(),
+            "config_version": config.settings.version
+        }
+
+    async def _worker(self, index: int):
+        while True:
+            _, _, record = await self._queue.get()
+            record.status = "running"
+            record.started_at = time.time()
+            self.running += 1
+            try:
+                record.result = await self.engine.run_job(record.job, signin_signal=self._signed_in.get(record.job.job_id))
+                record.status = "done"
+            except Exception as e:
+                logger.error(f"Job {record.job.job_id} failed on worker {index}: {e}")
+                record.result = TaskResult(False, f"Job failed: {e}", data={"action_taken": "error", "job_id": record.job.job_id})
+                record.status = "failed"
+            finally:
+                self.running -= 1
+                self.completed += 1
+                record.finished_at = time.time()
+                self._done[record.job.job_id].set()
+                self._signed_in.pop(record.job.job_id, None)
+                self._queue.task_done()
+
+    def _forget_old_jobs(self):
+        """Keep at most max_results finished jobs for lookups"""
+        finished = [job_id for job_id, record in self.jobs.items() if record.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_results)]:
+            del self.jobs[job_id]
+            self._done.pop(job_id, None)
+            self._signed_in.pop(job_id, None)
+
+    def _job_from_request(self, body: Dict[str, Any]) -> Tuple[AuditJob, Any]:
+        """Build the job and how long to wait for it: False to return at once, None to wait until it finishes"""
+        try:
+            threshold = float(body.get('threshold', config.get('price_threshold', 100.0)))
+            priority = int(body.get('priority', 0))
+            timeout = float(body['timeout']) if body.get('timeout') is not None else None
+        except (TypeError, ValueError):
+            raise ServiceError(400, "threshold and timeout must be numbers and priority an integer")
+        job = AuditJob(
+            job_id=str(body.get('job_id') or f"job-{next(self._sequence)}"),
+            price_threshold=threshold,
+            goal=body.get('goal'),
+            site=body.get('site', 'amazon'),
+            agent_mode=body.get('mode', 'manual'),
+            account=body.get('account'),
+            priority=priority
+        )
+        return job, timeout if body.get('wait') else False
+
+    async def _route(self, method: str, path: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """POST /jobs, GET /jobs/<id>, POST /jobs/<id>/signed-in and GET /health"""
+        if path == "/health":
+            return 200, self.stats()
+
+        if path == "/jobs":
+            if method != "POST":
+                raise ServiceError(405, "Use POST to submit a job")
+            job, wait = self._job_from_request(body)
+            record = self.submit(job)
+            if wait is not False:
+                record = await self.wait(job.job_id, timeout=wait)
+            return (200 if record.finished else 202), record.to_dict()
+
+        if path.startswith("/jobs/") and path.endswith("/signed-in"):
+            if method != "POST":
+                raise ServiceError(405, "Use POST to confirm a sign-in")
+            job_id = path[len("/jobs/"):-len("/signed-in")]
+            if job_id not in self._signed_in:
+                raise ServiceError(404, f"No running job '{job_id}'")
+            # Lets a job waiting on a manual sign-in continue without a terminal
+            self._signed_in[job_id].set()
+            return 200, self.jobs[job_id].to_dict()
+
+        if path.startswith("/jobs/"):
+            if method != "GET":
+                raise ServiceError(405, "Use GET to read a job")
+            job_id = path[len("/jobs/"):]
+            if job_id not in self.jobs:
+                raise ServiceError(404, f"Unknown job '{job_id}'")
+            return 200, self.jobs[job_id].to_dict()
+
+        raise ServiceError(404, f"No route for {path}")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1: one JSON request and one JSON response per connection"""
+        try:
+            try:
+                method, path, body = await self._read_request(reader)
+                status, payload = await self._route(method, path, body)
+            except ServiceError as e:
+                status, payload = e.status, {"error": str(e)}
+            data = json.dumps(payload, default=str).encode()
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, Any]]:
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) < 2:
+            raise ServiceError(400, "Malformed request line")
+        method, path = request_line[0].upper(), request_line[1].split('?', 1)[0].rstrip('/') or '/'
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            raise ServiceError(400, "Content-Length must be an integer")
+        if length < 0:
+            raise ServiceError(400, "Content-Length must not be negative")
+        if length > MAX_BODY_BYTES:
+            raise ServiceError(413, f"Request body over {MAX_BODY_BYTES} bytes")
+        if not length:
+            return method, path, {}
+        try:
+            body = json.loads(await reader.readexactly(length))
+        except ValueError:
+            raise ServiceError(400, "Request body must be JSON")
+        if not isinstance(body, dict):
+            raise ServiceError(400, "Request body must be a JSON object")
+        return method, path, body
+
+async def serve(host: Optional[str] = None, port: Optional[int] = None, concurrency: Optional[int] = None):
+    """Run the service until SIGINT or SIGTERM"""
+    configure_logging()
+    service = CartCheckService(host=host, port=port, concurrency=concurrency)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+
+    await service.start()
+    try:
+        await stop.wait()
+    finally:
+        await service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve cart checks over a local HTTP API")
+    parser.add_argument("--host", help="Interface to bind (default: service.host)")
+    parser.add_argument("--port", type=int, help="Port to bind (default: service.port)")
+    parser.add_argument("--concurrency", type=int, help="Jobs run at once (default: service.concurrency)")
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.host, args.port, args.concurrency))
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,31 @@
+import atexit
+import contextvars
+import json
 import logging
-from typing import Optional
+import os
+import queue
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+# Fields of the task being logged (job id, agent, site), bound per asyncio task
+_log_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar('log_context', default={})
+
+CONSOLE_LOGGER = "browser_agent.console"
+
+@contextmanager
+def log_context(**fields):
+    """Add fields to every record logged by the current task until the block exits"""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
 
 class ColoredFormatter(logging.Formatter):
     """Custom formatter with colors"""
-    
+
     COLORS = {
         'DEBUG': '\033[36m',     # Cyan
         'INFO': '\033[32m',      # Green
@@ -12,27 +34,119 @@ class ColoredFormatter(logging.Formatter):
         'CRITICAL': '\033[35m',  # Magenta
     }
     RESET = '\033[0m'
-    
+
     def format(self, record):
+        # Console output from the agents is shown as written
+        if record.name == CONSOLE_LOGGER:
+            return record.getMessage()
+
+        # Color a copy so other sinks still see the plain level name
+        colored = logging.makeLogRecord(record.__dict__)
         color = self.COLORS.get(record.levelname, self.RESET)
-        record.levelname = f"{color}{record.levelname}{self.RESET}"
-        return super().format(record)
+        colored.levelname = f"{color}{record.levelname}{self.RESET}"
+        line = super().format(colored)
+        context = getattr(record, 'context', None)
+        if context:
+            line += " [" + " ".join(f"{key}={value}" for key, value in context.items()) + "]"
+        return line
+
+class JsonLinesFormatter(logging.Formatter):
+    """One compact JSON object per record, with the task context fields inlined"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        entry.update(getattr(record, 'context', None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+class ContextQueueHandler(QueueHandler):
+    """Enqueues records without formatting them; the listener thread formats and writes"""
+
+    def prepare(self, record):
+        # Freeze the message and capture the task context while still on the calling task
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        record.context = _log_context.get()
+        return record
+
+_listener: Optional[QueueListener] = None
+
+def _console_handler() -> logging.Handler:
+    handler = logging.StreamHandler()
+    handler.setFormatter(ColoredFormatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%H:%M:%S'
+    ))
+    return handler
+
+def _start_listener(*handlers: logging.Handler) -> QueueListener:
+    """Start a writer thread for the given sinks and point the queue handlers at it"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    for handler in logging.getLogger("browser_agent").handlers:
+        if isinstance(handler, ContextQueueHandler):
+            handler.queue = log_queue
+    return _listener
+
+def _restart_after_fork():
+    """The writer thread does not survive fork, so worker processes start their own"""
+    if _listener is not None:
+        _start_listener(*_listener.handlers)
+
+def _stop_listener():
+    """Flush queued records at exit"""
+    if _listener is not None:
+        _listener.stop()
 
 def setup_logger(name: str = "browser_agent", level: int = logging.INFO) -> logging.Logger:
-    """Setup colored logger"""
+    """Setup colored logger writing through a background thread"""
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    
+
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = ColoredFormatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%H:%M:%S'
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-    
+        listener = _start_listener(_console_handler())
+        logger.addHandler(ContextQueueHandler(listener.queue))
+        logger.propagate = False
+        atexit.register(_stop_listener)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=_restart_after_fork)
+
     return logger
 
+def configure_logging(json_path: Optional[str] = None, level: Optional[str] = None):
+    """Apply the logging: config section, adding the JSON-lines sink when a path is set"""
+    from config.settings import config  # Read on demand so importing the logger never loads the config
+
+    logging_config = config.get('logging', {})
+    json_path = json_path or logging_config.get('json_path')
+    level_name = (level or logging_config.get('level', 'INFO')).upper()
+    logger.setLevel(getattr(logging, level_name, logging.INFO))
+
+    handlers = [_console_handler()]
+    if json_path:
+        Path(json_path).parent.mkdir(parents=True, exist_ok=True)
+        json_handler = logging.FileHandler(json_path, encoding='utf-8')
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+
+    # Swap the sinks behind the same queue handler
+    _start_listener(*handlers)
+
 # Global logger instance
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
+
+# Plain lines for the operator (cart summaries, prompts), kept in order with the log records.
+# Its own level keeps them visible when logging.level quiets the diagnostic records.
+console = logging.getLogger(CONSOLE_LOGGER)
+console.setLevel(logging.INFO)
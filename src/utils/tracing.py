@@ -0,0 +1,171 @@
+import argparse
+import contextvars
+import functools
+import itertools
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from ..core.models import TraceSpan
+from .logger import logger
+
+# The trace of the running task and its innermost open span; unset outside traced tasks, where spans cost nothing
+_current_trace: contextvars.ContextVar[Optional['Trace']] = contextvars.ContextVar('current_trace', default=None)
+_current_span: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar('current_span', default=None)
+
+class Trace:
+    """Timing spans of one task, measured with the monotonic clock and anchored to wall time"""
+
+    def __init__(self, name: str, max_spans: int = 5000):
+        self.name = name
+        self.max_spans = max_spans
+        self.spans: List[TraceSpan] = []
+        self.dropped = 0
+        self._origin_ms = time.time() * 1000
+        self._started = time.perf_counter()
+        self._ids = itertools.count(1)
+
+    def timestamp(self, perf_time: Optional[float] = None) -> float:
+        """Epoch milliseconds of a perf_counter() reading"""
+        perf_time = time.perf_counter() if perf_time is None else perf_time
+        return self._origin_ms + (perf_time - self._started) * 1000
+
+    def open(self, name: str, parent_id: Optional[int], attrs: Dict[str, Any], start: Optional[float] = None) -> Optional[TraceSpan]:
+        if len(self.spans) >= self.max_spans:
+            # Per-row probes on huge carts would otherwise dominate the trace
+            self.dropped += 1
+            return None
+        record = TraceSpan(name, next(self._ids), parent_id, round(self.timestamp(start), 3), attrs=attrs)
+        self.spans.append(record)
+        return record
+
+    def phase_totals(self) -> Dict[str, float]:
+        """Milliseconds per span name, counting only the outermost span of each name"""
+        by_id = {record.span_id: record for record in self.spans}
+        totals: Dict[str, float] = {}
+        for record in self.spans:
+            parent, nested = by_id.get(record.parent_id), False
+            while parent is not None:
+                if parent.name == record.name:
+                    nested = True
+                    break
+                parent = by_id.get(parent.parent_id)
+            if not nested:
+                totals[record.name] = round(totals.get(record.name, 0.0) + record.duration_ms, 1)
+        return totals
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block as a child of the current span; a no-op when no trace is active"""
+    trace = _current_trace.get()
+    record = trace.open(name, _current_span.get(), attrs) if trace else None
+    if record is None:
+        yield None
+        return
+
+    token = _current_span.set(record.span_id)
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record.attrs['error'] = type(e).__name__
+        raise
+    finally:
+        record.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        _current_span.reset(token)
+
+def traced(name: str):
+    """Decorator form of span() for coroutine functions"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def add_span(name: str, start: float, end: float, **attrs):
+    """Record an interval that was measured elsewhere (perf_counter() readings), e.g. from a callback"""
+    trace = _current_trace.get()
+    record = trace.open(name, _current_span.get(), attrs, start=start) if trace else None
+    if record is not None:
+        record.duration_ms = round((end - start) * 1000, 3)
+
+@contextmanager
+def trace_task(name: str, **attrs):
+    """Collect every span of the enclosed task under one root span; yields None when tracing is disabled"""
+    from config.settings import config
+
+    tracing_config = config.get('tracing', {})
+    if not tracing_config.get('enabled', True):
+        yield None
+        return
+
+    trace = Trace(name, tracing_config.get('max_spans', 5000))
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        with span(name, **attrs):
+            yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        if trace.dropped:
+            logger.debug(f"Trace {name} dropped {trace.dropped} spans over the {trace.max_spans} limit")
+        if tracing_config.get('directory'):
+            write_chrome_trace(Path(tracing_config['directory']) / f"{name}-{int(time.time() * 1000)}.trace.json", [(name, trace.spans)])
+
+def chrome_events(spans: Iterable[TraceSpan], tid: int = 1, label: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Chrome trace event format ("X" complete events), readable by chrome://tracing and Perfetto"""
+    events = []
+    if label:
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": label}})
+    for record in spans:
+        events.append({
+            "name": record.name,
+            "cat": record.name.split('.', 1)[0],
+            "ph": "X",
+            "ts": round(record.start_ms * 1000),
+            "dur": round(record.duration_ms * 1000),
+            "pid": 1,
+            "tid": tid,
+            "args": record.attrs
+        })
+    return events
+
+def write_chrome_trace(path, runs: Iterable[Tuple[str, Iterable[TraceSpan]]]):
+    """Write (label, spans) runs to one trace file, one timeline row per run"""
+    events = []
+    for tid, (label, spans) in enumerate(runs, 1):
+        events.extend(chrome_events(spans or [], tid=tid, label=label))
+
+    path = Path(path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+        os.replace(tmp_path, path)
+        logger.info(f"Wrote {len(events)} trace events to {path}")
+    except OSError as e:
+        logger.warning(f"Could not write trace {path}: {e}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge trace files into one timeline")
+    parser.add_argument("inputs", nargs="+", help="Trace files written with tracing.directory")
+    parser.add_argument("--output", default="merged.trace.json")
+    args = parser.parse_args(argv)
+
+    events = []
+    for tid, path in enumerate(args.inputs, 1):
+        with open(path, encoding='utf-8') as f:
+            for event in json.load(f).get('traceEvents', []):
+                events.append({**event, "tid": tid})
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    logger.info(f"Merged {len(args.inputs)} traces into {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import src, config and benchmarks from the repository root, as the entry points do
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
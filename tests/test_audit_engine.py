@@ -0,0 +1,176 @@
+import asyncio
+import json
+import pytest
+from config.settings import Settings, config
+from src.agents.agent_factory import agent_registry
+from src.agents.audit_engine import CartAuditEngine
+from src.agents.base_agent import BaseAgent
+from src.core.models import AuditJob, TaskResult
+from src.core.page_graph import PageGraph
+from src.utils.tracing import span, trace_task, write_chrome_trace
+
+class FakeLease:
+    def __init__(self, account):
+        self.account = account
+        self.crashed = False
+
+class FakePool:
+    """Counts leases without a browser"""
+
+    def __init__(self):
+        self.leased = 0
+        self.max_leased = 0
+        self.accounts = []
+        self.released = 0
+
+    async def acquire(self, account=None):
+        self.leased += 1
+        self.max_leased = max(self.max_leased, self.leased)
+        self.accounts.append(account)
+        return FakeLease(account)
+
+    async def release(self, lease, crashed=False):
+        self.leased -= 1
+        self.released += 1
+
+    def stats(self):
+        return {"leased": self.leased}
+
+class FakeAgent(BaseAgent):
+    """Leases from the shared pool, holds it briefly and reports the pinned settings version"""
+    reload_during_run = False
+
+    def __init__(self, page_graph, pool=None):
+        super().__init__({}, pool=pool)
+        self.graph = page_graph
+
+    async def start(self):
+        await self.acquire_lease()
+
+    async def close(self):
+        await self.release_lease()
+
+    async def execute_task(self, goal=None, price_threshold=None):
+        with trace_task("fake.execute_task") as trace:
+            with span("navigate.goto"):
+                await asyncio.sleep(0.02)
+            if self.reload_during_run:
+                # A reload swaps the latest snapshot; the job must keep the one it started with
+                config._snapshot = Settings.from_dict(dict(config.settings.raw), version=config.settings.version + 1)
+        return TaskResult(True, f"checked {self.job_id} for {self.account}", data={
+            "threshold": price_threshold,
+            "seen_version": config.settings.version
+        }, spans=trace.spans if trace else [])
+
+class BrokenAgent(FakeAgent):
+    async def execute_task(self, goal=None, price_threshold=None):
+        raise RuntimeError("cart page crashed")
+
+class SelfLaunchingAgent(FakeAgent):
+    uses_pool = False
+    running = 0
+    max_running = 0
+
+    def __init__(self, page_graph):
+        super().__init__(page_graph)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def execute_task(self, goal=None, price_threshold=None):
+        SelfLaunchingAgent.running += 1
+        SelfLaunchingAgent.max_running = max(SelfLaunchingAgent.max_running, SelfLaunchingAgent.running)
+        await asyncio.sleep(0.02)
+        SelfLaunchingAgent.running -= 1
+        return TaskResult(True, "own browser", data={"pool": self.pool})
+
+@pytest.fixture(autouse=True)
+def fake_agents():
+    for name, cls in [("fake", FakeAgent), ("broken", BrokenAgent), ("self_launching", SelfLaunchingAgent)]:
+        agent_registry.register(name, cls)
+    yield
+    for name in ("fake", "broken", "self_launching"):
+        agent_registry._targets.pop(name, None)
+        agent_registry._classes.pop(name, None)
+
+@pytest.fixture
+def snapshot():
+    """Restore the latest settings snapshot after tests that simulate a reload"""
+    original = config.latest()
+    yield original
+    config._snapshot = original
+
+def run_audit(jobs, concurrency=2, pool=None):
+    async def run():
+        engine = CartAuditEngine(PageGraph(), concurrency=concurrency, pool=pool or FakePool())
+        await engine.start()
+        try:
+            return engine, await engine.run(jobs)
+        finally:
+            await engine.close()
+    return asyncio.run(run())
+
+def test_jobs_fan_out_under_the_concurrency_cap_on_one_pool():
+    pool = FakePool()
+    jobs = [AuditJob(job_id=f"job-{i}", price_threshold=10.0 * i, agent_mode="fake", account=f"acct-{i % 2}") for i in range(6)]
+    engine, report = run_audit(jobs, concurrency=2, pool=pool)
+
+    assert [result.data["job_id"] for result in report.results] == [job.job_id for job in jobs]
+    assert [result.data["threshold"] for result in report.results] == [job.price_threshold for job in jobs]
+    assert report.succeeded == 6
+    assert pool.max_leased == 2
+    assert pool.released == 6
+    assert pool.leased == 0
+    assert sorted(pool.accounts) == sorted(job.account for job in jobs)
+
+def test_a_failing_job_does_not_fail_the_audit():
+    jobs = [AuditJob("ok-1", agent_mode="fake"), AuditJob("bad", agent_mode="broken"),
+            AuditJob("unknown", agent_mode="no-such-agent"), AuditJob("ok-2", agent_mode="fake")]
+    engine, report = run_audit(jobs)
+
+    assert [result.success for result in report.results] == [True, False, False, True]
+    assert "cart page crashed" in report.results[1].message
+    assert report.results[1].data["job_id"] == "bad"
+    assert report.failed == 2
+    assert engine.pool.leased == 0
+
+def test_jobs_keep_the_settings_they_started_with(snapshot):
+    FakeAgent.reload_during_run = True
+    try:
+        engine, report = run_audit([AuditJob("pinned", agent_mode="fake")])
+    finally:
+        FakeAgent.reload_during_run = False
+
+    result = report.results[0]
+    assert result.data["config_version"] == snapshot.version
+    assert result.data["seen_version"] == snapshot.version
+    assert config.latest().version == snapshot.version + 1
+
+def test_agents_with_their_own_browser_skip_the_pool():
+    pool = FakePool()
+    jobs = [AuditJob(f"own-{i}", agent_mode="self_launching") for i in range(3)]
+    engine, report = run_audit(jobs, concurrency=3, pool=pool)
+
+    assert report.succeeded == 3
+    assert all(result.data["pool"] is None for result in report.results)
+    assert pool.accounts == []
+    assert SelfLaunchingAgent.max_running == 1
+
+def test_job_traces_merge_into_one_timeline(tmp_path):
+    jobs = [AuditJob(f"job-{i}", agent_mode="fake") for i in range(3)]
+    engine, report = run_audit(jobs, concurrency=3)
+    assert all(result.spans for result in report.results)
+
+    path = tmp_path / "audit.trace.json"
+    write_chrome_trace(path, [(result.data["job_id"], result.spans) for result in report.results])
+    events = json.loads(path.read_text())["traceEvents"]
+
+    rows = {event["args"]["name"]: event["tid"] for event in events if event["ph"] == "M"}
+    assert sorted(rows) == ["job-0", "job-1", "job-2"]
+    assert len(set(rows.values())) == 3
+    for tid in rows.values():
+        names = {event["name"] for event in events if event["ph"] == "X" and event["tid"] == tid}
+        assert names == {"fake.execute_task", "navigate.goto"}
@@ -0,0 +1,45 @@
+import asyncio
+from src.extractors.cart_extractor import CartExtractor
+
+class FakeElement:
+    def __init__(self, text="", value=None, attributes=None, children=None):
+        self.text = text
+        self.value = value
+        self.attributes = attributes or {}
+        self.children = children or {}
+
+    async def get_attribute(self, name):
+        return self.attributes.get(name)
+
+    async def query_selector(self, selector):
+        return self.children.get(selector)
+
+    async def text_content(self):
+        return self.text
+
+    async def evaluate(self, script):
+        # Mirrors the value-then-text read of the in-page script
+        return self.value if self.value not in (None, "") else self.text
+
+def _extract(quantity_children=None, attributes=None):
+    children = {
+        CartExtractor.NAME_SELECTORS[0]: FakeElement("Kitchen scale, stainless"),
+        CartExtractor.PRICE_SELECTORS[0]: FakeElement("$12.50"),
+    }
+    children.update(quantity_children or {})
+    row = FakeElement(attributes=attributes, children=children)
+    return asyncio.run(CartExtractor(page=None, mode="element")._extract_single_item(row))
+
+def test_element_fallback_reads_quantity_box():
+    item = _extract({CartExtractor.QUANTITY_SELECTORS[0]: FakeElement(value="3")})
+    assert item == {"name": "Kitchen scale, stainless", "price": 12.50, "quantity": 3}
+
+def test_element_fallback_prefers_data_quantity():
+    item = _extract({CartExtractor.QUANTITY_SELECTORS[0]: FakeElement(value="3")}, attributes={"data-quantity": "4"})
+    assert item["quantity"] == 4
+
+def test_element_fallback_reads_dropdown_prompt_text():
+    assert _extract({CartExtractor.QUANTITY_SELECTORS[-1]: FakeElement("Qty: 2")})["quantity"] == 2
+
+def test_element_fallback_defaults_to_one():
+    assert _extract()["quantity"] == 1
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import pytest
+from src.core.models import TaskResult
+from src.service.cart_service import CartCheckService
+
+class FakePool:
+    def stats(self):
+        return {"browsers": 0}
+
+class FakeEngine:
+    """Records the order jobs run in, without a browser; every job waits until release is set"""
+
+    def __init__(self):
+        self.pool = FakePool()
+        self.order = []
+        self.release = asyncio.Event()
+        self.signin_signals = {}
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def run_job(self, job, signin_signal=None):
+        self.signin_signals[job.job_id] = signin_signal
+        await self.release.wait()
+        self.order.append(job.job_id)
+        return TaskResult(True, f"checked against {job.price_threshold}", data={"job_id": job.job_id})
+
+async def raw_request(port, data: bytes):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+async def request(port, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else b""
+    return await raw_request(port, f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+
+def run_service(scenario):
+    """Start a one-worker service on a free port, run scenario(service, engine) and stop it"""
+    async def run():
+        engine = FakeEngine()
+        service = CartCheckService(engine=engine, host="127.0.0.1", port=0, concurrency=1)
+        await service.start()
+        try:
+            return await scenario(service, engine)
+        finally:
+            engine.release.set()
+            await service.close()
+    return asyncio.run(run())
+
+def test_submit_and_get_job():
+    async def scenario(service, engine):
+        status, submitted = await request(service.port, "POST", "/jobs", {"job_id": "cart-1", "threshold": 50})
+        assert status == 202
+        assert submitted["job_id"] == "cart-1"
+        assert submitted["status"] in ("queued", "running")
+
+        engine.release.set()
+        status, finished = await request(service.port, "POST", "/jobs", {"job_id": "cart-2", "wait": True})
+        assert status == 200
+        assert finished["status"] == "done"
+        assert finished["result"]["success"] is True
+
+        status, fetched = await request(service.port, "GET", "/jobs/cart-1")
+        assert status == 200
+        assert fetched["status"] == "done"
+        assert fetched["result"]["message"] == "checked against 50.0"
+    run_service(scenario)
+
+def test_signed_in_releases_the_running_job():
+    async def scenario(service, engine):
+        await request(service.port, "POST", "/jobs", {"job_id": "needs-signin"})
+        while "needs-signin" not in engine.signin_signals:
+            await asyncio.sleep(0.01)
+        signal = engine.signin_signals["needs-signin"]
+        assert not signal.is_set()
+
+        status, payload = await request(service.port, "POST", "/jobs/needs-signin/signed-in")
+        assert status == 200
+        assert payload["job_id"] == "needs-signin"
+        assert signal.is_set()
+
+        assert (await request(service.port, "GET", "/jobs/needs-signin/signed-in"))[0] == 405
+    run_service(scenario)
+
+def test_unknown_jobs_and_routes_are_404():
+    async def scenario(service, engine):
+        assert (await request(service.port, "GET", "/jobs/missing"))[0] == 404
+        assert (await request(service.port, "POST", "/jobs/missing/signed-in"))[0] == 404
+        assert (await request(service.port, "GET", "/nothing-here"))[0] == 404
+        status, health = await request(service.port, "GET", "/health")
+        assert status == 200
+        assert health["status"] == "ok"
+    run_service(scenario)
+
+@pytest.mark.parametrize("content_length, expected", [("abc", 400), ("-5", 400), (str(10 ** 7), 413)])
+def test_bad_content_length(content_length, expected):
+    async def scenario(service, engine):
+        data = f"POST /jobs HTTP/1.1\r\nHost: test\r\nContent-Length: {content_length}\r\n\r\n".encode()
+        status, payload = await raw_request(service.port, data)
+        assert status == expected
+        assert "error" in payload
+    run_service(scenario)
+
+def test_malformed_bodies_are_rejected():
+    async def scenario(service, engine):
+        body = b"not json"
+        data = f"POST /jobs HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        assert (await raw_request(service.port, data))[0] == 400
+        assert (await request(service.port, "POST", "/jobs", ["a list"]))[0] == 400
+        assert (await request(service.port, "POST", "/jobs", {"threshold": "cheap"}))[0] == 400
+        assert (await request(service.port, "POST", "/jobs", {"mode": "no-such-agent"}))[0] == 400
+    run_service(scenario)
+
+def test_duplicate_job_id_is_rejected():
+    async def scenario(service, engine):
+        assert (await request(service.port, "POST", "/jobs", {"job_id": "same"}))[0] == 202
+        status, payload = await request(service.port, "POST", "/jobs", {"job_id": "same"})
+        assert status == 400
+        assert "already exists" in payload["error"]
+    run_service(scenario)
+
+@pytest.mark.parametrize("job_id", ["../etc/passwd", "a b", "a/b", "x" * 129, "café"])
+def test_invalid_job_ids_are_rejected(job_id):
+    async def scenario(service, engine):
+        status, payload = await request(service.port, "POST", "/jobs", {"job_id": job_id})
+        assert status == 400
+        assert "job_id" in payload["error"]
+        assert job_id not in service.jobs
+    run_service(scenario)
+
+def test_higher_priority_jobs_run_first():
+    async def scenario(service, engine):
+        # The first job occupies the only worker while the rest queue up
+        await request(service.port, "POST", "/jobs", {"job_id": "first"})
+        while "first" not in engine.signin_signals:
+            await asyncio.sleep(0.01)
+        for job_id, priority in [("low", 0), ("high", 5), ("low-2", 0), ("urgent", 9)]:
+            await request(service.port, "POST", "/jobs", {"job_id": job_id, "priority": priority})
+
+        engine.release.set()
+        await service.wait("low-2", timeout=5)
+        return engine.order
+    assert run_service(scenario) == ["first", "urgent", "high", "low", "low-2"]
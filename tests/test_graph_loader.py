@@ -0,0 +1,118 @@
+import pytest
+from src.core import graph_loader
+from src.core.graph_loader import GraphDefinitionError, GraphLibrary
+
+SHOP_GRAPH = """
+site: shop
+pages:
+  - id: home
+    url: "https://shop.example"
+    elements:
+      - id: cart_link
+        type: link
+        selector_set: cart_link
+      - id: search
+        type: textbox
+        selectors: ["#search", "input[name=q]"]
+    actions:
+      - element: cart_link
+        target: cart
+  - id: cart
+    url: "https://shop.example/cart"
+    elements: []
+    actions: []
+"""
+
+BROKEN_GRAPH = """
+pages:
+  - id: home
+    url: "https://shop.example"
+    elements:
+      - id: cart_link
+        type: hyperlink
+        selector_set: cart_link
+      - id: search
+        type: textbox
+        selector_set: no_such_set
+      - id: button
+        type: button
+    actions:
+      - element: missing
+        type: teleport
+        target: cart
+  - id: home
+    elements: []
+"""
+
+@pytest.fixture
+def library(tmp_path):
+    graphs = tmp_path / "graphs"
+    graphs.mkdir()
+    (graphs / "shop.yaml").write_text(SHOP_GRAPH)
+    return GraphLibrary(directory=str(graphs), cache_dir=str(tmp_path / "cache"))
+
+def _caches(library, site="shop"):
+    return sorted(library.cache_dir.glob(f"{site}-*.pickle"))
+
+def test_valid_graph_compiles(library):
+    graph = library.get("shop")
+    assert set(graph.pages) == {"home", "cart"}
+    assert [action.target_page for action in graph.find_path("home", "cart")] == ["cart"]
+    search = graph.get_page("home").elements[1]
+    assert search.selectors == ["#search", "input[name=q]"]
+    assert library.get("shop") is graph
+    assert library.sites() == ["shop"]
+
+def test_every_problem_is_reported_at_once(library):
+    (library.directory / "broken.yaml").write_text(BROKEN_GRAPH)
+    with pytest.raises(GraphDefinitionError) as error:
+        library.get("broken")
+
+    problems = "\n".join(error.value.problems)
+    assert "element 'cart_link': type must be one of" in problems
+    assert "unknown selector_set 'no_such_set'" in problems
+    assert "element 'button': needs selector_set or a non-empty selectors list" in problems
+    assert "unknown element 'missing'" in problems
+    assert "action: type must be one of" in problems
+    assert "duplicate page id" in problems
+    assert "missing 'url'" in problems
+    assert _caches(library, "broken") == []
+
+def test_unknown_site(library):
+    with pytest.raises(KeyError):
+        library.get("elsewhere")
+
+def test_compiled_graph_is_cached(library, monkeypatch):
+    library.load_compiled("shop")
+    assert len(_caches(library)) == 1
+
+    def not_recompiled(*args):
+        raise AssertionError("compiled again despite a fresh cache")
+    monkeypatch.setattr(graph_loader, "compile_definition", not_recompiled)
+    assert [page["id"] for page in library.load_compiled("shop")["pages"]] == ["home", "cart"]
+
+def test_editing_the_file_invalidates_the_cache(library):
+    library.load_compiled("shop")
+    [old_cache] = _caches(library)
+
+    (library.directory / "shop.yaml").write_text(SHOP_GRAPH.replace('"https://shop.example/cart"', '"https://shop.example/basket"'))
+    compiled = library.load_compiled("shop")
+    assert compiled["pages"][1]["url"] == "https://shop.example/basket"
+    assert _caches(library) != [old_cache]
+    assert len(_caches(library)) == 1
+
+def test_format_bump_invalidates_the_cache(library, monkeypatch):
+    library.load_compiled("shop")
+    [old_cache] = _caches(library)
+
+    monkeypatch.setattr(graph_loader, "COMPILED_FORMAT", graph_loader.COMPILED_FORMAT + 1)
+    library.load_compiled("shop")
+    assert _caches(library) != [old_cache]
+
+def test_unreadable_cache_is_recompiled(library):
+    library.load_compiled("shop")
+    [cache] = _caches(library)
+    cache.write_bytes(b"not a pickle")
+
+    assert len(library.load_compiled("shop")["pages"]) == 2
+    assert cache.read_bytes() != b"not a pickle"
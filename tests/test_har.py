@@ -0,0 +1,121 @@
+import asyncio
+import base64
+import json
+import os
+import pytest
+from config.settings import SettingsError
+from src.browser.har import HarReplayer, recording_path, replay_path
+
+CART_URL = "https://www.amazon.com/gp/cart/view.html"
+
+def _entry(url, body, status=200, method="GET"):
+    return {
+        "request": {"method": method, "url": url, "headers": []},
+        "response": {
+            "status": status,
+            "statusText": "OK",
+            "headers": [
+                {"name": "content-type", "value": "text/html"},
+                {"name": "content-length", "value": str(len(body))}
+            ],
+            "content": {"size": len(body), "mimeType": "text/html",
+                        "text": base64.b64encode(body).decode("ascii"), "encoding": "base64"}
+        }
+    }
+
+def _write_archive(path, entries):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"log": {"version": "1.2", "entries": entries}}))
+    return path
+
+class FakeRequest:
+    def __init__(self, url, method="GET"):
+        self.url = url
+        self.method = method
+
+class FakeRoute:
+    def __init__(self, url):
+        self.request = FakeRequest(url)
+        self.fulfilled = None
+        self.aborted = None
+
+    async def fulfill(self, status, headers, body):
+        self.fulfilled = {"status": status, "headers": headers, "body": body}
+
+    async def abort(self, error_code):
+        self.aborted = error_code
+
+    async def fallback(self):
+        self.aborted = "fallback"
+
+class FakeContext:
+    def __init__(self):
+        self.handler = None
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+    def request(self, url):
+        route = FakeRoute(url)
+        asyncio.run(self.handler(route))
+        return route
+
+@pytest.fixture
+def archive(tmp_path):
+    return _write_archive(tmp_path / "manual_run.har.json", [
+        _entry(CART_URL, b"<html>first</html>"),
+        _entry(CART_URL, b"<html>second</html>"),
+        _entry("https://www.amazon.com/api/subtotal?ts=1", b"{}")
+    ])
+
+def test_replays_recorded_responses_in_order(archive):
+    replayer = HarReplayer(str(archive))
+    context = FakeContext()
+    asyncio.run(replayer.install(context))
+
+    first = context.request(CART_URL)
+    assert first.fulfilled["status"] == 200
+    assert first.fulfilled["body"] == b"<html>first</html>"
+    assert "content-length" not in first.fulfilled["headers"]
+    assert context.request(CART_URL).fulfilled["body"] == b"<html>second</html>"
+    assert context.request(CART_URL).fulfilled["body"] == b"<html>second</html>"
+
+    replayer.reset(context)
+    assert context.request(CART_URL).fulfilled["body"] == b"<html>first</html>"
+
+def test_matches_without_query_and_aborts_unrecorded(archive):
+    replayer = HarReplayer(str(archive))
+    context = FakeContext()
+    asyncio.run(replayer.install(context))
+
+    assert context.request("https://www.amazon.com/api/subtotal?ts=2").fulfilled["body"] == b"{}"
+    assert context.request("https://www.amazon.com/gp/buy").aborted == "internetdisconnected"
+    assert replayer.stats()["hits"] == 1
+    assert replayer.stats()["misses"] == 1
+
+def test_replay_path_prefers_har_path_then_newest_recording(tmp_path):
+    har_path = tmp_path / "manual_run.har.json"
+    older = _write_archive(recording_path(str(har_path), "job-1"), [])
+    newer = _write_archive(recording_path(str(har_path), "job-2"), [])
+    os.utime(older, (1_000, 1_000))
+    os.utime(newer, (2_000, 2_000))
+
+    assert replay_path(str(har_path)) == newer
+    assert replay_path(str(har_path), "job-1") == older
+
+    _write_archive(har_path, [])
+    assert replay_path(str(har_path)) == har_path
+
+def test_missing_archive_is_a_configuration_error(tmp_path):
+    with pytest.raises(SettingsError, match="network.har_path"):
+        HarReplayer(str(tmp_path / "missing.har.json"))
+
+def test_corrupt_archive_is_a_configuration_error(tmp_path):
+    corrupt = tmp_path / "corrupt.har.json"
+    corrupt.write_text('{"log": {}}')
+    with pytest.raises(SettingsError, match="network.har_path"):
+        HarReplayer(str(corrupt))
+
+    corrupt.write_text("not json")
+    with pytest.raises(SettingsError, match="network.har_path"):
+        HarReplayer(str(corrupt))
@@ -0,0 +1,124 @@
+import asyncio
+import pytest
+from pydantic import BaseModel
+from benchmarks.fake_llm import FakeChatModel
+from src.llm import cache as cache_module
+from src.llm.cache import CachingChatModel, LLMResponseStore
+
+class CartDecision(BaseModel):
+    action: str
+    total: float
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock.time)
+    return clock
+
+@pytest.fixture
+def store(tmp_path, clock):
+    store = LLMResponseStore(path=str(tmp_path / "llm.sqlite3"), max_entries=100, ttl_seconds=3600)
+    yield store
+    store.close()
+
+def prompt(page_state: str):
+    return [("system", "You check Amazon carts."), ("human", page_state)]
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_repeated_prompt_hits_after_noise_is_normalized(store):
+    llm = FakeChatModel()
+    cached = CachingChatModel(llm, store)
+    first = run(cached.ainvoke(prompt("Cart at 2026-10-17T09:15:02Z session=" + "a" * 40 + " total $42.10")))
+    second = run(cached.ainvoke(prompt("Cart at  2026-10-18 11:00:59  session=" + "b" * 40 + "\n total $42.10")))
+    assert llm.calls == 1
+    assert second == first
+
+def test_different_page_state_misses(store):
+    llm = FakeChatModel()
+    cached = CachingChatModel(llm, store)
+    run(cached.ainvoke(prompt("total $42.10")))
+    run(cached.ainvoke(prompt("total $99.00")))
+    assert llm.calls == 2
+
+def test_model_temperature_and_schema_are_part_of_the_key(store):
+    messages = prompt("total $42.10")
+    base = CachingChatModel(FakeChatModel(responder=lambda m: '{"action": "checkout", "total": 42.1}'), store)
+    keys = {base.cache_key(messages)}
+
+    other_model = CachingChatModel(FakeChatModel(model_name="other-model"), store)
+    keys.add(other_model.cache_key(messages))
+
+    warm = FakeChatModel()
+    warm.temperature = 0.7
+    keys.add(CachingChatModel(warm, store).cache_key(messages))
+
+    keys.add(base.with_structured_output(CartDecision).cache_key(messages))
+    keys.add(base.with_structured_output(CartDecision, include_raw=True).cache_key(messages))
+    assert len(keys) == 5
+
+def test_entries_expire_after_ttl(store, clock):
+    llm = FakeChatModel()
+    cached = CachingChatModel(llm, store)
+    run(cached.ainvoke(prompt("total $42.10")))
+    clock.now += 3599
+    run(cached.ainvoke(prompt("total $42.10")))
+    assert llm.calls == 1
+
+    clock.now += 2
+    run(cached.ainvoke(prompt("total $42.10")))
+    assert llm.calls == 2
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    store = LLMResponseStore(path=str(tmp_path / "lru.sqlite3"), max_entries=2, ttl_seconds=0)
+    llm = FakeChatModel()
+    cached = CachingChatModel(llm, store)
+    for page in ("a", "b"):
+        clock.now += 1
+        run(cached.ainvoke(prompt(page)))
+    clock.now += 1
+    run(cached.ainvoke(prompt("a")))  # "a" is now more recent than "b"
+    clock.now += 1
+    run(cached.ainvoke(prompt("c")))  # Over max_entries: "b" goes
+    assert llm.calls == 3
+
+    run(cached.ainvoke(prompt("a")))
+    assert llm.calls == 3
+    run(cached.ainvoke(prompt("b")))
+    assert llm.calls == 4
+    assert store.stats()["entries"] == 2
+    store.close()
+
+def test_failed_structured_parse_is_not_stored(store):
+    llm = FakeChatModel(responder=lambda m: "not json")
+    structured = CachingChatModel(llm, store).with_structured_output(CartDecision, include_raw=True)
+    result = run(structured.ainvoke(prompt("total $42.10")))
+    assert result["parsed"] is None and result["parsing_error"] is not None
+    run(structured.ainvoke(prompt("total $42.10")))
+    assert llm.calls == 2
+    assert store.stats()["stores"] == 0
+
+def test_structured_output_round_trips_through_the_store(store):
+    llm = FakeChatModel(responder=lambda m: '{"action": "checkout", "total": 42.1}')
+    structured = CachingChatModel(llm, store).with_structured_output(CartDecision, include_raw=True)
+    first = run(structured.ainvoke(prompt("total $42.10")))
+    second = run(structured.ainvoke(prompt("total $42.10")))
+    assert llm.calls == 1
+    assert isinstance(second["parsed"], CartDecision)
+    assert second["parsed"] == first["parsed"]
+
+def test_stats_count_hits_and_misses(store):
+    cached = CachingChatModel(FakeChatModel(), store)
+    for page in ("a", "a", "a", "b"):
+        run(cached.ainvoke(prompt(page)))
+    stats = cached.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"], stats["entries"]) == (2, 2, 2, 2)
+    assert stats["hit_rate"] == 0.5
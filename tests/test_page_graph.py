@@ -0,0 +1,82 @@
+import pytest
+from src.core.graph_loader import graph_library
+from src.core.models import Page, Action, ActionType
+from src.core.page_graph import PageGraph, AmazonGraphBuilder
+
+def _graph(*pages):
+    graph = PageGraph()
+    graph.default_latency_ms = 1000
+    graph.recompute_threshold = 0.1
+    for page_id, url, targets in pages:
+        actions = [Action(f"to_{target}", ActionType.CLICK, target, f"{page_id} -> {target}") for target in targets]
+        graph.add_page(Page(page_id, url, "", [], actions))
+    return graph
+
+@pytest.fixture
+def site():
+    return _graph(
+        ("home", "https://shop.example", ["cart", "account"]),
+        ("cart", "https://shop.example/gp/cart", ["checkout"]),
+        ("cart_view", "https://shop.example/gp/cart/view.html", ["checkout"]),
+        ("account", "https://shop.example/account", ["cart"]),
+        ("checkout", "https://shop.example/gp/buy", []),
+    )
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://shop.example/", "home"),
+    ("https://shop.example/gp/cart", "cart"),
+    ("https://shop.example/gp/cart/", "cart"),
+    ("https://shop.example/gp/cart/view.html?ref=nav", "cart_view"),
+    ("https://shop.example/gp/cart/smart-wagon", "cart"),
+    ("https://shop.example/gp/buy/spc/handlers/display.html", "checkout"),
+])
+def test_page_for_url_prefers_the_longest_segment_match(site, url, expected):
+    assert site.page_for_url(url).id == expected
+
+@pytest.mark.parametrize("url", [
+    "https://shop.example/gp/cartfoo",
+    "https://shop.example/gp/buyer-help",
+    "https://shop.example/search?q=cart",
+])
+def test_page_for_url_does_not_match_partial_segments(site, url):
+    assert site.page_for_url(url) is None
+
+def test_find_path_takes_the_cheapest_route(site):
+    assert [action.target_page for action in site.find_path("home", "checkout")] == ["cart", "checkout"]
+    assert site.find_path("checkout", "home") == []
+    assert site.find_path("cart", "cart") == []
+
+def test_slow_transitions_reroute(site):
+    home_to_cart = site.get_actions_from_page("home")[0]
+    for _ in range(10):
+        site.record_transition(home_to_cart, 20000)
+    assert [action.target_page for action in site.find_path("home", "checkout")] == ["account", "cart", "checkout"]
+
+def test_failures_raise_the_edge_cost(site):
+    action = site.get_actions_from_page("cart")[0]
+    before = site.edge_cost(action)
+    site.record_transition(action, 1000, success=False)
+    assert site.edge_cost(action) > before
+
+def test_edge_stats_round_trip(site, tmp_path):
+    action = site.get_actions_from_page("home")[0]
+    site.record_transition(action, 400)
+    path = tmp_path / "route_stats.json"
+    site.save_edge_stats(str(path))
+
+    restored = _graph(("home", "https://shop.example", ["cart"]), ("cart", "https://shop.example/gp/cart", []))
+    restored.load_edge_stats(str(path))
+    assert restored.edge_stats()["home:to_cart:cart"] == site.edge_stats()["home:to_cart:cart"]
+
+def test_built_graph_is_a_private_copy():
+    first = AmazonGraphBuilder.build()
+    second = AmazonGraphBuilder.build()
+    assert first is not graph_library.get("amazon")
+    assert set(first.pages) == set(graph_library.get("amazon").pages)
+
+    action = first.get_actions_from_page("homepage")[0]
+    first.record_transition(action, 123)
+    assert first.edge_stats()
+    assert not second.edge_stats()
+    assert not graph_library.get("amazon").edge_stats()
+    assert first.find_path("homepage", "cart_page") == [action]
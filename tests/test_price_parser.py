@@ -0,0 +1,62 @@
+import pytest
+from config.settings import Settings, config, _pinned_settings
+from src.extractors.price_parser import parse_price, parse_price_cents, parse_prices, default_locale
+
+@pytest.mark.parametrize("text, expected", [
+    ("$.99", 0.99),
+    ("Price: $.5", 0.50),
+    ("$0.99", 0.99),
+    ("$12", 12.00),
+])
+def test_leading_decimal(text, expected):
+    assert parse_price(text, "auto") == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("$1,234.56", 1234.56),
+    ("$1,234,567.89", 1234567.89),
+    ("USD 1,234", 1234.00),
+    ("1 234,50 €", 1234.50),
+    ("1 234,50 €", 1234.50),
+])
+def test_thousands_separators(text, expected):
+    assert parse_price(text, "auto") == expected
+
+@pytest.mark.parametrize("text, locale, expected", [
+    ("1.234,56 €", "auto", 1234.56),
+    ("1.234,56 €", "de", 1234.56),
+    ("12,34 €", "auto", 12.34),
+    ("1.234 €", "de_DE", 1234.00),
+    ("1,234", "en_US", 1234.00),
+])
+def test_decimal_comma(text, locale, expected):
+    assert parse_price(text, locale) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("12,34 EUR", 12.34),
+    ("99.95 GBP", 99.95),
+    ("5 €", 5.00),
+    ("€.75", 0.75),
+])
+def test_currency_suffix_and_codes(text, expected):
+    assert parse_price(text, "auto") == expected
+
+def test_text_without_price():
+    assert parse_price("", "auto") == 0.0
+    assert parse_price("Out of stock", "auto") == 0.0
+
+def test_rounds_extra_decimals():
+    assert parse_price_cents("$1.995", "auto") == 200
+
+def test_batch_matches_single_parses():
+    texts = ["$.99", "$1,234.56", "1.234,56 €", "12,34 EUR", "$.99"]
+    assert parse_prices(texts, "auto") == [parse_price_cents(text, "auto") for text in texts]
+
+def test_default_locale_follows_pinned_snapshot():
+    german = Settings.from_dict({"extraction": {"locale": "de"}}, version=99)
+    token = _pinned_settings.set(german)
+    try:
+        assert default_locale() == "de"
+        assert parse_price("1.234") == 1234.00
+    finally:
+        _pinned_settings.reset(token)
+    assert default_locale() == (config.latest().get('extraction.locale', 'auto') or 'auto')
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import threading
+import pytest
+from src.navigation import selectors as selectors_module
+from src.navigation.selectors import SelectorManager
+
+HOUR = 3600.0
+
+class CartSelectors:
+    CART_BUTTON = ["#nav-cart", ".nav-cart-icon", "a[href*='cart']"]
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(selectors_module.time, "time", clock.time)
+    return clock
+
+@pytest.fixture
+def stats_path(tmp_path):
+    return tmp_path / "selector_stats.json"
+
+def _manager(stats_path, save_interval=3600):
+    manager = SelectorManager(CartSelectors, stats_path=str(stats_path))
+    manager.half_life = 24 * HOUR
+    manager.save_interval = save_interval
+    manager._last_save = selectors_module.time.time()
+    return manager
+
+def test_unseen_selectors_keep_static_order(stats_path, clock):
+    manager = _manager(stats_path)
+    assert manager.get_selectors("cart_button") == CartSelectors.CART_BUTTON
+
+def test_winners_move_up_and_losers_down(stats_path, clock):
+    manager = _manager(stats_path)
+    for _ in range(3):
+        manager.record_failure("cart_button", "#nav-cart")
+        manager.record_success("cart_button", "a[href*='cart']")
+    assert manager.get_selectors("cart_button") == ["a[href*='cart']", ".nav-cart-icon", "#nav-cart"]
+
+def test_old_evidence_decays_back_to_static_order(stats_path, clock):
+    manager = _manager(stats_path)
+    manager.record_success("cart_button", "a[href*='cart']")
+    manager.record_failure("cart_button", "#nav-cart")
+    entry = manager._load()["cart_button"]["a[href*='cart']"]
+    now = clock.now
+
+    clock.now += 24 * HOUR
+    assert manager._score(entry, clock.now) == pytest.approx((0.5 + 1) / (0.5 + 2))
+
+    clock.now = now + 1000 * 24 * HOUR
+    assert manager.get_selectors("cart_button") == CartSelectors.CART_BUTTON
+
+def test_save_merges_with_counts_from_other_writers(stats_path, clock):
+    first = _manager(stats_path)
+    second = _manager(stats_path)
+    first.get_selectors("cart_button")
+    second.get_selectors("cart_button")
+
+    first.record_success("cart_button", "#nav-cart")
+    second.record_success("cart_button", "#nav-cart")
+    second.record_failure("cart_button", ".nav-cart-icon")
+    first.save()
+    second.save()
+
+    saved = json.loads(stats_path.read_text())["cart_button"]
+    assert saved["#nav-cart"]["successes"] == pytest.approx(2.0)
+    assert saved[".nav-cart-icon"]["failures"] == pytest.approx(1.0)
+
+    # Nothing new to add, so a second save leaves the file alone
+    second.save()
+    assert json.loads(stats_path.read_text())["cart_button"]["#nav-cart"]["successes"] == pytest.approx(2.0)
+
+def test_failed_save_keeps_counts_for_the_next_one(stats_path, clock, monkeypatch):
+    manager = _manager(stats_path)
+    manager.record_success("cart_button", "#nav-cart")
+
+    def unwritable(*args, **kwargs):
+        raise OSError("read-only file system")
+    monkeypatch.setattr(selectors_module.json, "dump", unwritable)
+    manager.save()
+    assert not stats_path.exists()
+
+    monkeypatch.undo()
+    manager.save()
+    assert json.loads(stats_path.read_text())["cart_button"]["#nav-cart"]["successes"] == pytest.approx(1.0)
+
+def test_saves_from_the_event_loop_run_on_a_worker_thread(stats_path, clock, monkeypatch):
+    manager = _manager(stats_path, save_interval=0)
+    save = manager.save
+    saving_threads = []
+
+    def tracked_save():
+        saving_threads.append(threading.current_thread())
+        save()
+    monkeypatch.setattr(manager, "save", tracked_save)
+
+    async def run():
+        manager.record_success("cart_button", "#nav-cart")
+        assert manager._flush_task is not None
+        await manager.flush()
+
+    asyncio.run(run())
+    assert saving_threads
+    assert threading.main_thread() not in saving_threads
+    assert json.loads(stats_path.read_text())["cart_button"]["#nav-cart"]["successes"] == pytest.approx(1.0)
@@ -0,0 +1,19 @@
+from config.settings import Settings, config
+from src.core.graph_loader import graph_library
+from src.navigation.selectors import AmazonSelectors, selector_registry
+
+def test_generic_cart_item_selector_is_last():
+    assert AmazonSelectors.CART_ITEMS[-1] == ".a-spacing-mini"
+
+def test_graph_elements_follow_reloaded_selector_profile():
+    graph = graph_library.get("amazon")
+    cart_link = next(element for element in graph.get_page("homepage").elements if element.id == "cart_link")
+    assert cart_link.selectors == AmazonSelectors.CART_LINK
+    assert selector_registry.get("homepage.cart_link") == AmazonSelectors.CART_LINK
+
+    profile = Settings.from_dict({"selectors": {"cart_link": ["#new-cart-link"]}}, version=99)
+    with config.pinned(profile):
+        assert cart_link.selectors == ["#new-cart-link"]
+        assert selector_registry.get("homepage.cart_link") == ["#new-cart-link"]
+
+    assert cart_link.selectors == AmazonSelectors.CART_LINK
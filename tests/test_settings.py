@@ -0,0 +1,123 @@
+import asyncio
+import os
+import pytest
+import yaml
+from config.settings import Config, Settings, SettingsError
+
+VALID = {
+    "price_threshold": 75,
+    "browser": {"headless": True, "timeout": 20000},
+    "extraction": {"mode": "snapshot", "batch_size": 25},
+    "selectors": {"CART_TOTAL": ["#total"]},
+}
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "site_config.yaml"
+    path.write_text(yaml.safe_dump(VALID))
+    return path
+
+def _rewrite(path, data):
+    """Replace the file and move its mtime forward, as a later save would"""
+    path.write_text(yaml.safe_dump(data) if isinstance(data, dict) else data)
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+def test_from_dict_builds_typed_settings():
+    settings = Settings.from_dict(VALID, version=3)
+    assert settings.version == 3
+    assert settings.price_threshold == 75.0
+    assert settings.browser.headless is True
+    assert settings.browser.timeout == 20000
+    assert settings.browser.viewport_width == 1280
+    assert settings.extraction.mode == "snapshot"
+    assert settings.extraction.max_items is None
+    assert settings.selectors == {"cart_total": ("#total",)}
+    assert settings.get("browser.timeout") == 20000
+    assert settings.get("browser.missing", "fallback") == "fallback"
+
+def test_from_dict_reports_every_problem():
+    with pytest.raises(SettingsError) as error:
+        Settings.from_dict({
+            "price_threshold": "cheap",
+            "browser": {"timeout": 0},
+            "readiness": ["fast"],
+            "extraction": {"mode": "telepathy", "max_items": -1},
+            "selectors": {"cart_total": []},
+        })
+
+    problems = error.value.problems
+    assert any(problem.startswith("price_threshold: must be a number") for problem in problems)
+    assert any(problem.startswith("browser.timeout: must be at least 1") for problem in problems)
+    assert "readiness: must be a mapping" in problems
+    assert any(problem.startswith("extraction.mode: must be one of") for problem in problems)
+    assert any(problem.startswith("extraction.max_items: must be at least 1") for problem in problems)
+    assert any(problem.startswith("selectors.cart_total") for problem in problems)
+
+def test_from_dict_rejects_non_mappings():
+    with pytest.raises(SettingsError):
+        Settings.from_dict(["not", "a", "mapping"])
+
+def test_reload_swaps_in_a_new_version(config_file):
+    config = Config(config_file)
+    first = config.settings
+    assert first.version == 1
+    seen = []
+    config.subscribe(lambda old, new: seen.append((old.version, new.version)))
+
+    _rewrite(config_file, dict(VALID, price_threshold=50))
+    assert config.check_for_changes() is True
+    assert config.settings.version == 2
+    assert config.get("price_threshold") == 50
+    assert seen == [(1, 2)]
+    assert first.price_threshold == 75.0  # Old snapshots never change
+
+    assert config.check_for_changes() is False
+
+def test_invalid_reload_keeps_the_current_settings(config_file):
+    config = Config(config_file)
+    config.settings
+
+    _rewrite(config_file, dict(VALID, extraction={"mode": "telepathy"}))
+    assert config.reload() is False
+    _rewrite(config_file, "browser: [unclosed")
+    assert config.reload() is False
+
+    assert config.settings.version == 1
+    assert config.settings.extraction.mode == "snapshot"
+
+def test_invalid_file_at_startup_falls_back_to_defaults(tmp_path):
+    path = tmp_path / "site_config.yaml"
+    path.write_text(yaml.safe_dump({"extraction": {"mode": "telepathy"}}))
+    assert Config(path).settings.extraction.mode == "script"
+
+def test_pinned_settings_survive_a_reload(config_file):
+    config = Config(config_file)
+
+    async def job(started, reloaded):
+        with config.pinned() as settings:
+            started.set()
+            await reloaded.wait()
+            return settings.version, config.settings.version, config.get("price_threshold")
+
+    async def run():
+        started, reloaded = asyncio.Event(), asyncio.Event()
+        task = asyncio.ensure_future(job(started, reloaded))
+        await started.wait()
+        _rewrite(config_file, dict(VALID, price_threshold=50))
+        config.reload()
+        reloaded.set()
+        return await task, config.settings.version
+
+    (pinned_version, seen_version, threshold), latest_version = asyncio.run(run())
+    assert (pinned_version, seen_version, threshold) == (1, 1, 75)
+    assert latest_version == 2
+
+def test_pinned_blocks_nest_and_restore(config_file):
+    config = Config(config_file)
+    other = Settings.from_dict(dict(VALID, price_threshold=5), version=42)
+    with config.pinned(other):
+        assert config.get("price_threshold") == 5
+        with config.pinned():
+            assert config.settings is other
+    assert config.settings.version == 1
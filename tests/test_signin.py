@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from src.navigation import signin as signin_module
+from src.navigation.signin import SignInWaiter, WATCH_FAILED, is_signin_url
+
+class FakePage:
+    """Sign-in page whose URL watcher behaves as told; timeouts passed in are recorded"""
+
+    def __init__(self, url_outcome=None):
+        self.url_outcome = url_outcome
+        self.timeouts = []
+
+    async def wait_for_url(self, predicate, timeout=None):
+        self.timeouts.append(timeout)
+        return await _outcome(self.url_outcome)
+
+async def _outcome(outcome):
+    if isinstance(outcome, Exception):
+        raise outcome
+    if outcome == "now":
+        return None
+    await asyncio.Event().wait()  # Never matches
+
+@pytest.fixture
+def cart_outcome(monkeypatch):
+    """Outcome of the cart selector watcher, settable per test"""
+    state = {"outcome": None, "timeouts": []}
+
+    async def wait_for(page, selectors, timeout=30000, visible=True):
+        state["timeouts"].append(timeout)
+        return await _outcome(state["outcome"])
+    monkeypatch.setattr(signin_module.selector_engine, "wait_for", wait_for)
+    return state
+
+def _wait(page, signal=None, timeout=0.2):
+    waiter = SignInWaiter(page, ["#sc-active-cart"], timeout=timeout)
+    return asyncio.run(waiter.wait(signal=signal, use_console=False))
+
+def test_signin_urls():
+    assert is_signin_url("https://www.amazon.com/ap/signin?openid.return_to=cart")
+    assert not is_signin_url("https://www.amazon.com/gp/cart/view.html?ref_=nav_ya_signin")
+
+def test_watchers_have_no_timeout_of_their_own(cart_outcome):
+    page = FakePage()
+    assert _wait(page) is None
+    assert page.timeouts == [0]
+    assert cart_outcome["timeouts"] == [0]
+
+def test_leaving_signin_ends_the_wait(cart_outcome):
+    assert _wait(FakePage("now")) == "left_signin"
+
+def test_cart_appearing_ends_the_wait(cart_outcome):
+    cart_outcome["outcome"] = "now"
+    assert _wait(FakePage()) == "cart_visible"
+
+def test_signal_ends_the_wait(cart_outcome):
+    async def run():
+        signal = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.05, signal.set)
+        return await SignInWaiter(FakePage(), [], timeout=5).wait(signal=signal, use_console=False)
+    assert asyncio.run(run()) == "signal"
+
+def test_watcher_timeouts_count_as_a_timeout(cart_outcome):
+    cart_outcome["outcome"] = PlaywrightTimeoutError("Timeout 200ms exceeded")
+    assert _wait(FakePage(PlaywrightTimeoutError("Timeout 200ms exceeded"))) is None
+
+def test_broken_watchers_are_reported(cart_outcome):
+    cart_outcome["outcome"] = RuntimeError("Target page, context or browser has been closed")
+    assert _wait(FakePage(RuntimeError("Target page, context or browser has been closed"))) == WATCH_FAILED
+
+def test_one_broken_watcher_leaves_the_other_running(cart_outcome):
+    cart_outcome["outcome"] = "now"
+    assert _wait(FakePage(RuntimeError("navigation aborted"))) == "cart_visible"
@@ -0,0 +1,38 @@
+import pytest
+from src.agents.step_controller import AgentStepController, SUBTOTAL_PATTERN
+
+THRESHOLD = 100.0
+
+@pytest.mark.parametrize("text", [
+    "Check whether the total is below $100.00 threshold",
+    "Next: verify total is below $100",
+    "Cart total unknown yet; threshold is $100",
+    "The total exceeds $100",
+])
+def test_threshold_restatements_are_not_totals(text):
+    assert AgentStepController.find_total([text], THRESHOLD) is None
+
+def test_value_equal_to_threshold_is_rejected():
+    assert AgentStepController.find_total(["Subtotal (2 items): $100.00"], THRESHOLD) is None
+
+def test_extracted_cart_total():
+    assert AgentStepController.find_total(["Subtotal (3 items): $87.45"], THRESHOLD) == 87.45
+    assert AgentStepController.find_total(["Order total: $1,234.50"], THRESHOLD) == 1234.50
+
+def test_model_text_only_trusts_subtotal_labels():
+    assert AgentStepController.find_total(["I think the total is $42"], THRESHOLD, patterns=[SUBTOTAL_PATTERN]) is None
+    assert AgentStepController.find_total(["Cart subtotal shows $42.10"], THRESHOLD, patterns=[SUBTOTAL_PATTERN]) == 42.10
+
+def test_on_step_ignores_threshold_in_memory():
+    class Brain:
+        evaluation_previous_goal = "Opened the cart"
+        memory = "Cart total unknown yet; threshold is $100"
+        next_goal = "Next: verify total is below $100"
+
+    class Output:
+        current_state = Brain()
+
+    controller = AgentStepController(THRESHOLD, max_steps=10, max_seconds=60)
+    controller.on_step(None, Output(), 1)
+    assert controller.cart_total is None
+    assert controller.stop_reason is None